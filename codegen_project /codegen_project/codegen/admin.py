@@ -1,5 +1,7 @@
 # projectapp/admin.py
 from django.contrib import admin
-from .models import ProjectHistory
+from .models import ProjectHistory, ProjectFile, FileBlob
 
 admin.site.register(ProjectHistory)
+admin.site.register(ProjectFile)
+admin.site.register(FileBlob)
@@ -0,0 +1,258 @@
+import contextlib
+import io
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count, Sum
+from django.db.models.functions import Length
+from django.test import RequestFactory, override_settings
+
+from codegen.utils.bench_data import RESPONSE_VARIANTS, code_file, project_files, response_of_size
+from codegen.utils.project_writer import write_files
+
+RESPONSE_SIZES = (10 * 1024, 100 * 1024, 500 * 1024, 2 * 1024 * 1024)
+PROJECT_SIZES = (10, 100, 500)
+
+HISTORY_CASES = ("fetch_history[summary page,100 projects]", "fetch_history[project,500 files]")
+SAVE_CASE = "create_with_files[100 files]"
+
+# Differences below these are noise, whatever the ratio
+MIN_SECONDS_DELTA = 0.0005
+MIN_PEAK_DELTA = 64 * 1024
+
+
+def _with_mode(name, mode):
+    """A case name with a mode such as ",uncompressed" added inside its brackets."""
+    return name[:-1] + mode + "]"
+
+
+def _label(size):
+    return f"{size // (1024 * 1024)}MB" if size >= 1024 * 1024 else f"{size // 1024}KB"
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the parsing, sanitizing and persistence hot paths on synthetic model output. "
+        "Reports throughput and peak memory, and can save or compare against a baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=5, help="Timed runs per case (the median is reported).")
+        parser.add_argument("--filter", default="", help="Only run cases whose name contains this text.")
+        parser.add_argument("--max-size", type=int, default=max(RESPONSE_SIZES),
+                            help="Largest synthetic response in bytes.")
+        parser.add_argument("--baseline", default=None,
+                            help="Baseline file (default: CODEGEN_BENCH_BASELINE or <BASE_DIR>/bench_baseline.json).")
+        parser.add_argument("--save-baseline", action="store_true", help="Write the results as the new baseline.")
+        parser.add_argument("--compare", action="store_true", help="Fail if a case regressed against the baseline.")
+        parser.add_argument("--tolerance", type=float, default=0.25,
+                            help="Allowed slowdown / memory growth as a fraction of the baseline.")
+        parser.add_argument("--skip-db", action="store_true",
+                            help="Skip the storage, create_with_files and fetch_history cases (they need a test database).")
+
+    def handle(self, *args, **options):
+        # Imported here so the command can be listed without an OPENAI_API_KEY
+        from codegen import views
+
+        self.views = views
+        self.repeat = max(1, options["repeat"])
+        self.filter = options["filter"]
+        baseline_path = Path(options["baseline"] or getattr(
+            settings, 'CODEGEN_BENCH_BASELINE', settings.BASE_DIR / "bench_baseline.json"
+        ))
+
+        results = {}
+        sizes = [size for size in RESPONSE_SIZES if size <= options["max_size"]]
+        with tempfile.TemporaryDirectory(prefix="codegen-bench-") as workdir:
+            cases = [
+                self.parser_cases(sizes),
+                self.process_cases(),
+                self.merge_cases(workdir),
+                self.writer_cases(workdir),
+            ]
+            for group in cases:
+                for name, func, work, unit in group:
+                    if self.filter in name:
+                        results[name] = self.measure(name, func, work, unit)
+
+            if not options["skip_db"] and any(self.filter in name for name in HISTORY_CASES + (SAVE_CASE,)):
+                results.update(self.history_results())
+
+        if options["save_baseline"]:
+            baseline_path.write_text(json.dumps({
+                "meta": {
+                    "created_at": datetime.now(timezone.utc).isoformat(),
+                    "python": platform.python_version(),
+                    "machine": platform.machine(),
+                    "repeat": self.repeat,
+                },
+                "cases": results,
+            }, indent=2) + "\n")
+            self.stdout.write(self.style.SUCCESS(f"Baseline saved to {baseline_path}"))
+
+        if options["compare"]:
+            self.compare(results, baseline_path, options["tolerance"])
+
+    def measure(self, name, func, work, unit):
+        """Median wall time over the timed runs, plus peak traced memory of one extra run."""
+        sink = io.StringIO()
+        with contextlib.redirect_stdout(sink):
+            func()  # warm-up
+            timings = []
+            for _ in range(self.repeat):
+                started = time.perf_counter()
+                func()
+                timings.append(time.perf_counter() - started)
+
+            tracemalloc.start()
+            try:
+                func()
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+        seconds = statistics.median(timings)
+        scale = 1024 * 1024 if unit == "MB/s" else 1
+        throughput = work / scale / seconds if seconds else float("inf")
+        self.stdout.write(f"{name:<48} {seconds * 1000:>10.2f} ms {throughput:>12.1f} {unit:<8} {peak / 1024:>10.0f} KB peak")
+        return {"seconds": seconds, "throughput": throughput, "unit": unit, "peak_bytes": peak}
+
+    def parser_cases(self, sizes):
+        for size in sizes:
+            for variant in RESPONSE_VARIANTS:
+                text = response_of_size(size, variant)
+                yield (f"extract_json_array[{variant},{_label(size)}]",
+                       lambda text=text: self.views.extract_json_array(text), len(text.encode('utf-8')), "MB/s")
+
+    def process_cases(self):
+        for count in PROJECT_SIZES:
+            files = project_files(count)
+            yield (f"process_file_content[{count} files]",
+                   lambda files=files: self.views.process_file_content(files), count, "files/s")
+
+    def merge_cases(self, workdir):
+        for size in (10 * 1024, 1024 * 1024):
+            path = os.path.join(workdir, f"merge_{size}.py")
+            existing = code_file(random.Random(size), size)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(existing)
+            present = existing[size // 2:size // 2 + 400]
+            absent = "def brand_new_function():\n    return 42\n"
+            for kind, new_content in (("present", present), ("absent", absent)):
+                yield (f"merge_or_append[{kind},{_label(size)}]",
+                       lambda path=path, new_content=new_content: self.views.merge_or_append(path, new_content),
+                       size, "MB/s")
+
+    def writer_cases(self, workdir):
+        for count in PROJECT_SIZES:
+            files = project_files(count)
+            total = sum(len(f["content"].encode("utf-8")) for f in files)
+            # Every run writes into a new directory so nothing can be skipped
+            runs = itertools.count()
+            yield (f"write_files[fresh,{count} files]",
+                   lambda files=files, count=count, runs=runs: write_files(
+                       os.path.join(workdir, f"fresh_{count}_{next(runs)}"), files
+                   ),
+                   total, "MB/s")
+
+            unchanged_root = os.path.join(workdir, f"unchanged_{count}")
+            write_files(unchanged_root, files)
+            yield (f"write_files[unchanged,{count} files]",
+                   lambda files=files, root=unchanged_root: write_files(root, files), total, "MB/s")
+
+    def history_results(self):
+        """
+        Storage size, write latency and fetch_history latency against a
+        throwaway test database, once with compressed file bodies (the default
+        case names) and once with plain ones (",uncompressed").
+        """
+        results = {}
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            for mode, compressed in (("", True), (",uncompressed", False)):
+                with override_settings(CODEGEN_BLOB_COMPRESSION=compressed):
+                    results.update(self.history_cases(mode))
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+        return results
+
+    def history_cases(self, mode):
+        from codegen.models import FileBlob, ProjectHistory
+
+        results = {}
+        with contextlib.redirect_stdout(io.StringIO()):
+            ProjectHistory.objects.all().delete()
+            FileBlob.objects.delete_unreferenced()
+            for i in range(200):
+                ProjectHistory.objects.create_with_files(
+                    project_files(10, avg_size=1000, seed=i),
+                    language="python", user_request=f"project {i}", project_name=f"bench_{i}"
+                )
+            big = ProjectHistory.objects.create_with_files(
+                project_files(500), language="python", user_request="big", project_name="bench_big"
+            )
+
+        stored = FileBlob.objects.aggregate(raw=Sum('size'), stored=Sum(Length('data')), count=Count('hash'))
+        self.stdout.write(
+            f"{'blob_storage[' + (mode.lstrip(',') or 'compressed') + ']':<48} "
+            f"{stored['count']:>7} bodies {stored['raw'] / 1024:>10.0f} KB text {stored['stored'] / 1024:>10.0f} KB stored "
+            f"({stored['stored'] / stored['raw']:.0%})"
+        )
+
+        name = _with_mode(SAVE_CASE, mode)
+        if self.filter in name:
+            # Fresh content on every run, so no body is already stored
+            file_sets = [project_files(100, seed=10_000 + i) for i in range(self.repeat + 2)]
+            total = sum(len(f["content"].encode("utf-8")) for f in file_sets[0])
+            runs = iter(file_sets)
+            results[name] = self.measure(name, lambda: ProjectHistory.objects.create_with_files(
+                next(runs), language="python", user_request="write", project_name="bench_write"
+            ), total, "MB/s")
+
+        factory = RequestFactory()
+        for name, params in zip(HISTORY_CASES, ({"limit": 100}, {"project_id": big.id})):
+            name = _with_mode(name, mode)
+            if self.filter not in name:
+                continue
+            request = factory.get("/history/", params)
+            with contextlib.redirect_stdout(io.StringIO()):
+                size = len(self.views.fetch_history(request).content)
+            results[name] = self.measure(name, lambda request=request: self.views.fetch_history(request), size, "MB/s")
+        return results
+
+    def compare(self, results, baseline_path, tolerance):
+        if not baseline_path.exists():
+            raise CommandError(f"No baseline at {baseline_path}; run with --save-baseline first.")
+        baseline = json.loads(baseline_path.read_text())["cases"]
+
+        regressions = []
+        for name, result in results.items():
+            base = baseline.get(name)
+            if base is None:
+                continue
+            if result["seconds"] > base["seconds"] * (1 + tolerance) and \
+                    result["seconds"] - base["seconds"] > MIN_SECONDS_DELTA:
+                regressions.append(f"{name}: {base['seconds'] * 1000:.2f} ms -> {result['seconds'] * 1000:.2f} ms")
+            if result["peak_bytes"] > base["peak_bytes"] * (1 + tolerance) and \
+                    result["peak_bytes"] - base["peak_bytes"] > MIN_PEAK_DELTA:
+                regressions.append(
+                    f"{name}: peak {base['peak_bytes'] / 1024:.0f} KB -> {result['peak_bytes'] / 1024:.0f} KB"
+                )
+
+        if regressions:
+            for line in regressions:
+                self.stderr.write(line)
+            raise CommandError(f"{len(regressions)} regression(s) beyond {tolerance:.0%} of the baseline")
+        self.stdout.write(self.style.SUCCESS(f"No regressions beyond {tolerance:.0%} of {baseline_path}"))
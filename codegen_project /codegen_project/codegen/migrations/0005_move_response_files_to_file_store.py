@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:58
+
+import hashlib
+
+from django.db import migrations
+
+
+def move_response_files(apps, schema_editor):
+    """Copy every ProjectHistory.response_files entry into FileBlob / ProjectFile rows."""
+    ProjectHistory = apps.get_model('codegen', 'ProjectHistory')
+    FileBlob = apps.get_model('codegen', 'FileBlob')
+    ProjectFile = apps.get_model('codegen', 'ProjectFile')
+
+    for project in ProjectHistory.objects.all().iterator():
+        latest = {}
+        for file in project.response_files or []:
+            if isinstance(file, dict) and file.get('filename') and 'content' in file:
+                latest[file['filename']] = str(file['content'])
+
+        blobs = {}
+        for path, content in latest.items():
+            digest = hashlib.sha256(content.encode('utf-8')).hexdigest()
+            blobs[path] = digest
+            FileBlob.objects.get_or_create(hash=digest, defaults={'content': content, 'size': len(content.encode('utf-8'))})
+
+        ProjectFile.objects.bulk_create([
+            ProjectFile(project_id=project.id, path=path, blob_id=digest) for path, digest in blobs.items()
+        ])
+
+
+def restore_response_files(apps, schema_editor):
+    ProjectHistory = apps.get_model('codegen', 'ProjectHistory')
+    ProjectFile = apps.get_model('codegen', 'ProjectFile')
+
+    for project in ProjectHistory.objects.all().iterator():
+        rows = ProjectFile.objects.filter(project_id=project.id).select_related('blob').order_by('id')
+        project.response_files = [{"filename": f.path, "content": f.blob.content} for f in rows]
+        project.save(update_fields=['response_files'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('codegen', '0004_fileblob_projectfile'),
+    ]
+
+    operations = [
+        migrations.RunPython(move_response_files, restore_response_files),
+    ]
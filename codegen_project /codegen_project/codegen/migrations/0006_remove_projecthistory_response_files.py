@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('codegen', '0005_move_response_files_to_file_store'),
+    ]
+
+    operations = [
+        # A default so that, migrating backwards, the column can be added back to existing rows
+        # before 0005 restores their files
+        migrations.AlterField(
+            model_name='projecthistory',
+            name='response_files',
+            field=models.JSONField(default=list),
+        ),
+        migrations.RemoveField(
+            model_name='projecthistory',
+            name='response_files',
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('codegen', '0006_remove_projecthistory_response_files'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='projecthistory',
+            index=models.Index(fields=['created_at', 'id'], name='history_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='projecthistory',
+            index=models.Index(fields=['user_id', 'created_at'], name='history_user_created_idx'),
+        ),
+    ]
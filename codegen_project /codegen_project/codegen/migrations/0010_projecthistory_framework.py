@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('codegen', '0009_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='projecthistory',
+            name='framework',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+    ]
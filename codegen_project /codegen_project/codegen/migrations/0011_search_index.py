@@ -0,0 +1,66 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:45
+
+from django.db import migrations
+
+# Full-text search (utils/search.py). FTS5 is SQLite-only; on other databases
+# the index is not created and /search/ reports that search is unavailable.
+
+CREATE = [
+    # rowid = ProjectHistory.id
+    "CREATE VIRTUAL TABLE codegen_project_search USING fts5("
+    "project_name, user_request, tokenize = 'porter unicode61 remove_diacritics 2')",
+    # rowid = ProjectFile.id; bodies are indexed from Python (ProjectHistory.save_files)
+    "CREATE VIRTUAL TABLE codegen_file_search USING fts5("
+    "path, content, tokenize = 'porter unicode61 remove_diacritics 2')",
+
+    """CREATE TRIGGER codegen_project_search_insert AFTER INSERT ON codegen_projecthistory BEGIN
+        INSERT INTO codegen_project_search (rowid, project_name, user_request)
+        VALUES (new.id, new.project_name, new.user_request);
+    END""",
+    """CREATE TRIGGER codegen_project_search_update AFTER UPDATE OF project_name, user_request ON codegen_projecthistory BEGIN
+        DELETE FROM codegen_project_search WHERE rowid = old.id;
+        INSERT INTO codegen_project_search (rowid, project_name, user_request)
+        VALUES (new.id, new.project_name, new.user_request);
+    END""",
+    """CREATE TRIGGER codegen_project_search_delete AFTER DELETE ON codegen_projecthistory BEGIN
+        DELETE FROM codegen_project_search WHERE rowid = old.id;
+    END""",
+    """CREATE TRIGGER codegen_file_search_delete AFTER DELETE ON codegen_projectfile BEGIN
+        DELETE FROM codegen_file_search WHERE rowid = old.id;
+    END""",
+
+    """INSERT INTO codegen_project_search (rowid, project_name, user_request)
+       SELECT id, project_name, user_request FROM codegen_projecthistory""",
+    """INSERT INTO codegen_file_search (rowid, path, content)
+       SELECT f.id, f.path, b.content FROM codegen_projectfile f JOIN codegen_fileblob b ON b.hash = f.blob_id""",
+]
+
+DROP = [
+    "DROP TRIGGER IF EXISTS codegen_file_search_delete",
+    "DROP TRIGGER IF EXISTS codegen_project_search_delete",
+    "DROP TRIGGER IF EXISTS codegen_project_search_update",
+    "DROP TRIGGER IF EXISTS codegen_project_search_insert",
+    "DROP TABLE IF EXISTS codegen_file_search",
+    "DROP TABLE IF EXISTS codegen_project_search",
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        with schema_editor.connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('codegen', '0010_projecthistory_framework'),
+    ]
+
+    operations = [
+        migrations.RunPython(_run(CREATE), _run(DROP)),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:20
+
+from django.db import migrations, models
+
+from codegen.utils import compression
+
+BATCH_SIZE = 500
+
+
+def _convert(apps, source, target, convert):
+    FileBlob = apps.get_model('codegen', 'FileBlob')
+    batch = []
+    for blob in FileBlob.objects.only('hash', source).iterator(chunk_size=BATCH_SIZE):
+        setattr(blob, target, convert(getattr(blob, source)))
+        batch.append(blob)
+        if len(batch) == BATCH_SIZE:
+            FileBlob.objects.bulk_update(batch, [target])
+            batch = []
+    if batch:
+        FileBlob.objects.bulk_update(batch, [target])
+
+
+def compress_contents(apps, schema_editor):
+    _convert(apps, 'content', 'data', compression.compress)
+
+
+def decompress_contents(apps, schema_editor):
+    _convert(apps, 'data', 'content', compression.decompress)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('codegen', '0011_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fileblob',
+            name='data',
+            field=models.BinaryField(default=b''),
+            preserve_default=False,
+        ),
+        # A default so that, migrating backwards, content can be added back to existing rows
+        migrations.AlterField(
+            model_name='fileblob',
+            name='content',
+            field=models.TextField(default=''),
+        ),
+        migrations.RunPython(compress_contents, decompress_contents),
+        migrations.RemoveField(
+            model_name='fileblob',
+            name='content',
+        ),
+    ]
@@ -1,16 +1,192 @@
-from django.db import models
-from django.db.models import JSONField 
+import hashlib
+from django.db import models, transaction
+
+from .utils import compression, metrics, search
+
+
+def content_hash(content):
+    """SHA-256 hex digest used as the key of a stored file body."""
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+class ProjectHistoryManager(models.Manager):
+    @metrics.timed("db_save")
+    @transaction.atomic
+    def create_with_files(self, files, **fields):
+        """Create a project and store its files in one transaction."""
+        project = self.create(**fields)
+        project.save_files(files)
+        return project
+
 
 class ProjectHistory(models.Model):
     user_id = models.CharField(max_length=100, default='anonymous')
     language = models.CharField(max_length=50)
+    framework = models.CharField(max_length=100, blank=True, default='')
     user_request = models.TextField()
     project_name = models.CharField(max_length=100)
     project_path = models.TextField(null=True, blank=True)
-    response_files = JSONField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = ProjectHistoryManager()
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of the history sidebar
+            models.Index(fields=['created_at', 'id'], name='history_created_id_idx'),
+            models.Index(fields=['user_id', 'created_at'], name='history_user_created_idx'),
+        ]
+
     def __str__(self):
         return f"{self.language} - {self.user_request[:30]}..."
 
+    def get_files(self):
+        """Current files of the project as [{"filename", "content"}], in the order they were first added."""
+        return [
+            {"filename": f.path, "content": f.blob.content}
+            for f in self.files.select_related('blob').only('path', 'blob__data').order_by('id')
+        ]
+
+    def stored_hashes(self):
+        """{path: content hash} of the stored files, without loading their bodies."""
+        return dict(self.files.values_list('path', 'blob_id'))
+
+    def recent_paths(self):
+        """File paths ordered from most to least recently changed."""
+        return list(self.files.order_by('-updated_at', '-id').values_list('path', flat=True))
+
+    @metrics.timed("db_save")
+    @transaction.atomic
+    def save_files(self, files):
+        """
+        Add or update files by path. Only paths whose content hash changed are
+        written; identical bodies are shared with every other project.
+        Returns the number of paths that changed.
+        """
+        latest = {}
+        for file in files:
+            if isinstance(file, dict) and file.get('filename') and 'content' in file:
+                latest[file['filename']] = str(file['content'])
+        if not latest:
+            return 0
+
+        hashes = {path: content_hash(content) for path, content in latest.items()}
+        existing = {f.path: f for f in self.files.filter(path__in=list(latest))}
+        changed = [path for path in latest if path not in existing or existing[path].blob_id != hashes[path]]
+        if not changed:
+            return 0
+
+        FileBlob.objects.bulk_create(
+            [FileBlob.for_content(latest[path], hashes[path]) for path in changed],
+            ignore_conflicts=True
+        )
+
+        to_update = []
+        to_create = []
+        for path in changed:
+            if path in existing:
+                existing[path].blob_id = hashes[path]
+                to_update.append(existing[path])
+            else:
+                to_create.append(ProjectFile(project=self, path=path, blob_id=hashes[path]))
+
+        # save() per row so auto_now stamps updated_at (bulk_update would not)
+        for f in to_update:
+            f.save(update_fields=['blob', 'updated_at'])
+        ProjectFile.objects.bulk_create(to_create)
+
+        search.index_files([(f.id, f.path, latest[f.path]) for f in to_update + to_create])
+        return len(changed)
+
+
+class FileBlobManager(models.Manager):
+    def delete_unreferenced(self):
+        """Remove bodies no project points at any more (e.g. after a project is deleted)."""
+        return self.filter(references__isnull=True).delete()
+
+    def contents(self, hashes):
+        """{hash: text} of the given bodies."""
+        return {digest: compression.decompress(data) for digest, data in self.filter(hash__in=hashes).values_list('hash', 'data')}
+
+
+class FileBlob(models.Model):
+    """A file body stored once, keyed by its content hash, compressed (utils/compression.py)."""
+    hash = models.CharField(max_length=64, primary_key=True)
+    data = models.BinaryField()
+    size = models.PositiveIntegerField()  # of the UTF-8 text, not of data
 
+    objects = FileBlobManager()
+
+    @classmethod
+    def for_content(cls, content, digest=None):
+        return cls(hash=digest or content_hash(content), data=compression.compress(content), size=len(content.encode('utf-8')))
+
+    @property
+    def content(self):
+        return compression.decompress(self.data)
+
+    def __str__(self):
+        return f"{self.hash[:12]} ({self.size} bytes)"
+
+
+class ProjectFile(models.Model):
+    """A project's path -> content hash entry."""
+    project = models.ForeignKey(ProjectHistory, on_delete=models.CASCADE, related_name='files')
+    path = models.CharField(max_length=500)
+    blob = models.ForeignKey(FileBlob, on_delete=models.PROTECT, related_name='references')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['project', 'path'], name='unique_project_file_path'),
+        ]
+
+    def __str__(self):
+        return f"{self.project_id}:{self.path}"
+
+
+class LLMCacheEntry(models.Model):
+    """A cached completion, keyed by a hash of the model and normalized prompt messages."""
+    key = models.CharField(max_length=64, primary_key=True)
+    model = models.CharField(max_length=100)
+    response = models.TextField()
+    size = models.PositiveIntegerField()
+    hit_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.model} {self.key[:12]} ({self.size} bytes)"
+
+
+class Job(models.Model):
+    """A unit of background work claimed and run by the local worker pool (codegen/utils/jobs.py)."""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATE_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=50)
+    payload = models.JSONField()
+    state = models.CharField(max_length=20, choices=STATE_CHOICES, default=QUEUED)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True, default='')
+    project = models.ForeignKey(ProjectHistory, null=True, blank=True, on_delete=models.SET_NULL, related_name='jobs')
+    worker = models.CharField(max_length=100, blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['state', 'created_at'], name='job_state_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.id} ({self.state})"
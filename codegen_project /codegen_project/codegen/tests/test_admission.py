@@ -0,0 +1,159 @@
+import os
+import shutil
+import tempfile
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+import httpx
+import openai
+from django.contrib.auth.models import AnonymousUser
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from codegen.utils import admission, llm
+
+
+class AdmissionTestCase(SimpleTestCase):
+    limits = {}
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        override = override_settings(**{
+            "CODEGEN_ADMISSION_ENABLED": True,
+            "CODEGEN_ADMISSION_DB": os.path.join(directory, "admission.sqlite3"),
+            "CODEGEN_ADMISSION_GLOBAL_RPM": 500,
+            "CODEGEN_ADMISSION_GLOBAL_TPM": 150_000,
+            "CODEGEN_ADMISSION_USER_RPM": 60,
+            "CODEGEN_ADMISSION_USER_TPM": 60_000,
+            "CODEGEN_ADMISSION_GLOBAL_CONCURRENCY": 16,
+            "CODEGEN_ADMISSION_USER_CONCURRENCY": 4,
+            **self.limits
+        })
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def running(self):
+        return admission._connection().execute("SELECT COUNT(*) FROM slots").fetchone()[0]
+
+    def bucket(self, key):
+        return admission._connection().execute("SELECT tokens FROM buckets WHERE key = ?", (key,)).fetchone()[0]
+
+
+class TokenBucketTests(AdmissionTestCase):
+    limits = {"CODEGEN_ADMISSION_USER_RPM": 3}
+
+    def take(self, user_id="alice", cost=100):
+        slot_id, wait = admission.try_acquire(user_id, cost)
+        if slot_id is not None:
+            admission.release(slot_id, user_id)
+        return slot_id, wait
+
+    def test_limit_reached(self):
+        for _ in range(3):
+            self.assertIsNotNone(self.take()[0])
+        slot_id, wait = self.take()
+        self.assertIsNone(slot_id)
+        # One request refills every 60 / 3 seconds
+        self.assertAlmostEqual(wait, 20, delta=0.5)
+        # Other users have their own bucket
+        self.assertIsNotNone(self.take("bob")[0])
+
+    def test_refill(self):
+        now = time.time()
+        with mock.patch.object(admission.time, "time", return_value=now):
+            for _ in range(3):
+                self.take()
+            self.assertIsNone(self.take()[0])
+        with mock.patch.object(admission.time, "time", return_value=now + 21):
+            self.assertIsNotNone(self.take()[0])
+            self.assertIsNone(self.take()[0])
+        # Never refills past one minute of quota
+        with mock.patch.object(admission.time, "time", return_value=now + 3600):
+            self.assertEqual(sum(self.take()[0] is not None for _ in range(5)), 3)
+
+    def test_token_usage_is_corrected_on_release(self):
+        slot_id, _ = admission.try_acquire("alice", 1000)
+        self.assertAlmostEqual(self.bucket("user:alice:tokens"), 59_000, delta=50)
+        admission.release(slot_id, "alice", token_correction=4000)
+        self.assertAlmostEqual(self.bucket("user:alice:tokens"), 55_000, delta=50)
+        slot_id, _ = admission.try_acquire("alice", 1000)
+        admission.release(slot_id, "alice", token_correction=-900_000)
+        self.assertEqual(self.bucket("user:alice:tokens"), 60_000)
+
+    async def test_admit_rejects_once_the_wait_would_pass_the_deadline(self):
+        with admission.max_wait(0.5):
+            for _ in range(3):
+                await (await admission.admit(100, "alice")).release()
+            with self.assertRaises(admission.AdmissionRejected) as caught:
+                await admission.admit(100, "alice")
+        self.assertEqual(caught.exception.retry_after, 20)
+
+
+class SlotTests(AdmissionTestCase):
+    limits = {"CODEGEN_ADMISSION_USER_CONCURRENCY": 2}
+
+    def test_concurrency_limit_and_release(self):
+        first, _ = admission.try_acquire("alice", 10)
+        admission.try_acquire("alice", 10)
+        self.assertEqual(admission.try_acquire("alice", 10), (None, admission.POLL_INTERVAL))
+        admission.release(first, "alice")
+        self.assertIsNotNone(admission.try_acquire("alice", 10)[0])
+
+    def test_slots_of_dead_processes_are_reclaimed(self):
+        conn = admission._connection()
+        for _ in range(2):
+            conn.execute("INSERT INTO slots (user_id, pid, acquired_at) VALUES ('alice', 999999, ?)", (time.time(),))
+        with mock.patch.object(admission, "_pid_alive", return_value=False):
+            self.assertIsNotNone(admission.try_acquire("alice", 10)[0])
+        self.assertEqual(self.running(), 1)
+
+    async def test_permit_release_is_idempotent(self):
+        permit = await admission.admit(10, "alice")
+        await permit.release()
+        await permit.release()
+        self.assertEqual(self.running(), 0)
+
+
+class ChatCompletionReleaseTests(AdmissionTestCase):
+    def fake_client(self, create):
+        return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+    async def test_slot_is_released_when_the_call_fails(self):
+        async def create(**kwargs):
+            self.assertEqual(self.running(), 1)
+            raise RuntimeError("connection reset")
+
+        with mock.patch.object(llm.clients, "get", return_value=self.fake_client(create)):
+            with self.assertRaisesMessage(RuntimeError, "connection reset"):
+                await llm.chat_completion([{"role": "user", "content": "x"}], use_cache=False, user_id="ip:1.2.3.4")
+        self.assertEqual(self.running(), 0)
+
+    async def test_provider_rate_limit_becomes_a_rejection(self):
+        response = httpx.Response(429, headers={"retry-after": "7"}, request=httpx.Request("POST", "https://api.test"))
+
+        async def create(**kwargs):
+            raise openai.RateLimitError("slow down", response=response, body=None)
+
+        with mock.patch.object(llm.clients, "get", return_value=self.fake_client(create)):
+            with self.assertRaises(admission.AdmissionRejected) as caught:
+                await llm.chat_completion([{"role": "user", "content": "x"}], use_cache=False, user_id="ip:1.2.3.4")
+        self.assertEqual(caught.exception.retry_after, 7)
+        self.assertEqual(self.running(), 0)
+
+
+class ClientKeyTests(SimpleTestCase):
+    async def key(self, user, **extra):
+        request = RequestFactory().get("/", **extra)
+
+        async def auser():
+            return user
+        request.auser = auser
+        return await admission.client_key(request)
+
+    async def test_anonymous_requests_are_keyed_by_address(self):
+        self.assertEqual(await self.key(AnonymousUser(), REMOTE_ADDR="10.0.0.5"), "ip:10.0.0.5")
+
+    async def test_authenticated_requests_are_keyed_by_account(self):
+        user = SimpleNamespace(is_authenticated=True, pk=42)
+        self.assertEqual(await self.key(user, REMOTE_ADDR="10.0.0.5"), "account:42")
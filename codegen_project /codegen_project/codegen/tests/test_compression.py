@@ -0,0 +1,50 @@
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from codegen.models import FileBlob, ProjectHistory
+from codegen.utils import compression
+from codegen.utils.bench_data import project_files
+
+SAMPLES = [
+    "",
+    "tiny",
+    "from django.db import models\n\n\nclass Post(models.Model):\n    title = models.CharField(max_length=200)\n" * 20,
+    "Unicode ✓ é 漢字 and emoji 🚀\n" * 50,
+    "\x00\x01 control characters \n",
+]
+
+
+class CompressionTests(SimpleTestCase):
+    def test_round_trip(self):
+        for text in SAMPLES + [f["content"] for f in project_files(20)]:
+            with self.subTest(text=text[:20]):
+                self.assertEqual(compression.decompress(compression.compress(text)), text)
+
+    def test_codec_choice(self):
+        self.assertEqual(compression.compress("tiny")[0], compression.CODEC_RAW)
+        data = compression.compress(SAMPLES[2])
+        self.assertEqual(data[0], compression.CODEC_ZLIB_V1)
+        self.assertLess(len(data), len(SAMPLES[2]) // 4)
+
+    def test_disabled_stores_plain_text(self):
+        with override_settings(CODEGEN_BLOB_COMPRESSION=False):
+            data = compression.compress(SAMPLES[2])
+        self.assertEqual(data, bytes([compression.CODEC_RAW]) + SAMPLES[2].encode("utf-8"))
+        self.assertEqual(compression.decompress(memoryview(data)), SAMPLES[2])
+
+    def test_unknown_codec(self):
+        with self.assertRaises(ValueError):
+            compression.decompress(b"\x7fdata")
+
+
+class FileBlobStorageTests(TestCase):
+    def test_project_files_round_trip_through_the_store(self):
+        files = [{"filename": f"file_{i}.txt", "content": text} for i, text in enumerate(SAMPLES)]
+        project = ProjectHistory.objects.create_with_files(
+            files, language="python", user_request="compress", project_name="compressed"
+        )
+        self.assertEqual(ProjectHistory.objects.get(id=project.id).get_files(), files)
+
+        blob = FileBlob.objects.get(hash=project.stored_hashes()["file_2.txt"])
+        self.assertEqual(blob.size, len(SAMPLES[2].encode("utf-8")))
+        self.assertLess(len(blob.data), blob.size)
+        self.assertEqual(FileBlob.objects.contents([blob.hash]), {blob.hash: SAMPLES[2]})
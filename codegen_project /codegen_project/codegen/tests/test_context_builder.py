@@ -0,0 +1,66 @@
+from django.test import SimpleTestCase
+
+from codegen.utils.bench_data import project_files
+from codegen.utils.context_builder import MAX_LISTED_PATHS, build_context, estimate_tokens, rank_files
+
+FILES = [
+    {"filename": "shop/models.py", "content": "class Invoice(models.Model):\n    total = models.DecimalField()\n"},
+    {"filename": "shop/views.py", "content": "from .models import Invoice\n\n\ndef index(request):\n    pass\n"},
+    {"filename": "shop/admin.py", "content": "admin.site.register(Customer)\n"},
+    {"filename": "README.md", "content": "# Shop\n"},
+]
+
+
+class BuildContextBudgetTests(SimpleTestCase):
+    def test_large_projects_stay_within_the_budget(self):
+        for count in (50, 200, 500):
+            with self.subTest(files=count):
+                files = project_files(count)
+                text, report = build_context(files, "add invoice totals to the report", budget=4000)
+                self.assertLessEqual(estimate_tokens(text), 4000)
+                self.assertLessEqual(report["estimated_tokens"], 4000)
+                self.assertTrue(report["full"], "the best ranked files get their full text")
+                self.assertLessEqual(len(report["listed"]), MAX_LISTED_PATHS)
+                shown = len(report["full"]) + len(report["outlined"]) + len(report["listed"])
+                self.assertEqual(shown + report["omitted"], count)
+
+    def test_small_projects_are_shown_in_full(self):
+        text, report = build_context(FILES, "invoice", budget=4000)
+        self.assertEqual(len(report["full"]), len(FILES))
+        self.assertEqual((report["outlined"], report["listed"], report["omitted"]), ([], [], 0))
+        for f in FILES:
+            self.assertIn(f"// File: {f['filename']}\n{f['content']}", text)
+
+    def test_tight_budget_falls_back_to_outlines_and_paths(self):
+        files = project_files(30)
+        text, report = build_context(files, "invoice", budget=300)
+        self.assertLessEqual(estimate_tokens(text), 300)
+        self.assertTrue(report["outlined"] or report["listed"])
+        self.assertIn("// Other files (not shown): ", text)
+        if report["omitted"]:
+            self.assertIn(f"(and {report['omitted']} more)", text)
+
+    def test_no_files(self):
+        self.assertEqual(build_context([], "anything", budget=100)[0], "")
+
+
+class RankingTests(SimpleTestCase):
+    def test_path_and_identifier_matches_rank_first(self):
+        ranked, _ = rank_files(FILES, "show the invoice total")
+        self.assertEqual(ranked[0]["filename"], "shop/models.py")
+        # views.py imports models.py and shares part of its score
+        self.assertEqual(ranked[1]["filename"], "shop/views.py")
+
+    def test_recent_files_get_a_bonus(self):
+        ranked, _ = rank_files(FILES, "nothing matches", recent_paths=["README.md"])
+        self.assertEqual(ranked[0]["filename"], "README.md")
+
+    def test_full_text_goes_to_the_best_ranked_files(self):
+        files = project_files(50)
+        files.append({"filename": "billing/invoice_totals.py", "content": "def invoice_totals(invoices):\n    pass\n"})
+        ranked, _ = rank_files(files, "fix invoice_totals")
+        _, report = build_context(files, "fix invoice_totals", budget=2000)
+        self.assertEqual(report["full"][0], "billing/invoice_totals.py")
+        order = [f["filename"] for f in ranked]
+        for group in ("full", "outlined", "listed"):
+            self.assertEqual(report[group], sorted(report[group], key=order.index))
@@ -0,0 +1,108 @@
+import io
+import os
+import shutil
+import tarfile
+import tempfile
+import zipfile
+
+from asgiref.sync import sync_to_async
+from django.test import TestCase, override_settings
+
+from codegen.models import ProjectHistory
+from codegen.utils.project_writer import write_files
+
+FILES = [
+    {"filename": "app.py", "content": "print('hello')\n"},
+    {"filename": "shop/models.py", "content": "class Product:\n    pass\n"},
+]
+
+
+class ExportCacheTests(TestCase):
+    def setUp(self):
+        self.cache = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache)
+        override = override_settings(CODEGEN_EXPORT_CACHE_DIR=self.cache, CODEGEN_EXPORT_CACHE_ENABLED=True)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder)
+        write_files(self.folder, FILES)
+        self.project = ProjectHistory.objects.create_with_files(
+            FILES, language="python", user_request="shop", project_name="shop", project_path=self.folder
+        )
+
+    async def export(self, **params):
+        response = await self.async_client.get(f"/export_project/{self.project.id}/", params)
+        body = b"".join([chunk async for chunk in response.streaming_content]) if response.streaming else response.content
+        return response, body
+
+    def cached(self):
+        return sorted(os.listdir(self.cache))
+
+    def names(self, body):
+        with zipfile.ZipFile(io.BytesIO(body)) as archive:
+            return {name: archive.read(name).decode("utf-8") for name in archive.namelist()}
+
+    async def test_second_export_is_served_from_the_cache(self):
+        first, body = await self.export()
+        self.assertEqual(first["X-Export-Cache"], "miss")
+        self.assertEqual(self.names(body), {"shop/app.py": FILES[0]["content"], "shop/shop/models.py": FILES[1]["content"]})
+        self.assertEqual(len(self.cached()), 1)
+
+        second, cached_body = await self.export()
+        self.assertEqual(second["X-Export-Cache"], "hit")
+        self.assertEqual(cached_body, body)
+        self.assertEqual(second["Content-Length"], str(len(body)))
+        self.assertEqual(second["ETag"], first["ETag"])
+
+    async def test_changing_a_stored_file_invalidates_the_archive(self):
+        first, _ = await self.export()
+        await sync_to_async(self.project.save_files)([{"filename": "app.py", "content": "print('changed')\n"}])
+
+        second, body = await self.export()
+        self.assertEqual(second["X-Export-Cache"], "miss")
+        self.assertNotEqual(second["ETag"], first["ETag"])
+        self.assertEqual(self.names(body)["shop/app.py"], "print('changed')\n")
+        # The superseded archive is removed once the new one is complete
+        self.assertEqual(len(self.cached()), 1)
+
+    async def test_changing_a_file_on_disk_invalidates_the_disk_archive(self):
+        first, _ = await self.export(source="disk")
+        with open(os.path.join(self.folder, "app.py"), "a", encoding="utf-8") as f:
+            f.write("print('more')\n")
+
+        second, body = await self.export(source="disk")
+        self.assertEqual(second["X-Export-Cache"], "miss")
+        self.assertIn("print('more')", self.names(body)["shop/app.py"])
+        self.assertNotIn("shop/.codegen/manifest.json", self.names(body))
+
+        third, _ = await self.export(source="disk")
+        self.assertEqual(third["X-Export-Cache"], "hit")
+
+    async def test_formats_are_cached_separately(self):
+        await self.export()
+        response, body = await self.export(format="tar.gz")
+        self.assertEqual(response["X-Export-Cache"], "miss")
+        with tarfile.open(fileobj=io.BytesIO(body), mode="r:gz") as archive:
+            self.assertEqual(sorted(archive.getnames()), ["shop/app.py", "shop/shop/models.py"])
+        self.assertEqual(len(self.cached()), 2)
+
+    async def test_matching_etag_is_not_modified(self):
+        first, _ = await self.export()
+        response = await self.async_client.get(f"/export_project/{self.project.id}/", headers={"If-None-Match": first["ETag"]})
+        self.assertEqual(response.status_code, 304)
+
+    async def test_cache_can_be_disabled(self):
+        with override_settings(CODEGEN_EXPORT_CACHE_ENABLED=False):
+            first, body = await self.export()
+            second, _ = await self.export()
+        self.assertEqual((first["X-Export-Cache"], second["X-Export-Cache"]), ("miss", "miss"))
+        self.assertEqual(self.cached(), [])
+        self.assertEqual(len(self.names(body)), 2)
+
+    async def test_bad_parameters(self):
+        response, _ = await self.export(format="rar")
+        self.assertEqual(response.status_code, 400)
+        response = await self.async_client.get("/export_project/999999/")
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,67 @@
+import base64
+from datetime import datetime, timedelta, timezone
+
+from django.test import TestCase
+
+from codegen.models import ProjectHistory
+
+
+class FetchHistoryPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        base = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        # Three projects share a timestamp, so only the id tie-breaker orders them
+        stamps = [base, base + timedelta(minutes=1), base + timedelta(minutes=1),
+                  base + timedelta(minutes=1), base + timedelta(minutes=2)]
+        for i, stamp in enumerate(stamps):
+            project = ProjectHistory.objects.create_with_files(
+                [{"filename": f"p{i}.py", "content": f"print({i})\n"}],
+                language="python", user_request=f"project {i}", project_name=f"p{i}",
+                user_id="alice" if i % 2 else "bob"
+            )
+            ProjectHistory.objects.filter(id=project.id).update(created_at=stamp)
+        cls.expected = list(ProjectHistory.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+
+    def pages(self, **params):
+        ids, cursor = [], None
+        while True:
+            query = dict(params, **({"cursor": cursor} if cursor else {}))
+            body = self.client.get("/history/", query).json()
+            ids.extend(p["id"] for p in body["history"])
+            cursor = body["next_cursor"]
+            if cursor is None:
+                return ids
+
+    def test_pages_cover_every_project_once_newest_first(self):
+        for limit in (1, 2, 3, 5, 10):
+            with self.subTest(limit=limit):
+                self.assertEqual(self.pages(limit=limit), self.expected)
+
+    def test_ties_on_created_at_are_ordered_by_id(self):
+        tied = self.expected[1:4]
+        self.assertEqual(tied, sorted(tied, reverse=True))
+        self.assertEqual(self.pages(limit=2)[1:4], tied)
+
+    def test_last_page_has_no_cursor(self):
+        body = self.client.get("/history/", {"limit": 5}).json()
+        self.assertEqual(len(body["history"]), 5)
+        self.assertIsNone(body["next_cursor"])
+
+    def test_summary_rows_carry_file_stats_not_contents(self):
+        row = self.client.get("/history/", {"limit": 1}).json()["history"][0]
+        self.assertEqual((row["file_count"], row["total_size"]), (1, len("print(4)\n")))
+        self.assertNotIn("files", row)
+
+    def test_user_filter(self):
+        alice = list(ProjectHistory.objects.filter(user_id="alice").order_by('-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(self.pages(limit=1, user_id="alice"), alice)
+
+    def test_bad_cursor_or_limit(self):
+        bad = ["not-base64!", base64.urlsafe_b64encode(b"no separator").decode(),
+               base64.urlsafe_b64encode(b"2026-01-01T00:00:00|x").decode(), "é"]
+        for cursor in bad:
+            with self.subTest(cursor=cursor):
+                response = self.client.get("/history/", {"cursor": cursor})
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json()["history"], [])
+        self.assertEqual(self.client.get("/history/", {"limit": "ten"}).status_code, 400)
@@ -0,0 +1,34 @@
+from django.test import TestCase
+
+from codegen.models import Job
+from codegen.utils import jobs
+
+
+class LimitedKindClaimTests(TestCase):
+    def setUp(self):
+        async def handler(payload):
+            return {}, 200
+
+        for kind, limit in (("slow", lambda: 1), ("quick", None)):
+            jobs.job_handler(kind, limit=limit)(handler)
+            self.addCleanup(jobs._handlers.pop, kind)
+        self.addCleanup(jobs._limits.pop, "slow")
+        self.pool = jobs.WorkerPool(size=4, poll_interval=1.0)
+
+    def test_jobs_of_a_full_kind_stay_queued_for_other_kinds(self):
+        first = Job.objects.create(kind="slow", payload={})
+        second = Job.objects.create(kind="slow", payload={})
+        quick = Job.objects.create(kind="quick", payload={})
+
+        self.assertEqual(self.pool._claim("w1").id, first.id)
+        # The second slow job is skipped, not waited on
+        self.assertEqual(self.pool._claim("w2").id, quick.id)
+        self.assertIsNone(self.pool._claim("w3"))
+        self.assertEqual(Job.objects.get(id=second.id).state, Job.QUEUED)
+
+        self.pool._finished(Job.objects.get(id=first.id))
+        self.assertEqual(self.pool._claim("w1").id, second.id)
+
+    def test_unlimited_kinds_are_claimed_in_order(self):
+        created = [Job.objects.create(kind="quick", payload={}).id for _ in range(3)]
+        self.assertEqual([self.pool._claim("w").id for _ in created], created)
@@ -0,0 +1,101 @@
+import json
+
+from django.test import SimpleTestCase
+
+from codegen.utils.json_stream import FileStreamParser, decode_string, parse_file_array, repair_json
+
+FILES = [
+    {"filename": "app.py", "content": "def main():\n    print(\"hi {there}\")\n"},
+    {"filename": "static/app.js", "content": "const s = '[nested] {braces}';\nconsole.log(\"\\\\\");\n"},
+    {"filename": "README.md", "content": "Unicode: é ✓ and a quote \" inside"},
+]
+
+
+def feed_in_chunks(text, size):
+    parser = FileStreamParser()
+    files = []
+    for start in range(0, len(text), size):
+        files.extend(parser.feed(text[start:start + size]))
+    files.extend(parser.close())
+    return files, parser
+
+
+class FileStreamParserTests(SimpleTestCase):
+    def test_whole_array(self):
+        files, recovery = parse_file_array(json.dumps(FILES))
+        self.assertEqual(files, FILES)
+        self.assertEqual(recovery, "json")
+
+    def test_every_chunk_boundary(self):
+        text = json.dumps(FILES, indent=2)
+        for size in (1, 2, 3, 7, 64):
+            with self.subTest(size=size):
+                files, parser = feed_in_chunks(text, size)
+                self.assertEqual(files, FILES)
+                self.assertEqual(parser.recovery, "json")
+
+    def test_files_are_emitted_as_soon_as_they_close(self):
+        text = json.dumps(FILES)
+        first_end = text.index("}, {") + 1
+        parser = FileStreamParser()
+        self.assertEqual(parser.feed(text[:first_end - 1]), [])
+        self.assertEqual(parser.feed(text[first_end - 1:first_end]), [FILES[0]])
+
+    def test_escape_split_across_chunks(self):
+        text = json.dumps([{"filename": "a.txt", "content": 'back\\slash and "quote"'}])
+        split = text.index("\\\\") + 1
+        parser = FileStreamParser()
+        files = parser.feed(text[:split]) + parser.feed(text[split:]) + parser.close()
+        self.assertEqual(files, [{"filename": "a.txt", "content": 'back\\slash and "quote"'}])
+
+    def test_prose_and_fences_around_the_array(self):
+        text = 'Here are "your" files:\n```json\n' + json.dumps(FILES) + '\n```\nEnjoy {them}!'
+        files, recovery = parse_file_array(text)
+        self.assertEqual(files, FILES)
+        self.assertEqual(recovery, "json")
+
+    def test_files_wrapper_object(self):
+        files, _ = parse_file_array(json.dumps({"files": FILES}))
+        self.assertEqual(files, FILES)
+
+    def test_json_valued_content_is_serialized(self):
+        files, _ = parse_file_array(json.dumps([{"filename": "package.json", "content": {"name": "x"}}]))
+        self.assertEqual(json.loads(files[0]["content"]), {"name": "x"})
+
+    def test_diff_mode_edit_items(self):
+        item = {"filename": "app.py", "edits": [{"search": "a", "replace": "b"}]}
+        files, _ = parse_file_array(json.dumps([item]))
+        self.assertEqual(files, [item])
+
+    def test_repairs_invalid_escapes_and_trailing_commas(self):
+        text = '[{"filename": "a.py", "content": "path = \'C:\\data\'\\n",},]'
+        files, recovery = parse_file_array(text)
+        self.assertEqual(files, [{"filename": "a.py", "content": "path = 'C:\\data'\n"}])
+        self.assertEqual(recovery, "repaired")
+
+    def test_truncated_response_salvages_the_last_file(self):
+        text = json.dumps(FILES)[:-30]
+        files, parser = feed_in_chunks(text, 5)
+        self.assertEqual(files[:2], FILES[:2])
+        self.assertEqual(files[2]["filename"], "README.md")
+        self.assertTrue(FILES[2]["content"].startswith(files[2]["content"]))
+        self.assertEqual(parser.recovery, "truncated")
+
+    def test_single_bare_object(self):
+        files, _ = parse_file_array(json.dumps(FILES[0]))
+        self.assertEqual(files, [FILES[0]])
+
+    def test_unparseable_text_falls_back(self):
+        files, recovery = parse_file_array("Sorry, I cannot help with that.")
+        self.assertEqual(files, [])
+        self.assertEqual(recovery, "fallback")
+
+
+class RepairHelpersTests(SimpleTestCase):
+    def test_decode_string_tolerates_stray_backslashes(self):
+        self.assertEqual(decode_string('a\\d "b"'), 'a\\d "b"')
+        self.assertEqual(decode_string('line\\nnext'), 'line\nnext')
+
+    def test_repair_json_escapes_bare_quotes(self):
+        repaired = repair_json('{"content": "say "hi" now"}')
+        self.assertEqual(json.loads(repaired), {"content": 'say "hi" now'})
@@ -0,0 +1,21 @@
+from django.test import SimpleTestCase
+
+from codegen.utils.llm_cache import cache_key
+
+
+def messages(content):
+    return [{"role": "system", "content": "Generate code."}, {"role": "user", "content": content}]
+
+
+class CacheKeyTests(SimpleTestCase):
+    def test_indentation_changes_the_key(self):
+        nested = "if ready:\n    start()\nstop()\n"
+        flat = "if ready:\n    start()\n    stop()\n"
+        self.assertNotEqual(cache_key(messages(nested), "gpt-4"), cache_key(messages(flat), "gpt-4"))
+        self.assertNotEqual(cache_key(messages("  start()"), "gpt-4"), cache_key(messages("start()"), "gpt-4"))
+
+    def test_trailing_whitespace_is_ignored(self):
+        self.assertEqual(cache_key(messages("start()  \nstop()\n\n"), "gpt-4"), cache_key(messages("start()\nstop()"), "gpt-4"))
+
+    def test_model_changes_the_key(self):
+        self.assertNotEqual(cache_key(messages("start()"), "gpt-4"), cache_key(messages("start()"), "gpt-4o"))
@@ -0,0 +1,122 @@
+import json
+
+from django.test import SimpleTestCase
+
+from codegen.utils.merge import merge_content, merge_json, merge_python, merge_requirements
+
+URLS = """from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('', views.index, name='index'),
+]
+"""
+
+MODULE_URLS = """from django.urls import path, include
+from . import views
+
+urlpatterns = [
+    path('', views.index, name='index'),
+    path('blog/', include('blog.urls')),
+]
+"""
+
+SETTINGS = """\"\"\"Project settings.\"\"\"
+import os
+
+INSTALLED_APPS = [
+    'django.contrib.admin',
+    'django.contrib.auth',
+]
+
+DEBUG = True
+"""
+
+MODULE_SETTINGS = """import os
+from pathlib import Path
+
+INSTALLED_APPS = [
+    'django.contrib.auth',
+    'blog',
+]
+
+DEBUG = False
+BLOG_PAGE_SIZE = 10
+"""
+
+
+class MergePythonTests(SimpleTestCase):
+    def test_urlpatterns_get_the_new_routes_and_imports(self):
+        merged = merge_python(URLS, MODULE_URLS)
+        self.assertEqual(merged, """from django.urls import path
+from . import views
+from django.urls import include
+
+urlpatterns = [
+    path('', views.index, name='index'),
+    path('blog/', include('blog.urls')),
+]
+""")
+
+    def test_installed_apps_and_settings(self):
+        merged = merge_python(SETTINGS, MODULE_SETTINGS)
+        namespace = {}
+        exec(compile(merged, "settings.py", "exec"), namespace)
+        self.assertEqual(namespace["INSTALLED_APPS"], ['django.contrib.admin', 'django.contrib.auth', 'blog'])
+        # Existing values win; new names are added
+        self.assertIs(namespace["DEBUG"], True)
+        self.assertEqual(namespace["BLOG_PAGE_SIZE"], 10)
+        self.assertTrue(merged.startswith('"""Project settings."""\nimport os\nfrom pathlib import Path\n'))
+
+    def test_single_line_list(self):
+        merged = merge_python("APPS = ['a', 'b']\n", "APPS = ['b', 'c']\n")
+        self.assertEqual(merged, "APPS = ['a', 'b', 'c']\n")
+
+    def test_new_definitions_are_appended_once(self):
+        existing = "def index(request):\n    return 'old'\n"
+        new = "import json\n\n\ndef index(request):\n    return 'new'\n\n\n@login_required\ndef detail(request):\n    return 'detail'\n"
+        merged = merge_python(existing, new)
+        self.assertIn("return 'old'", merged)
+        self.assertNotIn("return 'new'", merged)
+        self.assertIn("import json\n", merged)
+        self.assertTrue(merged.endswith("\n\n\n@login_required\ndef detail(request):\n    return 'detail'\n"))
+
+    def test_future_imports_go_first(self):
+        merged = merge_python('"""Doc."""\nimport os\n', "from __future__ import annotations\n")
+        self.assertEqual(merged, '"""Doc."""\nfrom __future__ import annotations\nimport os\n')
+
+    def test_main_guard_is_not_duplicated(self):
+        existing = "def main():\n    pass\n\n\nif __name__ == '__main__':\n    main()\n"
+        new = "if __name__ == \"__main__\":\n    main()\n    print('done')\n"
+        self.assertEqual(merge_python(existing, new), existing)
+
+    def test_idempotent(self):
+        for existing, new in ((URLS, MODULE_URLS), (SETTINGS, MODULE_SETTINGS)):
+            with self.subTest(new=new[:30]):
+                once = merge_python(existing, new)
+                self.assertEqual(merge_python(once, new), once)
+
+    def test_unparseable_source(self):
+        self.assertIsNone(merge_python("def broken(:\n", "x = 1\n"))
+
+
+class MergeOtherFilesTests(SimpleTestCase):
+    def test_json_adds_missing_keys_and_keeps_existing_values(self):
+        existing = json.dumps({"name": "shop", "dependencies": {"express": "^4.0.0"}}, indent=4) + "\n"
+        new = json.dumps({"name": "other", "dependencies": {"express": "^5.0.0", "cors": "^2.8.5"}})
+        merged = merge_json(existing, new)
+        self.assertEqual(json.loads(merged), {"name": "shop", "dependencies": {"express": "^4.0.0", "cors": "^2.8.5"}})
+        self.assertIn('\n    "name"', merged)
+        self.assertEqual(merge_json(merged, new), merged)
+
+    def test_requirements_by_normalized_name(self):
+        merged = merge_requirements("Django==4.2\nrequests\n", "django>=5\npython_dotenv\nrequests\n")
+        self.assertEqual(merged, "Django==4.2\nrequests\npython_dotenv\n")
+
+    def test_dispatch_and_fallback(self):
+        self.assertEqual(merge_content("app/urls.py", URLS, MODULE_URLS), merge_python(URLS, MODULE_URLS))
+        self.assertEqual(merge_content("requirements-dev.txt", "a\n", "b\n"), "a\nb\n")
+        self.assertEqual(merge_content("README.md", "# Shop", "## Blog"), "# Shop\n\n## Blog")
+        self.assertEqual(merge_content("README.md", "# Shop\n\n## Blog", "## Blog"), "# Shop\n\n## Blog")
+        # Unparseable Python falls back to appending
+        self.assertEqual(merge_content("x.py", "def broken(:", "y = 1"), "def broken(:\n\ny = 1")
@@ -0,0 +1,75 @@
+from django.test import SimpleTestCase
+
+from codegen.utils.patches import EditConflict, apply_edits, apply_file_edits
+
+SOURCE = "import os\n\n\ndef greet(name):\n    return f'Hello {name}'\n\n\ndef main():\n    print(greet('world'))\n"
+
+
+class ApplyEditsTests(SimpleTestCase):
+    def test_exact_replacement(self):
+        result = apply_edits(SOURCE, [{"search": "return f'Hello {name}'", "replace": "return f'Hi {name}'"}])
+        self.assertEqual(result, SOURCE.replace("Hello", "Hi"))
+
+    def test_edits_apply_in_order(self):
+        result = apply_edits(SOURCE, [
+            {"search": "def greet(name):", "replace": "def greet(name, punctuation='!'):"},
+            {"search": "f'Hello {name}'", "replace": "f'Hello {name}{punctuation}'"},
+        ])
+        self.assertIn("def greet(name, punctuation='!'):\n    return f'Hello {name}{punctuation}'\n", result)
+
+    def test_trailing_whitespace_in_search_is_tolerated(self):
+        result = apply_edits(SOURCE, [{"search": "def main():   \n    print(greet('world'))  ", "replace": "def main():\n    pass"}])
+        self.assertTrue(result.endswith("def main():\n    pass\n"))
+
+    def test_empty_search_appends(self):
+        result = apply_edits(SOURCE, [{"search": "", "replace": "main()\n"}])
+        self.assertEqual(result, SOURCE + "\nmain()\n")
+        self.assertEqual(apply_edits("", [{"search": " ", "replace": "x = 1\n"}]), "x = 1\n")
+
+    def test_missing_search_text_conflicts(self):
+        with self.assertRaisesMessage(EditConflict, "edit 0: search text not found"):
+            apply_edits(SOURCE, [{"search": "def missing():", "replace": ""}])
+
+    def test_ambiguous_search_text_conflicts(self):
+        with self.assertRaisesMessage(EditConflict, "matches 2 times"):
+            apply_edits(SOURCE, [{"search": "\n\n\ndef ", "replace": "\n\ndef "}])
+
+    def test_malformed_edit_conflicts(self):
+        with self.assertRaisesMessage(EditConflict, "edit 1 must have string 'search' and 'replace' fields"):
+            apply_edits(SOURCE, [{"search": "import os", "replace": "import sys"}, {"search": "x"}])
+
+
+class ApplyFileEditsTests(SimpleTestCase):
+    def test_changed_files_and_conflicts(self):
+        current = {"app.py": SOURCE, "README.md": "# Demo\n"}
+        files, conflicts = apply_file_edits(current, [
+            {"filename": "app.py", "edits": [{"search": "import os", "replace": "import sys"}]},
+            {"filename": "README.md", "edits": [{"search": "# Nope", "replace": "# Demo app"}]},
+            {"filename": "new.py", "edits": [{"search": "", "replace": "x = 1\n"}]},
+        ])
+        self.assertEqual(files, [{"filename": "app.py", "content": SOURCE.replace("import os", "import sys")}])
+        self.assertEqual([c["filename"] for c in conflicts], ["README.md", "new.py"])
+
+    def test_a_file_only_changes_if_all_its_edits_apply(self):
+        files, conflicts = apply_file_edits({"app.py": SOURCE}, [
+            {"filename": "app.py", "edits": [
+                {"search": "import os", "replace": "import sys"},
+                {"search": "def missing():", "replace": ""},
+            ]},
+        ])
+        self.assertEqual(files, [])
+        self.assertEqual(len(conflicts), 1)
+
+    def test_items_for_the_same_file_build_on_each_other(self):
+        files, conflicts = apply_file_edits({"app.py": SOURCE}, [
+            {"filename": "app.py", "edits": [{"search": "import os", "replace": "import sys"}]},
+            {"filename": "app.py", "edits": [{"search": "import sys", "replace": "import json"}]},
+        ])
+        self.assertEqual(conflicts, [])
+        self.assertEqual(files[0]["content"], SOURCE.replace("import os", "import json"))
+
+    def test_edits_that_change_nothing_are_dropped(self):
+        files, conflicts = apply_file_edits({"app.py": SOURCE}, [
+            {"filename": "app.py", "edits": [{"search": "import os", "replace": "import os"}]},
+        ])
+        self.assertEqual((files, conflicts), ([], []))
@@ -0,0 +1,88 @@
+import os
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase
+
+from codegen.utils.manifest import STAGING_PREFIX, ProjectManifest, file_hash
+from codegen.utils.project_writer import accepted_files, resolve_path, write_files
+
+
+class ResolvePathTests(SimpleTestCase):
+    root = os.path.abspath("/srv/projects/shop")
+
+    def test_paths_inside_the_project(self):
+        self.assertEqual(resolve_path(self.root, "app/views.py"), os.path.join(self.root, "app", "views.py"))
+        self.assertEqual(resolve_path(self.root, "app\\models.py"), os.path.join(self.root, "app", "models.py"))
+        self.assertEqual(resolve_path(self.root, "app/../README.md"), os.path.join(self.root, "README.md"))
+
+    def test_escaping_and_absolute_paths_are_rejected(self):
+        for filename in ("../secrets.py", "app/../../x.py", "..", ".", "/etc/passwd", "\\windows\\x.py",
+                         "C:/Windows/x.py", "../shop-other/x.py"):
+            with self.subTest(filename=filename):
+                self.assertIsNone(resolve_path(self.root, filename))
+
+
+class WriteFilesTests(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+
+    def read(self, filename):
+        with open(os.path.join(self.root, filename), encoding="utf-8") as f:
+            return f.read()
+
+    def test_writes_files_and_records_them_in_the_manifest(self):
+        report = write_files(self.root, [
+            {"filename": "app/views.py", "content": "def index(request):\n    pass\n"},
+            {"filename": "README.md", "content": "# Shop ✓\n"},
+        ])
+        self.assertEqual(sorted(report["written"]), ["README.md", "app/views.py"])
+        self.assertEqual(report["bytes_written"], len("def index(request):\n    pass\n") + len("# Shop ✓\n".encode("utf-8")))
+        self.assertEqual(self.read("README.md"), "# Shop ✓\n")
+        manifest = ProjectManifest.current(self.root)
+        self.assertEqual(sorted(manifest.files), ["README.md", "app/views.py"])
+        self.assertFalse([name for name in os.listdir(self.root) if name.startswith(STAGING_PREFIX)])
+
+    def test_identical_content_is_skipped(self):
+        files = [{"filename": "app.py", "content": "x = 1\n"}]
+        write_files(self.root, files)
+        mtime = os.stat(os.path.join(self.root, "app.py")).st_mtime_ns
+
+        report = write_files(self.root, files + [{"filename": "new.py", "content": "y = 2\n"}])
+        self.assertEqual((report["written"], report["skipped"]), (["new.py"], ["app.py"]))
+        self.assertEqual(report["bytes_skipped"], len("x = 1\n"))
+        self.assertEqual(os.stat(os.path.join(self.root, "app.py")).st_mtime_ns, mtime)
+
+        report = write_files(self.root, [{"filename": "app.py", "content": "x = 2\n"}])
+        self.assertEqual(report["written"], ["app.py"])
+        self.assertEqual(self.read("app.py"), "x = 2\n")
+        self.assertEqual(ProjectManifest.current(self.root).entry("app.py")[2],
+                         file_hash(os.path.join(self.root, "app.py")))
+
+    def test_files_outside_the_project_are_rejected(self):
+        outside = os.path.join(os.path.dirname(self.root), "escaped.py")
+        self.addCleanup(lambda: os.path.exists(outside) and os.remove(outside))
+        files = [
+            {"filename": "../escaped.py", "content": "bad"},
+            {"filename": "/tmp/absolute.py", "content": "bad"},
+            {"filename": "ok.py", "content": "good"},
+        ]
+        report = write_files(self.root, files)
+        self.assertEqual(report["rejected"], ["../escaped.py", "/tmp/absolute.py"])
+        self.assertEqual(report["written"], ["ok.py"])
+        self.assertFalse(os.path.exists(outside))
+        self.assertEqual(list(ProjectManifest.current(self.root).files), ["ok.py"])
+        self.assertEqual(accepted_files(files, report), [{"filename": "ok.py", "content": "good"}])
+
+    def test_last_duplicate_wins(self):
+        files = [{"filename": "a.py", "content": "1"}, {"filename": "a.py", "content": "2"}]
+        report = write_files(self.root, files)
+        self.assertEqual(self.read("a.py"), "2")
+        self.assertEqual(accepted_files(files, report), [{"filename": "a.py", "content": "2"}])
+
+    def test_parallel_staging(self):
+        files = [{"filename": f"pkg/m{i}.py", "content": f"v = {i}\n"} for i in range(20)]
+        report = write_files(self.root, files, workers=4)
+        self.assertEqual(len(report["written"]), 20)
+        self.assertEqual(self.read("pkg/m7.py"), "v = 7\n")
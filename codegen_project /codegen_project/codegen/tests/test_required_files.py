@@ -0,0 +1,42 @@
+import os
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase
+
+from codegen.utils import required_files
+from codegen.utils.project_writer import write_files
+
+DJANGO_FILES = [
+    {"filename": "manage.py", "content": "import django\n"},
+    {"filename": "requirements.txt", "content": "django\n"},
+    {"filename": "shop/settings.py", "content": "DEBUG = False\n"},
+    {"filename": "shop/urls.py", "content": "urlpatterns = []\n"},
+    {"filename": "shop/wsgi.py", "content": "application = None\n"},
+]
+
+
+class CheckTests(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        write_files(self.root, DJANGO_FILES)
+
+    def test_complete_project(self):
+        required, missing = required_files.check(self.root, "python", "django")
+        self.assertIn("*/urls.py", required)
+        self.assertEqual(missing, [])
+
+    def test_framework_is_detected_when_unknown(self):
+        required, _ = required_files.check(self.root, "python")
+        self.assertIn("*/wsgi.py|*/asgi.py", required)
+
+    def test_files_deleted_outside_the_generator_are_missing(self):
+        os.remove(os.path.join(self.root, "shop", "urls.py"))
+        os.remove(os.path.join(self.root, "requirements.txt"))
+        _, missing = required_files.check(self.root, "python", "django")
+        self.assertEqual(missing, ["requirements.txt|pyproject.toml|setup.py", "*/urls.py"])
+
+    def test_alternatives(self):
+        self.assertTrue(required_files.matches("*/wsgi.py|*/asgi.py", "shop/asgi.py"))
+        self.assertEqual(required_files.describe("*/wsgi.py|*/asgi.py"), "*/wsgi.py or */asgi.py")
@@ -0,0 +1,102 @@
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+
+from codegen.models import ProjectHistory
+from codegen.utils import search
+
+
+def create(name, request, files):
+    return ProjectHistory.objects.create_with_files(
+        [{"filename": path, "content": content} for path, content in files.items()],
+        language="python", user_request=request, project_name=name
+    )
+
+
+class MatchQueryTests(SimpleTestCase):
+    def test_words_must_all_match_and_the_last_is_a_prefix(self):
+        self.assertEqual(search.match_query("invoice pdf"), '"invoice" "pdf"*')
+        self.assertEqual(search.match_query("  invoice  "), '"invoice"*')
+        # A single character is too broad a prefix
+        self.assertEqual(search.match_query("invoice x"), '"invoice" "x"')
+
+    def test_quoted_phrases(self):
+        self.assertEqual(search.match_query('"order total" tax'), '"order total" "tax"*')
+        self.assertEqual(search.match_query('tax "order total"'), '"tax" "order total"')
+
+    def test_fts_syntax_is_quoted_away(self):
+        self.assertEqual(search.match_query("a OR b"), '"a" "OR" "b"')
+        self.assertEqual(search.match_query("path:views NEAR(x y)"), '"path:views" "NEAR(x" "y)"*')
+        self.assertEqual(search.match_query('say "hi'), '"say" "hi"*')
+        self.assertEqual(search.match_query('-draft ^top col*'), '"-draft" "^top" "col*"*')
+
+    def test_nothing_to_search_for(self):
+        for text in ("", "   ", None, '""', "-- * ()"):
+            with self.subTest(text=text):
+                self.assertIsNone(search.match_query(text))
+
+
+class SearchIndexTests(TestCase):
+    def setUp(self):
+        self.shop = create("invoice-shop", "An online shop that emails invoices", {
+            "shop/views.py": "def checkout(request):\n    send_receipt(request.user)\n",
+            "README.md": "# Shop\n<script>alert(1)</script> receipts\n",
+        })
+        self.blog = create("blog", "A blog with comments", {"blog/models.py": "class Comment:\n    body = ''\n"})
+
+    def ids(self, text, **kwargs):
+        return [hit["project_id"] for hit in search.search(text, **kwargs)[1]]
+
+    def rows(self, table):
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM {table}")
+            return cursor.fetchone()[0]
+
+    def test_created_projects_and_files_are_indexed(self):
+        self.assertEqual(self.ids("invoices"), [self.shop.id])
+        # Porter stemming and the prefix on the last word
+        self.assertEqual(self.ids("invoice"), [self.shop.id])
+        self.assertEqual(self.ids("comm"), [self.blog.id])
+        # File paths and bodies
+        self.assertEqual(self.ids("send_receipt"), [self.shop.id])
+        self.assertEqual(self.ids("models"), [self.blog.id])
+
+    def test_renaming_a_project_updates_the_index(self):
+        self.blog.project_name = "journal"
+        self.blog.user_request = "A diary"
+        self.blog.save()
+        self.assertEqual(self.ids("journal"), [self.blog.id])
+        self.assertEqual(self.ids("blog with"), [])
+        self.assertEqual(self.rows(search.PROJECT_TABLE), 2)
+
+    def test_changing_a_file_updates_the_index(self):
+        self.shop.save_files([{"filename": "shop/views.py", "content": "def refund(request):\n    pass\n"}])
+        self.assertEqual(self.ids("refund"), [self.shop.id])
+        self.assertEqual(self.ids("send_receipt"), [])
+
+    def test_deleting_a_project_removes_it_from_the_index(self):
+        self.shop.delete()
+        self.assertEqual(self.ids("invoice"), [])
+        self.assertEqual(self.rows(search.PROJECT_TABLE), 1)
+        self.assertEqual(self.rows(search.FILE_TABLE), 1)
+
+    def test_snippets_are_escaped_and_highlighted(self):
+        hit = search.search("receipts")[1][0]
+        self.assertEqual(hit["files"][0]["filename"], "README.md")
+        self.assertIn("&lt;script&gt;", hit["files"][0]["snippet"])
+        self.assertIn("<mark>receipts</mark>", hit["files"][0]["snippet"])
+        self.assertNotIn("<script>", hit["files"][0]["snippet"])
+
+    def test_hostile_queries_do_not_raise(self):
+        for text in ('"unterminated', "a AND (b", "path:shop", "NEAR(", "*", "'; DROP TABLE codegen_projecthistory; --"):
+            with self.subTest(text=text):
+                search.search(text)
+        self.assertEqual(ProjectHistory.objects.count(), 2)
+
+    def test_search_view_pages(self):
+        response = self.client.get("/search/", {"q": "a", "page_size": 1})
+        self.assertEqual(response.status_code, 200)
+        body = self.client.get("/search/", {"q": "shop OR blog"}).json()
+        self.assertEqual(body["results"], [])
+        body = self.client.get("/search/", {"q": "request", "page_size": 1}).json()
+        self.assertEqual((body["total"], len(body["results"]), body["has_more"]), (1, 1, False))
+        self.assertEqual(self.client.get("/search/", {"q": "x", "page": "two"}).status_code, 400)
@@ -1,14 +1,21 @@
 from django.urls import path
-from .views import generate_code, index, fetch_history, continue_project, index,delete_project, install_dependencies, generate_module
+from .views import generate_code, index, fetch_history, continue_project, index,delete_project, install_dependencies, install_log, export_project, generate_module, job_status, metrics_view, get_project_files, get_project_file, search_projects
 
 urlpatterns = [
     path("", index, name="index"),
     path("generate_code/", generate_code, name="generate_code"),
     path("history/", fetch_history, name="fetch_history"),
+    path("search/", search_projects, name="search_projects"),
+    path("get_project_files/<int:project_id>/", get_project_files, name="get_project_files"),
+    path("get_project_files/<int:project_id>/files/<path:filename>", get_project_file, name="get_project_file"),
     path("continue_project/", continue_project, name="continue_project"),
     path('delete_project/',delete_project, name='delete_project'),
     path('install_dependencies/',install_dependencies,name='install_dependencies'),
+    path("install_dependencies/<int:job_id>/log/", install_log, name="install_log"),
     path("generate_module/", generate_module, name="generate_module"),
+    path("jobs/<int:job_id>/", job_status, name="job_status"),
+    path("export_project/<int:project_id>/", export_project, name="export_project"),
+    path("metrics", metrics_view, name="metrics"),
     
 
 
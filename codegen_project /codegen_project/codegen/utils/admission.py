@@ -0,0 +1,235 @@
+import asyncio
+import contextvars
+import math
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+# How long LLM calls may queue; background jobs can afford to wait longer than a user's request
+_max_wait = contextvars.ContextVar('codegen_admission_max_wait', default=None)
+
+_local = threading.local()
+
+# How often a call waiting for a concurrency slot checks again
+POLL_INTERVAL = 0.25
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+    key TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS slots (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    pid INTEGER NOT NULL,
+    acquired_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS slots_user_idx ON slots (user_id);
+"""
+
+
+class AdmissionRejected(Exception):
+    """An LLM call could not be admitted within the allowed wait; retry after `retry_after` seconds."""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+def enabled():
+    return getattr(settings, 'CODEGEN_ADMISSION_ENABLED', True)
+
+
+def _setting(name, default):
+    return getattr(settings, f'CODEGEN_ADMISSION_{name}', default)
+
+
+def _db_path():
+    return _setting('DB', None) or os.path.join(tempfile.gettempdir(), 'codegen_admission.sqlite3')
+
+
+def _connection():
+    """This thread's connection to the host-wide admission database (reopened after a fork or a change of CODEGEN_ADMISSION_DB)."""
+    conn = getattr(_local, 'conn', None)
+    path = _db_path()
+    if conn is None or _local.pid != os.getpid() or _local.path != path:
+        conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        _local.conn = conn
+        _local.pid = os.getpid()
+        _local.path = path
+    return conn
+
+
+@contextmanager
+def max_wait(seconds):
+    """Let the LLM calls made inside this block queue for up to `seconds` before being rejected."""
+    token = _max_wait.set(seconds)
+    try:
+        yield
+    finally:
+        _max_wait.reset(token)
+
+
+def _buckets(user_id, cost_tokens):
+    """(key, capacity, refill per second, cost) for every bucket a call must pass."""
+    limits = [
+        ("global:requests", _setting('GLOBAL_RPM', 500), 1),
+        ("global:tokens", _setting('GLOBAL_TPM', 150_000), cost_tokens),
+        (f"user:{user_id}:requests", _setting('USER_RPM', 60), 1),
+        (f"user:{user_id}:tokens", _setting('USER_TPM', 60_000), cost_tokens),
+    ]
+    # A bucket holds one minute of quota; a call larger than that still fits an otherwise idle bucket
+    return [(key, per_minute, per_minute / 60.0, min(cost, per_minute)) for key, per_minute, cost in limits if per_minute]
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _release_stale_slots(conn, now):
+    """Free slots of processes that died mid-call, or that were held implausibly long."""
+    conn.execute("DELETE FROM slots WHERE acquired_at < ?", (now - _setting('SLOT_TTL', 15 * 60),))
+    for (pid,) in conn.execute("SELECT DISTINCT pid FROM slots").fetchall():
+        if pid != os.getpid() and not _pid_alive(pid):
+            conn.execute("DELETE FROM slots WHERE pid = ?", (pid,))
+
+
+def try_acquire(user_id, cost_tokens):
+    """
+    Try to admit one call in a single IMMEDIATE transaction, so every worker
+    process on the host sees the same buckets and slots. Returns
+    (slot_id, 0) when admitted, or (None, seconds to wait) when not.
+    """
+    conn = _connection()
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        _release_stale_slots(conn, now)
+
+        running = conn.execute("SELECT COUNT(*) FROM slots").fetchone()[0]
+        running_for_user = conn.execute("SELECT COUNT(*) FROM slots WHERE user_id = ?", (user_id,)).fetchone()[0]
+        if running >= _setting('GLOBAL_CONCURRENCY', 16) or running_for_user >= _setting('USER_CONCURRENCY', 4):
+            conn.execute("ROLLBACK")
+            return None, POLL_INTERVAL
+
+        refilled = []
+        wait = 0.0
+        for key, capacity, rate, cost in _buckets(user_id, cost_tokens):
+            row = conn.execute("SELECT tokens, updated_at FROM buckets WHERE key = ?", (key,)).fetchone()
+            tokens = capacity if row is None else min(capacity, row[0] + (now - row[1]) * rate)
+            if tokens < cost:
+                wait = max(wait, (cost - tokens) / rate)
+            refilled.append((key, tokens - cost))
+        if wait:
+            conn.execute("ROLLBACK")
+            return None, wait
+
+        conn.executemany(
+            "INSERT OR REPLACE INTO buckets (key, tokens, updated_at) VALUES (?, ?, ?)",
+            [(key, tokens, now) for key, tokens in refilled]
+        )
+        slot_id = conn.execute(
+            "INSERT INTO slots (user_id, pid, acquired_at) VALUES (?, ?, ?)", (user_id, os.getpid(), now)
+        ).lastrowid
+        conn.execute("COMMIT")
+        return slot_id, 0
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def release(slot_id, user_id, token_correction=0):
+    """
+    Free a concurrency slot. token_correction (actual minus estimated tokens)
+    is charged to, or refunded from, the token buckets.
+    """
+    conn = _connection()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute("DELETE FROM slots WHERE id = ?", (slot_id,))
+        if token_correction:
+            for key, capacity, _, _ in _buckets(user_id, 0):
+                if key.endswith(":tokens"):
+                    conn.execute(
+                        "UPDATE buckets SET tokens = MIN(?, tokens - ?) WHERE key = ?",
+                        (capacity, token_correction, key)
+                    )
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+
+class Permit:
+    """An admitted LLM call; release it with the actual token usage once the call is done."""
+
+    def __init__(self, slot_id, user_id, estimated_tokens):
+        self.slot_id = slot_id
+        self.user_id = user_id
+        self.estimated_tokens = estimated_tokens
+        self.released = False
+
+    async def release(self, actual_tokens=None):
+        if self.released or self.slot_id is None:
+            return
+        self.released = True
+        correction = actual_tokens - self.estimated_tokens if actual_tokens is not None else 0
+        await sync_to_async(release, thread_sensitive=False)(self.slot_id, self.user_id, correction)
+
+
+async def client_key(request):
+    """
+    The identity a request's LLM calls are admitted as: the authenticated
+    user, else the client address. Never a client-supplied id, which would
+    let a caller dodge its limits or spend another user's quota.
+    """
+    user = await request.auser()
+    if user.is_authenticated:
+        return f"account:{user.pk}"
+    return f"ip:{request.META.get('REMOTE_ADDR') or 'unknown'}"
+
+
+async def admit(estimated_tokens, user_id=None):
+    """
+    Wait for a concurrency slot and enough request/token budget for one LLM
+    call on behalf of user_id (a client_key()). Queues for up to
+    CODEGEN_ADMISSION_MAX_WAIT seconds (or the enclosing max_wait()), then
+    raises AdmissionRejected.
+    """
+    user_id = str(user_id or 'anonymous')
+    if not enabled():
+        return Permit(None, user_id, estimated_tokens)
+
+    wait_limit = _max_wait.get()
+    if wait_limit is None:
+        wait_limit = _setting('MAX_WAIT', 10)
+    deadline = time.monotonic() + wait_limit
+
+    while True:
+        slot_id, wait = await sync_to_async(try_acquire, thread_sensitive=False)(user_id, estimated_tokens)
+        if slot_id is not None:
+            return Permit(slot_id, user_id, estimated_tokens)
+
+        # A slot can free up any moment, so keep polling until the deadline; a bucket
+        # refill that lands after it is rejected straight away
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or (wait > POLL_INTERVAL and wait > remaining):
+            raise AdmissionRejected(
+                "Too many code generation requests right now; please retry shortly.", max(wait, POLL_INTERVAL)
+            )
+        await asyncio.sleep(min(wait, remaining))
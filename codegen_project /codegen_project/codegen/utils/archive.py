@@ -0,0 +1,202 @@
+import hashlib
+import os
+import posixpath
+import stat
+import tarfile
+import time
+import zipfile
+
+from django.conf import settings
+
+from .manifest import IGNORED_DIRS, STAGING_PREFIX
+
+# Archives are produced incrementally: every writer method is a generator that
+# yields the compressed bytes as soon as they exist, so a response can stream
+# a project of any size while holding at most one read chunk and the
+# compressor's window in memory.
+
+FORMATS = {
+    "zip": ("application/zip", "zip"),
+    "tar.gz": ("application/gzip", "tar.gz"),
+}
+
+READ_CHUNK = 256 * 1024
+
+# Never exported from a project folder on disk
+SKIP_DIRS = IGNORED_DIRS
+SKIP_PREFIXES = (STAGING_PREFIX,)
+
+# ZIP timestamps cannot predate 1980
+_ZIP_EPOCH = time.mktime((1980, 1, 1, 0, 0, 0, 0, 0, -1))
+
+
+class _Sink:
+    """A write-only file object that hands back whatever was written since the last drain."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def archive_name(path):
+    """A file's path inside the archive, or None for paths that would escape its folder."""
+    name = posixpath.normpath(str(path).replace("\\", "/")).lstrip("/")
+    if not name or name == "." or name.startswith("../") or name == "..":
+        return None
+    return name
+
+
+class ArchiveWriter:
+    def __init__(self, fmt, root=""):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unsupported archive format: {fmt}")
+        self.fmt = fmt
+        self.root = root
+        self._sink = _Sink()
+        if fmt == "zip":
+            # An unseekable sink makes zipfile write sizes in data descriptors after each file
+            self._archive = zipfile.ZipFile(self._sink, mode="w", compression=zipfile.ZIP_DEFLATED, compresslevel=6)
+        else:
+            self._archive = tarfile.open(fileobj=self._sink, mode="w|gz")
+
+    def _name(self, name):
+        return posixpath.join(self.root, name) if self.root else name
+
+    def add(self, name, chunks, size, mtime, mode=0o644):
+        """Add a file whose body arrives as an iterable of byte chunks totalling `size`. Yields output bytes."""
+        if self.fmt == "zip":
+            info = zipfile.ZipInfo(self._name(name), date_time=time.localtime(max(mtime, _ZIP_EPOCH))[:6])
+            info.compress_type = zipfile.ZIP_DEFLATED
+            info.external_attr = (stat.S_IFREG | mode) << 16
+            with self._archive.open(info, "w", force_zip64=size > zipfile.ZIP64_LIMIT) as dest:
+                for chunk in chunks:
+                    dest.write(chunk)
+                    data = self._sink.drain()
+                    if data:
+                        yield data
+        else:
+            info = tarfile.TarInfo(self._name(name))
+            info.size = size
+            info.mtime = int(mtime)
+            info.mode = mode
+            # What TarFile.addfile does, but yielding between body chunks
+            tar = self._archive
+            header = info.tobuf(tar.format, tar.encoding, tar.errors)
+            tar.fileobj.write(header)
+            written = 0
+            for chunk in chunks:
+                # A file that grew since it was measured must not overrun its header's size
+                chunk = chunk[:size - written]
+                tar.fileobj.write(chunk)
+                written += len(chunk)
+                data = self._sink.drain()
+                if data:
+                    yield data
+            padding = -size % tarfile.BLOCKSIZE
+            tar.fileobj.write(tarfile.NUL * (size - written + padding))
+            tar.offset += len(header) + size + padding
+        data = self._sink.drain()
+        if data:
+            yield data
+
+    def add_bytes(self, name, data, mtime):
+        return self.add(name, [data[i:i + READ_CHUNK] for i in range(0, len(data), READ_CHUNK)] or [b""],
+                        len(data), mtime)
+
+    def add_file(self, name, path):
+        """Add a file from disk, read in READ_CHUNK pieces."""
+        st = os.stat(path)
+
+        def chunks():
+            with open(path, "rb") as f:
+                while True:
+                    chunk = f.read(READ_CHUNK)
+                    if not chunk:
+                        return
+                    yield chunk
+        return self.add(name, chunks(), st.st_size, st.st_mtime, stat.S_IMODE(st.st_mode) or 0o644)
+
+    def close(self):
+        """Finish the archive (central directory / gzip trailer). Yields the last bytes."""
+        self._archive.close()
+        data = self._sink.drain()
+        if data:
+            yield data
+
+
+def disk_files(root):
+    """(archive name, absolute path) of every regular file under a project folder, minus environments and state."""
+    found = []
+    for current, dirs, files in os.walk(root):
+        dirs[:] = sorted(d for d in dirs if d not in SKIP_DIRS and not d.startswith(SKIP_PREFIXES))
+        for name in sorted(files):
+            path = os.path.join(current, name)
+            if os.path.isfile(path) and not os.path.islink(path):
+                found.append((os.path.relpath(path, root).replace(os.sep, "/"), path))
+    return found
+
+
+def fingerprint(entries):
+    """A digest of (name, version) pairs; equal fingerprints mean byte-identical archives."""
+    digest = hashlib.sha256()
+    for name, version in sorted(entries):
+        digest.update(f"{name}\0{version}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def disk_fingerprint(files):
+    versions = []
+    for name, path in files:
+        st = os.stat(path)
+        versions.append((name, f"{st.st_size}:{st.st_mtime_ns}:{stat.S_IMODE(st.st_mode)}"))
+    return fingerprint(versions)
+
+
+def cache_dir():
+    return getattr(settings, 'CODEGEN_EXPORT_CACHE_DIR', None) or \
+        os.path.join(os.path.expanduser("~"), ".cache", "codegen", "exports")
+
+
+def cached_path(project_id, source, fmt, digest):
+    return os.path.join(cache_dir(), f"{project_id}-{source}-{digest[:24]}.{FORMATS[fmt][1]}")
+
+
+def remove_cached(project_id, keep=None):
+    """Delete a project's cached archives; with `keep`, only the older ones of the same source and format."""
+    directory = cache_dir()
+    prefix = f"{project_id}-"
+    suffix = ""
+    if keep:
+        name = os.path.basename(keep)
+        prefix = name[:name.rindex("-") + 1]
+        suffix = name[name.index("."):]
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return
+    for name in names:
+        path = os.path.join(directory, name)
+        if name.startswith(prefix) and name.endswith(suffix) and path != keep:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def next_chunk(chunks, tee=None):
+    """The next piece of an archive generator, or None when it is done; copied to `tee` if given. Blocking."""
+    chunk = next(chunks, None)
+    if chunk is not None and tee is not None:
+        tee.write(chunk)
+    return chunk
@@ -0,0 +1,73 @@
+import json
+import random
+
+# Synthetic model output for `manage.py bench`: realistic code bodies (quotes,
+# backslashes, regexes, unicode) in the response shapes the parser meets.
+
+RESPONSE_VARIANTS = ("clean", "fenced", "prose", "damaged", "truncated")
+
+_PY_SNIPPETS = [
+    'def {name}(request, pk=None):\n    """Return the {name} view."""\n    qs = {model}.objects.filter(owner=request.user)\n    if pk is not None:\n        qs = qs.filter(pk=pk)\n    return JsonResponse({{"items": list(qs.values())}})\n',
+    'class {model}(models.Model):\n    name = models.CharField(max_length=100)\n    slug = models.SlugField(unique=True)\n    created_at = models.DateTimeField(auto_now_add=True)\n\n    def __str__(self):\n        return f"{{self.name}} ({{self.slug}})"\n',
+    'EMAIL_RE = re.compile(r"^[\\w.+-]+@[\\w-]+\\.[\\w.]+$")\nPHONE_RE = re.compile(r"^\\+?\\d{{7,14}}$")\n',
+    'logger.info("Processed %s rows for \'%s\' in %.2fs", count, name, elapsed)\n',
+    'WINDOWS_PATH = "C:\\\\Users\\\\app\\\\data"\nMESSAGE = "Caf\u00e9 \u2014 \u00fcber \u2713"\n',
+]
+
+_JS_SNIPPETS = [
+    "export async function {name}(req, res) {{\n  const items = await {model}.find({{ owner: req.user.id }});\n  res.json({{ items }});\n}}\n",
+    "const pattern = /^[\\w.+-]+@[\\w-]+\\.[\\w.]+$/;\nconst label = `Hello ${{user.name}}, you have \"${{count}}\" items`;\n",
+    "router.get('/{name}/:id', authenticate, async (req, res, next) => {{\n  try {{\n    res.json(await {model}.findById(req.params.id));\n  }} catch (err) {{\n    next(err);\n  }}\n}});\n",
+]
+
+_WORDS = ["invoice", "order", "customer", "report", "account", "payment", "product", "session", "profile", "audit"]
+
+
+def code_file(rng, size, language="python"):
+    """A file body of roughly `size` bytes built from realistic snippets."""
+    snippets = _PY_SNIPPETS if language == "python" else _JS_SNIPPETS
+    parts = []
+    total = 0
+    while total < size:
+        word = rng.choice(_WORDS)
+        part = rng.choice(snippets).format(name=f"{word}_{rng.randint(0, 999)}", model=word.capitalize())
+        parts.append(part + "\n")
+        total += len(part) + 1
+    return "".join(parts)
+
+
+def project_files(count, avg_size=2000, seed=0):
+    """A project of `count` files (Python and JavaScript) averaging avg_size bytes."""
+    rng = random.Random(seed)
+    files = []
+    for i in range(count):
+        language = "python" if i % 3 else "javascript"
+        folder = rng.choice(["core", "api", "services", "web/src", "web/src/components"])
+        ext = "py" if language == "python" else "js"
+        size = max(200, int(rng.gauss(avg_size, avg_size / 3)))
+        files.append({"filename": f"{folder}/{rng.choice(_WORDS)}_{i}.{ext}", "content": code_file(rng, size, language)})
+    return files
+
+
+def model_response(files, variant="clean"):
+    """Serialize files the way a model might return them."""
+    text = json.dumps(files, indent=2, ensure_ascii=False)
+    if variant == "clean":
+        return text
+    if variant == "fenced":
+        return f"```json\n{text}\n```"
+    if variant == "prose":
+        return f"Here is the complete project you asked for:\n\n{text}\n\nLet me know if you need any changes!"
+    if variant == "damaged":
+        # Regex escapes passed through unescaped, and a trailing comma before the closing bracket
+        return text.replace('\\\\w', '\\w').replace('\\\\d', '\\d').rstrip().rstrip(']').rstrip() + ",\n]"
+    if variant == "truncated":
+        return text[:int(len(text) * 0.97)]
+    raise ValueError(f"Unknown response variant: {variant}")
+
+
+def response_of_size(size, variant="clean", seed=0):
+    """A model response of about `size` bytes."""
+    avg = max(1000, min(20000, size // 20))
+    count = max(1, size // avg)
+    return model_response(project_files(count, avg_size=avg, seed=seed), variant)
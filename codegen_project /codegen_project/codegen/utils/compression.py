@@ -0,0 +1,130 @@
+import zlib
+
+from django.conf import settings
+
+# Stored file bodies (FileBlob.data) start with one codec byte:
+#   0x00  UTF-8 text as is (small files, or text that does not compress)
+#   0x01  raw deflate primed with ZDICT_V1
+# A codec, and the dictionary it names, is never changed once rows use it;
+# a better dictionary gets a new codec byte.
+
+CODEC_RAW = 0
+CODEC_ZLIB_V1 = 1
+
+# Below this many bytes the deflate overhead outweighs the savings
+MIN_COMPRESS_BYTES = 64
+
+# Deflate finds matches up to 32 KB back, so a preset dictionary of snippets
+# common in generated projects lets even a small file reference them. The
+# most frequent material goes last, closest to the data.
+ZDICT_V1 = "\n".join([
+    # Config, manifests and markup
+    '<!DOCTYPE html>\n<html lang="en">\n<head>\n    <meta charset="UTF-8">\n'
+    '    <meta name="viewport" content="width=device-width, initial-scale=1.0">\n    <title>',
+    '</title>\n    <link rel="stylesheet" href="',
+    '</head>\n<body>\n    <div class="container">\n',
+    '    </div>\n    <script src="',
+    '"></script>\n</body>\n</html>\n',
+    '{% extends "base.html" %}\n{% block content %}\n{% endblock %}\n{% load static %}\n{% csrf_token %}\n',
+    '  margin: 0;\n  padding: 0;\n  box-sizing: border-box;\n  display: flex;\n  justify-content: center;\n'
+    '  align-items: center;\n  font-family: Arial, sans-serif;\n  background-color: #fff;\n  color: #333;\n',
+    '{\n  "name": "",\n  "version": "1.0.0",\n  "description": "",\n  "main": "index.js",\n'
+    '  "scripts": {\n    "start": "node server.js",\n    "dev": "nodemon server.js",\n    "test": "jest"\n  },\n'
+    '  "dependencies": {\n    "express": "^4.18.2",\n    "dotenv": "^16.0.3",\n    "cors": "^2.8.5",\n'
+    '    "mongoose": "^7.0.0",\n    "jsonwebtoken": "^9.0.0",\n    "bcryptjs": "^2.4.3"\n  },\n'
+    '  "devDependencies": {\n    "nodemon": "^3.0.1",\n    "jest": "^29.0.0"\n  }\n}\n',
+    'Django>=4.2\ndjangorestframework\npsycopg2-binary\npython-dotenv\nrequests\npytest\nflask\nfastapi\nuvicorn\n'
+    'sqlalchemy\npydantic\ngunicorn\n',
+    '<?xml version="1.0" encoding="UTF-8"?>\n<project xmlns="http://maven.apache.org/POM/4.0.0">\n'
+    '    <modelVersion>4.0.0</modelVersion>\n    <groupId>com.example</groupId>\n    <artifactId>\n'
+    '    <dependencies>\n        <dependency>\n            <groupId>org.springframework.boot</groupId>\n'
+    '            <artifactId>spring-boot-starter-web</artifactId>\n        </dependency>\n    </dependencies>\n',
+    # Java, C#, Go, PHP, Rust
+    'package com.example;\n\nimport java.util.List;\nimport java.util.Optional;\n'
+    'import org.springframework.beans.factory.annotation.Autowired;\nimport org.springframework.web.bind.annotation.*;\n\n'
+    '@RestController\n@RequestMapping("/api")\npublic class Controller {\n    @Autowired\n    private Service service;\n\n'
+    '    @GetMapping\n    public List<> findAll() {\n        return service.findAll();\n    }\n\n'
+    '    public static void main(String[] args) {\n        System.out.println(\n    }\n}\n',
+    'using System;\nusing System.Collections.Generic;\nusing System.Linq;\nusing Microsoft.AspNetCore.Mvc;\n\n'
+    'namespace App.Controllers\n{\n    [ApiController]\n    [Route("api/[controller]")]\n'
+    '    public class Controller : ControllerBase\n    {\n        public async Task<IActionResult> Get()\n        {\n'
+    '            return Ok();\n        }\n    }\n}\n',
+    'package main\n\nimport (\n\t"encoding/json"\n\t"fmt"\n\t"log"\n\t"net/http"\n)\n\n'
+    'func main() {\n\thttp.HandleFunc("/", handler)\n\tlog.Fatal(http.ListenAndServe(":8080", nil))\n}\n\n'
+    'func handler(w http.ResponseWriter, r *http.Request) {\n\tif err != nil {\n\t\treturn err\n\t}\n}\n',
+    '<?php\n\nnamespace App\\Http\\Controllers;\n\nuse Illuminate\\Http\\Request;\n\n'
+    'class Controller extends BaseController\n{\n    public function index(Request $request)\n    {\n'
+    '        return response()->json($data);\n    }\n}\n',
+    'use serde::{Deserialize, Serialize};\nuse std::collections::HashMap;\n\n'
+    '#[derive(Debug, Clone, Serialize, Deserialize)]\npub struct {\n    pub id: u32,\n    pub name: String,\n}\n\n'
+    'fn main() {\n    println!("{}", );\n}\n\nimpl {\n    pub fn new() -> Self {\n        Self {\n        }\n    }\n}\n',
+    # JavaScript / TypeScript / React
+    "const express = require('express');\nconst router = express.Router();\nconst app = express();\n"
+    "app.use(express.json());\napp.use(cors());\nrequire('dotenv').config();\nconst PORT = process.env.PORT || 3000;\n"
+    "app.listen(PORT, () => {\n  console.log(`Server running on port ${PORT}`);\n});\n\nmodule.exports = router;\n",
+    "router.get('/', async (req, res) => {\n  try {\n    res.status(200).json({ success: true, data });\n"
+    "  } catch (error) {\n    console.error(error);\n    res.status(500).json({ message: error.message });\n  }\n});\n",
+    "import React, { useState, useEffect } from 'react';\nimport PropTypes from 'prop-types';\n"
+    "import axios from 'axios';\n\nexport default function App() {\n  const [loading, setLoading] = useState(false);\n"
+    "  const [error, setError] = useState(null);\n  useEffect(() => {\n  }, []);\n\n  return (\n"
+    "    <div className=\"container\">\n      <h1>\n    </div>\n  );\n}\n",
+    "export const  = async () => {\n  const response = await fetch(`${API_URL}/`, {\n    method: 'POST',\n"
+    "    headers: { 'Content-Type': 'application/json' },\n    body: JSON.stringify(data),\n  });\n"
+    "  return response.json();\n};\n\nexport default ;\n",
+    "document.addEventListener('DOMContentLoaded', () => {\n  const form = document.getElementById('form');\n"
+    "  document.querySelector('.').addEventListener('click', (event) => {\n    event.preventDefault();\n  });\n});\n",
+    # Python / Django / Flask / FastAPI
+    'from flask import Flask, jsonify, request, render_template\n\napp = Flask(__name__)\n\n'
+    '@app.route("/", methods=["GET", "POST"])\ndef index():\n    return render_template("index.html")\n\n'
+    'if __name__ == "__main__":\n    app.run(debug=True)\n',
+    'from fastapi import FastAPI, HTTPException, Depends\nfrom pydantic import BaseModel\n\napp = FastAPI()\n\n'
+    '@app.get("/")\nasync def root():\n    return {"message": "Hello World"}\n',
+    'from django.db import models\nfrom django.contrib.auth.models import User\n\n\n'
+    'class (models.Model):\n    name = models.CharField(max_length=100)\n    title = models.CharField(max_length=200)\n'
+    '    description = models.TextField(blank=True)\n    user = models.ForeignKey(User, on_delete=models.CASCADE)\n'
+    '    created_at = models.DateTimeField(auto_now_add=True)\n    updated_at = models.DateTimeField(auto_now=True)\n\n'
+    '    class Meta:\n        ordering = [\'-created_at\']\n\n    def __str__(self):\n        return self.name\n',
+    'from django.shortcuts import render, redirect, get_object_or_404\nfrom django.http import JsonResponse, HttpResponse\n'
+    'from django.contrib.auth.decorators import login_required\nfrom rest_framework import serializers, viewsets, status\n'
+    'from rest_framework.response import Response\nfrom .models import \nfrom .forms import \n\n\n'
+    'def index(request):\n    return render(request, "index.html", context)\n\n\n'
+    'class ViewSet(viewsets.ModelViewSet):\n    queryset = .objects.all()\n    serializer_class = Serializer\n\n\n'
+    'class Serializer(serializers.ModelSerializer):\n    class Meta:\n        model = \n        fields = \'__all__\'\n',
+    'from django.urls import path, include\nfrom . import views\n\nurlpatterns = [\n    path(\'\', views.index, name=\'index\'),\n]\n',
+    'import os\nimport sys\nimport json\nimport logging\nfrom datetime import datetime\nfrom typing import Dict, List, Optional\n\n'
+    'logger = logging.getLogger(__name__)\n\n\ndef main():\n    """\n    """\n    try:\n        result = \n'
+    '    except Exception as e:\n        logger.error(f"Error: {e}")\n        raise\n    return result\n\n\n'
+    'class :\n    def __init__(self, name: str):\n        self.name = name\n\n    def __repr__(self):\n'
+    '        return f"<{self.__class__.__name__} {self.name}>"\n\n\nif __name__ == "__main__":\n    main()\n',
+]).encode("utf-8")
+
+
+def enabled():
+    return getattr(settings, 'CODEGEN_BLOB_COMPRESSION', True)
+
+
+def compress(text):
+    """Encode a file body for FileBlob.data: deflated with the preset dictionary when that is smaller."""
+    raw = text.encode("utf-8")
+    if enabled() and len(raw) >= MIN_COMPRESS_BYTES:
+        compressor = zlib.compressobj(
+            getattr(settings, 'CODEGEN_BLOB_COMPRESSION_LEVEL', 6), zlib.DEFLATED, -15, zdict=ZDICT_V1
+        )
+        packed = compressor.compress(raw) + compressor.flush()
+        if len(packed) < len(raw):
+            return bytes([CODEC_ZLIB_V1]) + packed
+    return bytes([CODEC_RAW]) + raw
+
+
+def decompress(data):
+    """The text of a FileBlob.data value."""
+    data = bytes(data)
+    if not data:
+        return ""
+    codec, payload = data[0], data[1:]
+    if codec == CODEC_RAW:
+        return payload.decode("utf-8")
+    if codec == CODEC_ZLIB_V1:
+        decompressor = zlib.decompressobj(-15, zdict=ZDICT_V1)
+        return (decompressor.decompress(payload) + decompressor.flush()).decode("utf-8")
+    raise ValueError(f"Unknown file body codec {codec}")
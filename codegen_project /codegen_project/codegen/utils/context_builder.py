@@ -0,0 +1,198 @@
+import ast
+import posixpath
+import re
+
+from django.conf import settings
+
+DEFAULT_TOKEN_BUDGET = 4000
+MAX_LISTED_PATHS = 100  # files named without text beyond this are only counted
+
+_WORD = re.compile(r'[A-Za-z_][A-Za-z0-9_]*')
+_CAMEL = re.compile(r'[A-Z]?[a-z0-9]+|[A-Z]+(?![a-z])')
+_PATH_SPLIT = re.compile(r'[/._\-]+')
+
+_STOPWORDS = {
+    'the', 'and', 'for', 'with', 'that', 'this', 'from', 'into', 'add', 'new', 'use', 'make', 'should',
+    'can', 'all', 'each', 'when', 'then', 'also', 'please', 'file', 'files', 'code', 'project', 'need',
+    'want', 'will', 'are', 'not', 'but', 'has', 'have', 'its', 'our', 'your', 'set', 'get', 'update',
+}
+
+# Declarations worth keeping in a non-Python outline
+_DECLARATION = re.compile(
+    r'^\s*(?:export\s+)?(?:default\s+)?(?:async\s+)?(?:public\s+|private\s+|protected\s+|static\s+)*'
+    r'(?:function|class|interface|type|struct|enum|func|def|fn|impl|const\s+\w+\s*=\s*(?:async\s*)?\(|module\.exports)\b.*$',
+    re.MULTILINE
+)
+_PY_IMPORT = re.compile(r'^\s*(?:from\s+([\w.]+)\s+import|import\s+([\w.]+))', re.MULTILINE)
+_JS_IMPORT = re.compile(r'''(?:require\(\s*|from\s+|import\s+)['"](\.{1,2}/[^'"]+)['"]''')
+
+
+def estimate_tokens(text):
+    """Rough token count for GPT models (about four characters per token for code)."""
+    return len(text) // 4 + 1
+
+
+def _words(text):
+    """Lower-cased identifier parts, splitting snake_case and camelCase."""
+    parts = set()
+    for word in _WORD.findall(text):
+        for piece in word.split('_'):
+            parts.update(p.lower() for p in _CAMEL.findall(piece))
+    return {p for p in parts if len(p) > 2 and p not in _STOPWORDS}
+
+
+def outline(filename, content):
+    """Signatures of the classes and functions in a file, for files that don't get their full text."""
+    if filename.endswith('.py'):
+        try:
+            tree = ast.parse(content)
+        except (SyntaxError, ValueError):
+            tree = None
+        if tree is not None:
+            lines = []
+            for node in tree.body:
+                if isinstance(node, (ast.Import, ast.ImportFrom)):
+                    lines.append(ast.unparse(node))
+                elif isinstance(node, ast.ClassDef):
+                    bases = ", ".join(ast.unparse(b) for b in node.bases)
+                    lines.append(f"class {node.name}({bases}):" if bases else f"class {node.name}:")
+                    for item in node.body:
+                        if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                            prefix = "async def" if isinstance(item, ast.AsyncFunctionDef) else "def"
+                            lines.append(f"    {prefix} {item.name}({ast.unparse(item.args)}): ...")
+                elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                    prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+                    lines.append(f"{prefix} {node.name}({ast.unparse(node.args)}): ...")
+                elif isinstance(node, ast.Assign) and all(isinstance(t, ast.Name) for t in node.targets):
+                    lines.append(f"{', '.join(t.id for t in node.targets)} = ...")
+            return "\n".join(lines)
+
+    return "\n".join(m.group(0).strip() for m in _DECLARATION.finditer(content))
+
+
+def _imports(filename, content, paths):
+    """Paths of the other project files this file imports."""
+    found = set()
+    if filename.endswith('.py'):
+        for match in _PY_IMPORT.finditer(content):
+            module = (match.group(1) or match.group(2)).strip('.')
+            candidate = module.replace('.', '/')
+            for path in (f"{candidate}.py", f"{candidate}/__init__.py"):
+                if path in paths:
+                    found.add(path)
+            # Relative "from .models import x" inside a package
+            sibling = posixpath.join(posixpath.dirname(filename), f"{candidate}.py")
+            if sibling in paths:
+                found.add(sibling)
+    else:
+        for match in _JS_IMPORT.finditer(content):
+            target = posixpath.normpath(posixpath.join(posixpath.dirname(filename), match.group(1)))
+            for path in (target, f"{target}.js", f"{target}.ts", f"{target}.jsx", f"{target}.tsx", f"{target}/index.js"):
+                if path in paths:
+                    found.add(path)
+    found.discard(filename)
+    return found
+
+
+def rank_files(files, query, recent_paths=()):
+    """
+    Score files by relevance to the follow-up request: matches in the path
+    weigh most, then declared identifiers, then plain mentions; recently
+    changed files get a bonus, and files share some of their score with the
+    files they import or are imported by.
+    """
+    keywords = _words(query)
+    paths = {f['filename'] for f in files}
+    recent_rank = {path: i for i, path in enumerate(recent_paths)}
+
+    scores = {}
+    outlines = {}
+    graph = {path: set() for path in paths}
+    for f in files:
+        path, content = f['filename'], f['content']
+        outlines[path] = outline(path, content)
+
+        score = 5 * len(keywords & set(_PATH_SPLIT.split(path.lower())))
+        score += 3 * len(keywords & _words(outlines[path]))
+        lowered = content.lower()
+        score += sum(1 for keyword in keywords if keyword in lowered)
+        if path in recent_rank and recent_paths:
+            score += 2 * (1 - recent_rank[path] / len(recent_paths))
+        scores[path] = score
+
+        for imported in _imports(path, content, paths):
+            graph[path].add(imported)
+            graph[imported].add(path)
+
+    final = {
+        path: scores[path] + 0.5 * max((scores[n] for n in graph[path]), default=0)
+        for path in paths
+    }
+    ranked = sorted(files, key=lambda f: final[f['filename']], reverse=True)
+    return ranked, outlines
+
+
+def _listing(paths, omitted):
+    """The closing line naming files the context doesn't show."""
+    more = f" (and {omitted} more)" if omitted else ""
+    return "\n// Other files (not shown): " + ", ".join(paths) + more + "\n"
+
+
+def build_context(files, query, budget=None, recent_paths=()):
+    """
+    Build the continuation context within a token budget: the most relevant
+    files in full, outlines for the next ones, then a capped list of the
+    remaining paths. Returns (context_text, report).
+    """
+    if budget is None:
+        budget = getattr(settings, 'CODEGEN_CONTEXT_TOKEN_BUDGET', DEFAULT_TOKEN_BUDGET)
+
+    files = [f for f in files if isinstance(f, dict) and 'filename' in f and 'content' in f]
+    ranked, outlines = rank_files(files, query, recent_paths)
+    paths = [f['filename'] for f in ranked]
+
+    # Keep room to at least name the files that end up without text
+    reserve = min(estimate_tokens(_listing(paths[:MAX_LISTED_PATHS], 0)), budget // 4) if paths else 0
+
+    mode = {}
+    used = 0
+    for f in ranked:
+        cost = estimate_tokens(f"\n// File: {f['filename']}\n{f['content']}\n")
+        if used + cost <= budget - reserve:
+            mode[f['filename']] = 'full'
+            used += cost
+    for path in paths:
+        if path in mode:
+            continue
+        cost = estimate_tokens(f"\n// Outline: {path}\n{outlines[path]}\n")
+        if used + cost <= budget - reserve:
+            mode[path] = 'outline'
+            used += cost
+
+    rest = [path for path in paths if path not in mode]
+    listed = []
+    for path in rest[:MAX_LISTED_PATHS]:
+        if used + estimate_tokens(_listing(listed + [path], len(rest) - len(listed) - 1)) > budget:
+            break
+        listed.append(path)
+
+    parts = []
+    for f in ranked:
+        path = f['filename']
+        if mode.get(path) == 'full':
+            parts.append(f"\n// File: {path}\n{f['content']}\n")
+        elif mode.get(path) == 'outline':
+            parts.append(f"\n// Outline: {path}\n{outlines[path]}\n")
+    if listed:
+        parts.append(_listing(listed, len(rest) - len(listed)))
+        used += estimate_tokens(parts[-1])
+
+    report = {
+        "full": [p for p in paths if mode.get(p) == 'full'],
+        "outlined": [p for p in paths if mode.get(p) == 'outline'],
+        "listed": listed,
+        "omitted": len(rest) - len(listed),
+        "estimated_tokens": used,
+        "budget": budget,
+    }
+    return "".join(parts), report
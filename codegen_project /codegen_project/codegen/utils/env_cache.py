@@ -0,0 +1,322 @@
+import errno
+import hashlib
+import json
+import os
+import re
+import shutil
+import stat
+import sys
+import sysconfig
+import tempfile
+import time
+import uuid
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Built dependency environments shared between projects, keyed by a hash of
+# the normalized manifest. Entries are copied in once and copied out
+# (copy-on-write where the filesystem supports reflinks), so a repeat install
+# of the same stack is a file-tree copy instead of a resolve and download.
+# With CODEGEN_ENV_CACHE_HARDLINK files are hard-linked out instead and made
+# read-only, since every project restored from an entry shares their inodes.
+
+ENTRIES_DIR = "envs"
+META_NAME = "meta.json"
+TREE_NAME = "tree"
+
+# ecosystem -> (manifest, directory the install produces)
+CACHED = {
+    "python": ("requirements.txt", ".venv"),
+    "node": ("package.json", "node_modules"),
+}
+
+_REQUIREMENT_NAME = re.compile(r"[A-Za-z0-9][A-Za-z0-9._-]*")
+
+# ioctl that clones a file's blocks copy-on-write (btrfs, XFS, ...)
+_FICLONE = 0x40049409 if fcntl is not None and sys.platform.startswith("linux") else None
+_WRITE_BITS = stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH
+
+
+def cache_dir():
+    return getattr(settings, 'CODEGEN_ENV_CACHE_DIR', None) or os.path.join(os.path.expanduser("~"), ".cache", "codegen")
+
+
+def enabled():
+    return getattr(settings, 'CODEGEN_ENV_CACHE_ENABLED', True)
+
+
+def tool_environment():
+    """Download caches shared by every project's pip and npm."""
+    root = cache_dir()
+    return {"PIP_CACHE_DIR": os.path.join(root, "pip"), "npm_config_cache": os.path.join(root, "npm")}
+
+
+def normalize_requirements(text):
+    """
+    Sorted, deduplicated requirement lines with canonical names and no
+    comments or whitespace. None when the file refers to other files or local
+    paths, whose contents the text does not capture.
+    """
+    lines = set()
+    for line in text.splitlines():
+        line = line.split(" #", 1)[0].strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith(("-r", "-c", "-e", "--requirement", "--constraint", "--editable")):
+            return None
+        if line.startswith("-"):
+            # Index and resolver options change what gets installed, so they are part of the key
+            lines.add(" ".join(line.split()))
+            continue
+        if line.startswith((".", "/", "~")) or "file:" in line:
+            return None
+        match = _REQUIREMENT_NAME.match(line)
+        if not match:
+            return None
+        name = re.sub(r"[-_.]+", "-", match.group(0)).lower()
+        lines.add(name + re.sub(r"\s+", "", line[match.end():]))
+    return "\n".join(sorted(lines))
+
+
+def normalize_package_json(text, lock_text=None):
+    """The dependency sections of package.json in canonical form, plus the lock file when there is one."""
+    try:
+        manifest = json.loads(text)
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(manifest, dict):
+        return None
+    sections = {
+        key: manifest.get(key) or {}
+        for key in ("dependencies", "devDependencies", "optionalDependencies", "overrides")
+    }
+    if any(str(spec).startswith(("file:", "link:", ".", "/")) for deps in sections.values()
+           if isinstance(deps, dict) for spec in deps.values()):
+        return None
+    normalized = json.dumps(sections, sort_keys=True, separators=(",", ":"))
+    if lock_text:
+        normalized += "\n" + hashlib.sha256(lock_text.encode("utf-8")).hexdigest()
+    return normalized
+
+
+def _read(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+    except (FileNotFoundError, UnicodeDecodeError):
+        return None
+
+
+def manifest_key(ecosystem, directory):
+    """Cache key of a directory's manifest, or None when it cannot be cached."""
+    if ecosystem not in CACHED:
+        return None
+    text = _read(os.path.join(directory, CACHED[ecosystem][0]))
+    if text is None:
+        return None
+
+    if ecosystem == "python":
+        normalized = normalize_requirements(text)
+        # A virtualenv only works with the interpreter that built it
+        platform = f"{sys.implementation.cache_tag}-{sysconfig.get_platform()}"
+    else:
+        normalized = normalize_package_json(text, _read(os.path.join(directory, "package-lock.json")))
+        platform = sysconfig.get_platform()
+    if normalized is None:
+        return None
+    digest = hashlib.sha256(f"{ecosystem}\n{platform}\n{normalized}".encode("utf-8")).hexdigest()
+    return f"{ecosystem}-{digest[:32]}"
+
+
+def _entry(key):
+    return os.path.join(cache_dir(), ENTRIES_DIR, key)
+
+
+def tree_size(path):
+    total = 0
+    for root, dirs, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except FileNotFoundError:
+                pass
+    return total
+
+
+def _copy(source, target):
+    """Copy a file, sharing its blocks copy-on-write where the filesystem can."""
+    if _FICLONE is not None:
+        try:
+            with open(source, "rb") as src, open(target, "wb") as dst:
+                fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+            shutil.copystat(source, target)
+            return
+        except OSError:
+            pass  # No reflink support here; copy2 below overwrites the partial file
+    shutil.copy2(source, target)
+
+
+def _link_or_copy(source, target, link):
+    if link:
+        try:
+            os.link(source, target)
+            # The inode is the cache entry's own: an in-place write must fail rather than change it for every project
+            os.chmod(target, stat.S_IMODE(os.stat(target).st_mode) & ~_WRITE_BITS)
+            return
+        except OSError as e:
+            # Another filesystem, or one without hard links
+            if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP):
+                raise
+    _copy(source, target)
+    # A project's copy is its own, even if the entry's file was made read-only by an earlier link
+    mode = stat.S_IMODE(os.stat(target).st_mode)
+    if not mode & stat.S_IWUSR:
+        os.chmod(target, mode | stat.S_IWUSR)
+
+
+def _rewrite_prefix(source, target, old_prefix, new_prefix):
+    """Copy a script whose shebang points into the environment it was built in, pointing it at the new one."""
+    with open(source, "rb") as f:
+        data = f.read()
+    with open(target, "wb") as f:
+        f.write(data.replace(old_prefix.encode("utf-8"), new_prefix.encode("utf-8")))
+    shutil.copymode(source, target)
+
+
+def _populate(tree, target, link, old_prefix=None):
+    """Recreate `tree` under `target`, leaving files that already exist there alone."""
+    for root, dirs, files in os.walk(tree):
+        relative = os.path.relpath(root, tree)
+        destination = os.path.normpath(os.path.join(target, relative))
+        os.makedirs(destination, exist_ok=True)
+        for name in dirs + files:
+            source = os.path.join(root, name)
+            path = os.path.join(destination, name)
+            if os.path.islink(source):
+                if not os.path.lexists(path):
+                    os.symlink(os.readlink(source), path)
+                continue
+            if name in dirs or os.path.lexists(path):
+                continue
+            if old_prefix and relative in ("bin", "Scripts") and _has_prefix(source, old_prefix):
+                _rewrite_prefix(source, path, old_prefix, target)
+            else:
+                _link_or_copy(source, path, link)
+        # Symlinked directories were recreated as links above; do not descend into them
+        dirs[:] = [d for d in dirs if not os.path.islink(os.path.join(root, d))]
+
+
+def _has_prefix(path, prefix):
+    with open(path, "rb") as f:
+        return prefix.encode("utf-8") in f.read(4096)
+
+
+def restore(ecosystem, directory, key, create_venv=None):
+    """
+    Build the directory's environment from the cache entry `key`. Returns
+    False on a miss. Python entries need `create_venv(path)` to lay down a
+    fresh interpreter before the packages are linked in.
+    """
+    entry = _entry(key)
+    meta_path = os.path.join(entry, META_NAME)
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return False
+
+    target = os.path.join(directory, CACHED[ecosystem][1])
+    link = getattr(settings, 'CODEGEN_ENV_CACHE_HARDLINK', False)
+    try:
+        if ecosystem == "python":
+            create_venv(target)
+        _populate(os.path.join(entry, TREE_NAME), target, link, meta.get("prefix"))
+    except OSError:
+        # The entry was evicted mid-restore; leave no half-built environment behind
+        shutil.rmtree(target, ignore_errors=True)
+        return False
+
+    # Last use drives LRU eviction
+    os.utime(meta_path)
+    return True
+
+
+def store(ecosystem, directory, key):
+    """Copy a freshly installed environment into the cache, then evict down to CODEGEN_ENV_CACHE_MAX_BYTES."""
+    entry = _entry(key)
+    if os.path.exists(entry):
+        return False
+    source = os.path.join(directory, CACHED[ecosystem][1])
+    if not os.path.isdir(source):
+        return False
+
+    entries = os.path.dirname(entry)
+    os.makedirs(entries, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=f".{key}-", dir=entries)
+    try:
+        # Copies, never links: a project editing its own environment must not change the cache
+        shutil.copytree(source, os.path.join(staging, TREE_NAME), symlinks=True)
+        meta = {
+            "ecosystem": ecosystem,
+            "size": tree_size(staging),
+            "prefix": source if ecosystem == "python" else None,
+            "created_at": time.time(),
+        }
+        with open(os.path.join(staging, META_NAME), "w") as f:
+            json.dump(meta, f)
+        os.rename(staging, entry)
+    except OSError:
+        # Another install stored the same key first, or the disk is full
+        shutil.rmtree(staging, ignore_errors=True)
+        return False
+
+    evict(getattr(settings, 'CODEGEN_ENV_CACHE_MAX_BYTES', 5 * 1024 ** 3))
+    return True
+
+
+def entries():
+    """(key, size, last used) of every complete cache entry."""
+    root = os.path.join(cache_dir(), ENTRIES_DIR)
+    found = []
+    try:
+        names = os.listdir(root)
+    except FileNotFoundError:
+        return found
+    for name in names:
+        # Skip entries still being stored or already being evicted
+        if name.startswith(".") or ".evicted-" in name:
+            continue
+        meta_path = os.path.join(root, name, META_NAME)
+        try:
+            with open(meta_path) as f:
+                size = json.load(f)["size"]
+            found.append((name, size, os.stat(meta_path).st_mtime))
+        except (OSError, ValueError, KeyError):
+            continue
+    return found
+
+
+def evict(max_bytes):
+    """Remove least recently used entries until the cache fits in max_bytes. Returns the keys removed."""
+    current = sorted(entries(), key=lambda e: e[2])
+    total = sum(size for _, size, _ in current)
+    removed = []
+    for key, size, _ in current:
+        if total <= max_bytes:
+            break
+        entry = _entry(key)
+        # Renamed first so a concurrent restore sees a miss rather than a half-deleted tree
+        doomed = f"{entry}.evicted-{uuid.uuid4().hex[:8]}"
+        try:
+            os.rename(entry, doomed)
+        except OSError:
+            continue
+        shutil.rmtree(doomed, ignore_errors=True)
+        total -= size
+        removed.append(key)
+    return removed
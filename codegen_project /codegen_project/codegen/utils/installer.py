@@ -0,0 +1,248 @@
+import asyncio
+import glob
+import os
+import signal
+import subprocess
+import sys
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from . import env_cache
+from .manifest import STATE_DIR
+
+LOG_NAME = "install.log"
+
+# Directories never searched for manifests
+SKIP_DIRS = {"node_modules", "vendor", "target", "build", "dist", "__pycache__"}
+
+# Environment of the server that must not leak into a project's tools
+_SERVER_ENV = ("PYTHONPATH", "PYTHONHOME", "VIRTUAL_ENV", "DJANGO_SETTINGS_MODULE", "OPENAI_API_KEY")
+
+
+def log_path(project_path):
+    return os.path.join(project_path, STATE_DIR, LOG_NAME)
+
+
+def _venv_python(venv):
+    if os.name == "nt":
+        return os.path.join(venv, "Scripts", "python.exe")
+    return os.path.join(venv, "bin", "python")
+
+
+def _python_steps(directory):
+    """Install requirements.txt into the directory's own .venv, never the server's environment."""
+    venv = os.path.join(directory, ".venv")
+    steps = []
+    if not os.path.exists(_venv_python(venv)):
+        steps.append([sys.executable, "-m", "venv", venv])
+    steps.append([_venv_python(venv), "-m", "pip", "install", "--disable-pip-version-check",
+                  "-r", "requirements.txt"])
+    return steps
+
+
+def _csharp_steps(directory):
+    projects = glob.glob(os.path.join(directory, "*.csproj")) + glob.glob(os.path.join(directory, "*.sln"))
+    return [["dotnet", "restore", os.path.basename(p)] for p in sorted(projects)[:1]]
+
+
+def _gradle_steps(directory):
+    if os.path.exists(os.path.join(directory, "gradlew")):
+        return [["sh", "gradlew", "--no-daemon", "build", "-x", "test"]]
+    return [["gradle", "--no-daemon", "build", "-x", "test"]]
+
+
+# (ecosystem, manifest file or glob, directory -> list of commands)
+# Each tool installs into the project: .venv, node_modules, vendor, target...
+ECOSYSTEMS = [
+    ("python", "requirements.txt", _python_steps),
+    ("node", "package.json", lambda d: [["npm", "install", "--no-audit", "--no-fund", "--prefer-offline"]]),
+    ("java", "pom.xml", lambda d: [["mvn", "-B", "install", "-DskipTests"]]),
+    ("php", "composer.json", lambda d: [["composer", "install", "--no-interaction"]]),
+    ("go", "go.mod", lambda d: [["go", "mod", "download"]]),
+    ("ruby", "Gemfile", lambda d: [["bundle", "install"]]),
+    ("rust", "Cargo.toml", lambda d: [["cargo", "fetch"]]),
+    ("csharp", "*.csproj", _csharp_steps),
+    ("kotlin", "build.gradle*", _gradle_steps),
+]
+
+
+def _has_manifest(directory, pattern):
+    if any(ch in pattern for ch in "*?["):
+        return bool(glob.glob(os.path.join(directory, pattern)))
+    return os.path.isfile(os.path.join(directory, pattern))
+
+
+def detect(project_path):
+    """
+    The installs a project needs: (ecosystem, directory, commands) for each
+    manifest in the project root or a top-level folder (e.g. backend/, frontend/).
+    """
+    directories = [project_path]
+    with os.scandir(project_path) as entries:
+        directories += sorted(
+            entry.path for entry in entries
+            if entry.is_dir(follow_symlinks=False) and not entry.name.startswith(".") and entry.name not in SKIP_DIRS
+        )
+
+    found = []
+    for directory in directories:
+        for ecosystem, pattern, steps in ECOSYSTEMS:
+            if _has_manifest(directory, pattern):
+                found.append((ecosystem, directory, steps(directory)))
+    return found
+
+
+def _environment(ecosystem):
+    env = {key: value for key, value in os.environ.items() if key not in _SERVER_ENV}
+    env.update({"CI": "1", "PIP_NO_INPUT": "1", "COMPOSER_NO_INTERACTION": "1"})
+    env.update(env_cache.tool_environment())
+    if ecosystem == "ruby":
+        # Gems go to the project's vendor/bundle instead of the system gem directory
+        env["BUNDLE_PATH"] = "vendor/bundle"
+    return env
+
+
+def _create_venv(path):
+    # pip comes from the cached site-packages along with everything else
+    subprocess.run([sys.executable, "-m", "venv", "--without-pip", path], check=True, capture_output=True)
+
+
+async def restore_cached(ecosystem, directory, key, log, tag):
+    """Rebuild a missing environment from the env cache. Returns True on a hit."""
+    if key is None or os.path.exists(os.path.join(directory, env_cache.CACHED[ecosystem][1])):
+        return False
+    try:
+        hit = await sync_to_async(env_cache.restore, thread_sensitive=False)(ecosystem, directory, key, _create_venv)
+    except subprocess.CalledProcessError as e:
+        log.write(tag, f"Could not create a virtualenv: {e.stderr.decode('utf-8', errors='replace').strip()}")
+        return False
+    if hit:
+        log.write(tag, f"Reused cached environment {key}")
+    return hit
+
+
+def max_concurrent():
+    """How many projects one job pool installs at once, so a burst of installs cannot starve the host or the other jobs."""
+    return getattr(settings, 'CODEGEN_INSTALL_CONCURRENCY', 2)
+
+
+class InstallLog:
+    """Appends tagged lines to the project's install log, flushed as they arrive so readers can tail it."""
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._file = open(path, "wb")
+
+    def write(self, tag, text):
+        if isinstance(text, str):
+            text = text.encode("utf-8")
+        self._file.write(b"[" + tag.encode("utf-8") + b"] " + text.rstrip(b"\r\n") + b"\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def _kill(process):
+    try:
+        if os.name == "posix":
+            # npm, mvn and friends spawn children; stop the whole group
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except ProcessLookupError:
+        pass
+
+
+async def run_command(command, cwd, env, log, tag, timeout):
+    """Run one command, streaming its output to the log. Returns the exit code, or None on timeout."""
+    log.write(tag, "$ " + " ".join(command))
+    process = await asyncio.create_subprocess_exec(
+        *command, cwd=cwd, env=env,
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT,
+        start_new_session=os.name == "posix",
+        limit=1024 * 1024  # progress bars can make very long lines
+    )
+
+    async def pump():
+        async for line in process.stdout:
+            log.write(tag, line)
+
+    try:
+        await asyncio.wait_for(asyncio.gather(pump(), process.wait()), timeout)
+    except asyncio.TimeoutError:
+        _kill(process)
+        await process.wait()
+        log.write(tag, f"Timed out after {timeout:.0f}s")
+        return None
+    except asyncio.CancelledError:
+        _kill(process)
+        raise
+    return process.returncode
+
+
+async def install_directory(ecosystem, directory, commands, project_path, log, timeout):
+    """Run an ecosystem's commands in order, stopping at the first failure."""
+    tag = ecosystem if directory == project_path else f"{ecosystem}:{os.path.relpath(directory, project_path)}"
+    env = _environment(ecosystem)
+    started = time.perf_counter()
+    status = "ok"
+    key = env_cache.manifest_key(ecosystem, directory) if env_cache.enabled() else None
+    cached = await restore_cached(ecosystem, directory, key, log, tag)
+    for command in ([] if cached else commands):
+        try:
+            code = await run_command(command, directory, env, log, tag, timeout)
+        except FileNotFoundError:
+            log.write(tag, f"{command[0]} is not installed on this server")
+            status = "missing_tool"
+            break
+        if code is None:
+            status = "timeout"
+            break
+        if code != 0:
+            log.write(tag, f"Exited with status {code}")
+            status = "failed"
+            break
+
+    if status == "ok" and key and not cached:
+        if await sync_to_async(env_cache.store, thread_sensitive=False)(ecosystem, directory, key):
+            log.write(tag, f"Stored environment as {key} for reuse")
+
+    log.write(tag, f"Finished: {status}")
+    return {
+        "ecosystem": ecosystem,
+        "directory": os.path.relpath(directory, project_path),
+        "status": status,
+        "cached": cached,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+async def install_project(project_path):
+    """
+    Install every detected dependency manifest of a project into the
+    project itself, the ecosystems in parallel, logging to
+    .codegen/install.log. At most CODEGEN_INSTALL_CONCURRENCY projects
+    install at once (see max_concurrent()); each command is bounded by
+    CODEGEN_INSTALL_TIMEOUT.
+    Returns the per-directory step results.
+    """
+    # Truncate the previous install's log first, so readers never mix the two
+    log = InstallLog(log_path(project_path))
+    try:
+        found = await sync_to_async(detect, thread_sensitive=False)(project_path)
+        if not found:
+            log.write("install", "No dependency manifests found")
+            return []
+
+        timeout = getattr(settings, 'CODEGEN_INSTALL_TIMEOUT', 15 * 60)
+        return list(await asyncio.gather(*[
+            install_directory(ecosystem, directory, commands, project_path, log, timeout)
+            for ecosystem, directory, commands in found
+        ]))
+    finally:
+        log.close()
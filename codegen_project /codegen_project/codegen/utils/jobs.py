@@ -0,0 +1,185 @@
+import os
+import socket
+import threading
+import traceback
+from collections import Counter
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from ..models import Job, ProjectHistory
+from . import admission, metrics
+
+# kind -> async handler(payload) returning (response_body, status)
+_handlers = {}
+# kind -> callable returning how many jobs of that kind one pool runs at once
+_limits = {}
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def job_handler(kind, limit=None):
+    """
+    Register an async `payload -> (response_body, status)` handler for a job
+    kind. `limit`, a callable read at claim time, caps how many jobs of the
+    kind a pool runs at once; the rest stay queued and leave the workers free
+    for other kinds.
+    """
+    def decorator(func):
+        _handlers[kind] = func
+        if limit is not None:
+            _limits[kind] = limit
+        return func
+    return decorator
+
+
+def summarize_result(body):
+    """Job results keep the response body minus file contents, which live in the file store."""
+    result = {key: value for key, value in body.items() if key != 'files'}
+    if isinstance(body.get('files'), list):
+        result['filenames'] = [f.get('filename') for f in body['files'] if isinstance(f, dict)]
+    return result
+
+
+class WorkerPool:
+    """
+    A fixed number of threads that claim queued Job rows and run their handlers.
+
+    Claiming is a conditional UPDATE on the row, so several processes on the
+    same host (e.g. multiple server workers) can share one queue without a
+    broker; each job runs exactly once.
+    """
+
+    def __init__(self, size, poll_interval):
+        self.size = size
+        self.poll_interval = poll_interval
+        self.pid = os.getpid()
+        self.name = f"{socket.gethostname()}:{self.pid}"
+        self._wake = threading.Event()
+        self._threads = []
+        self._claim_lock = threading.Lock()
+        self._running = Counter()  # limited kind -> jobs of it running in this pool
+
+    def start(self):
+        self._fail_stale_jobs()
+        for i in range(self.size):
+            thread = threading.Thread(target=self._run, name=f"codegen-job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def notify(self):
+        self._wake.set()
+
+    def _fail_stale_jobs(self):
+        stale_after = getattr(settings, 'CODEGEN_JOB_STALE_AFTER', 30 * 60)
+        now = timezone.now()
+        Job.objects.filter(state=Job.RUNNING, started_at__lt=now - timedelta(seconds=stale_after)).update(
+            state=Job.FAILED, error="Worker stopped before the job finished", finished_at=now
+        )
+
+    def _claim(self, worker):
+        with self._claim_lock:
+            full = [kind for kind, limit in _limits.items() if self._running[kind] >= limit()]
+            queued = Job.objects.filter(state=Job.QUEUED).exclude(kind__in=full)
+            for job_id in queued.order_by('created_at').values_list('id', flat=True)[:self.size]:
+                claimed = Job.objects.filter(id=job_id, state=Job.QUEUED).update(
+                    state=Job.RUNNING, started_at=timezone.now(), worker=worker
+                )
+                if claimed:
+                    job = Job.objects.get(id=job_id)
+                    if job.kind in _limits:
+                        self._running[job.kind] += 1
+                    return job
+        return None
+
+    def _finished(self, job):
+        if job.kind in _limits:
+            with self._claim_lock:
+                self._running[job.kind] -= 1
+            # A job of this kind may have stayed queued only because of the limit
+            self._wake.set()
+
+    def _run(self):
+        worker = f"{self.name}:{threading.current_thread().name}"
+        while True:
+            try:
+                close_old_connections()
+                job = self._claim(worker)
+                if job is None:
+                    self._wake.wait(self.poll_interval)
+                    self._wake.clear()
+                    continue
+                try:
+                    run_job(job)
+                finally:
+                    self._finished(job)
+            except Exception:
+                traceback.print_exc()
+                self._wake.wait(self.poll_interval)
+
+
+def run_job(job):
+    """Run a claimed job's handler and record the outcome on the row."""
+    handler = _handlers.get(job.kind)
+    try:
+        if handler is None:
+            raise ValueError(f"No handler registered for job kind '{job.kind}'")
+
+        # Nobody is waiting on the HTTP response, so a job queues for LLM admission longer than a request would
+        with metrics.track(f"job_{job.kind}"), \
+                admission.max_wait(getattr(settings, 'CODEGEN_ADMISSION_JOB_MAX_WAIT', 5 * 60)):
+            body, status = async_to_sync(handler)(job.payload)
+        job.result = summarize_result(body)
+        if status < 400:
+            job.state = Job.SUCCEEDED
+        else:
+            job.state = Job.FAILED
+            job.error = str(body.get('error', f"Handler returned status {status}"))
+
+        project_id = body.get('project_id')
+        if project_id and ProjectHistory.objects.filter(id=project_id).exists():
+            job.project_id = project_id
+    except Exception as e:
+        traceback.print_exc()
+        job.state = Job.FAILED
+        job.error = str(e)
+
+    job.finished_at = timezone.now()
+    job.save()
+
+
+def get_pool():
+    """Start this process's worker pool on first use (and again after a fork)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool.pid != os.getpid():
+            _pool = WorkerPool(
+                size=getattr(settings, 'CODEGEN_JOB_WORKERS', 4),
+                poll_interval=getattr(settings, 'CODEGEN_JOB_POLL_INTERVAL', 1.0)
+            )
+            _pool.start()
+        return _pool
+
+
+def start_with_server():
+    """
+    Called from the ASGI/WSGI entry points once the application is loaded, so
+    jobs queued before a restart run without waiting for a new enqueue or poll.
+    """
+    if not getattr(settings, 'CODEGEN_JOB_START_WITH_SERVER', True):
+        return
+    from .. import views  # noqa: F401 registers the job handlers
+    get_pool()
+
+
+def enqueue(kind, payload, project_id=None):
+    """Queue a job and wake a worker. Returns the Job row."""
+    if kind not in _handlers:
+        raise ValueError(f"No handler registered for job kind '{kind}'")
+    job = Job.objects.create(kind=kind, payload=payload, project_id=project_id)
+    get_pool().notify()
+    return job
@@ -0,0 +1,278 @@
+import json
+import re
+from collections import Counter
+
+# Characters that change parser state outside / inside a JSON string
+_STRUCTURAL = re.compile(r'[\[\]{}"]')
+_STRING_REST = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+
+# One left-to-right pass over a string body: keep valid escapes, double stray
+# backslashes and escape bare quotes
+_STRING_BODY = re.compile(r'\\(u[0-9a-fA-F]{4}|["\\/bfnrt])|\\|"')
+
+_FILENAME_KEY = re.compile(r'"filename"\s*:\s*"((?:[^"\\\n]|\\.)*)"')
+_CONTENT_KEY = re.compile(r'"content"\s*:\s*"')
+_OBJECT_TAIL = re.compile(r'"\s*(?:\}\s*(?:,\s*\{?|\]\s*\}?)?)?\s*(?:```\s*)?$')
+_FENCE = re.compile(r'^\s*```[\w-]*\s*|\s*```\s*$')
+
+# Recovery paths, least to most invasive
+RECOVERY_PATHS = ("json", "repaired", "fields", "truncated", "fallback")
+
+
+class FileStreamParser:
+    """
+    Single-pass, resumable parser for the {"filename", "content"} arrays the model returns
+    (or {"filename", "edits"} items in diff mode).
+
+    Text can be fed in arbitrary chunks (a token stream) or all at once; every
+    object that is an element of an array is returned by feed() as soon as its
+    closing brace arrives, so both `[{...}, ...]` and `{"files": [{...}]}` are
+    handled incrementally. Anything outside the array (prose, code fences) is
+    skipped without being re-scanned.
+
+    Objects that fail to parse are repaired (stray escapes, bare quotes,
+    trailing commas) and, failing that, salvaged field by field. close()
+    salvages an object cut off by a truncated response. The recovery path used
+    is available as `recovery`.
+    """
+
+    def __init__(self):
+        self.stack = []
+        self.in_string = False
+        self.escaped = False
+        self.capture_depth = 0
+        self.current = []
+        self.chunks = []
+        self.recoveries = Counter()
+        self.emitted = 0
+
+    @property
+    def recovery(self):
+        """The most invasive recovery path any emitted file needed, or 'fallback' if none parsed."""
+        used = [path for path in RECOVERY_PATHS if self.recoveries[path]]
+        return used[-1] if used else "fallback"
+
+    def feed(self, chunk):
+        """Consume a chunk of text and return the file objects it completed."""
+        self.chunks.append(chunk)
+        completed = []
+        capture_from = 0 if self.capture_depth else None
+        pos = 0
+        end = len(chunk)
+
+        while pos < end:
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                    pos += 1
+                    continue
+                match = _STRING_REST.match(chunk, pos)
+                if not match:
+                    # The string runs past this chunk; remember a pending escape
+                    tail = chunk[pos:]
+                    self.escaped = bool((len(tail) - len(tail.rstrip('\\'))) % 2)
+                    break
+                pos = match.end()
+                self.in_string = False
+                continue
+
+            match = _STRUCTURAL.search(chunk, pos)
+            if not match:
+                break
+            char = match.group()
+            pos = match.end()
+
+            if char == '"':
+                # Quotes only matter inside a JSON container; prose quotes are ignored
+                if self.stack:
+                    self.in_string = True
+            elif char in '[{':
+                if char == '{' and not self.capture_depth and self.stack and self.stack[-1] == '[':
+                    self.capture_depth = len(self.stack) + 1
+                    self.current = []
+                    capture_from = match.start()
+                self.stack.append(char)
+            elif self.stack:
+                self.stack.pop()
+                if self.capture_depth and len(self.stack) < self.capture_depth:
+                    text = "".join(self.current) + chunk[capture_from:pos]
+                    self.capture_depth = 0
+                    self.current = []
+                    capture_from = None
+                    completed.extend(self._load(text))
+
+        if self.capture_depth and capture_from is not None:
+            self.current.append(chunk[capture_from:])
+        self.emitted += len(completed)
+        return completed
+
+    def close(self):
+        """Flush the parser at end of input and return any files that could still be recovered."""
+        completed = []
+        if self.capture_depth:
+            completed = self._salvage("".join(self.current), "truncated")
+            self.capture_depth = 0
+            self.current = []
+
+        if not self.emitted and not completed:
+            text = "".join(self.chunks)
+            completed = self._load_whole(text) or self._salvage(text, "fields")
+
+        self.emitted += len(completed)
+        return completed
+
+    def _load(self, text):
+        try:
+            obj = json.loads(text, strict=False)
+            path = "json"
+        except json.JSONDecodeError:
+            try:
+                obj = json.loads(repair_json(text), strict=False)
+                path = "repaired"
+            except json.JSONDecodeError:
+                return self._salvage(text, "fields")
+
+        files = _as_files(obj)
+        self.recoveries[path] += len(files)
+        return files
+
+    def _load_whole(self, text):
+        """Handle responses with no array at all, e.g. a single bare file object."""
+        try:
+            obj = json.loads(_FENCE.sub("", text), strict=False)
+        except json.JSONDecodeError:
+            return []
+        files = _as_files(obj)
+        self.recoveries["json"] += len(files)
+        return files
+
+    def _salvage(self, text, path):
+        """Pull filename/content pairs out of text that is not valid JSON."""
+        files = []
+        keys = list(_FILENAME_KEY.finditer(text))
+        for i, key in enumerate(keys):
+            last = i == len(keys) - 1
+            segment_end = len(text) if last else keys[i + 1].start()
+            content_key = _CONTENT_KEY.search(text, key.end(), segment_end)
+            if not content_key:
+                continue
+
+            raw = text[content_key.end():segment_end]
+            if path == "truncated" and last:
+                # Drop a dangling backslash left by a cut-off escape sequence
+                if (len(raw) - len(raw.rstrip('\\'))) % 2:
+                    raw = raw[:-1]
+            else:
+                tail = _OBJECT_TAIL.search(raw[-256:])
+                if tail:
+                    raw = raw[:len(raw) - len(tail.group())]
+                else:
+                    # Trailing prose after the array: cut at the last closing brace
+                    close = raw.rfind('}')
+                    if close != -1 and raw[:close].rstrip().endswith('"'):
+                        raw = raw[:close].rstrip()[:-1]
+
+            files.append({"filename": decode_string(key.group(1)), "content": decode_string(raw)})
+
+        self.recoveries[path] += len(files)
+        return files
+
+
+def _as_files(obj):
+    if isinstance(obj, list):
+        return [f for item in obj for f in _as_files(item)]
+    if not isinstance(obj, dict):
+        return []
+    if isinstance(obj.get('files'), list):
+        return _as_files(obj['files'])
+    if 'filename' not in obj:
+        return []
+    if 'content' not in obj:
+        # Diff-mode continuations return {"filename", "edits": [...]} for existing files
+        return [obj] if isinstance(obj.get('edits'), list) else []
+
+    content = obj['content']
+    if isinstance(content, (dict, list)):
+        # Manifests such as package.json sometimes come back as JSON values
+        obj['content'] = json.dumps(content, indent=2)
+    elif not isinstance(content, str):
+        obj['content'] = str(content)
+    return [obj]
+
+
+def _fix_string_body(match):
+    if match.group(1):
+        return match.group(0)
+    return '\\\\' if match.group(0) == '\\' else '\\"'
+
+
+def decode_string(raw):
+    """Decode the body of a JSON string, tolerating stray backslashes and bare quotes."""
+    try:
+        return json.loads(f'"{raw}"', strict=False)
+    except json.JSONDecodeError:
+        pass
+    try:
+        return json.loads(f'"{_STRING_BODY.sub(_fix_string_body, raw)}"', strict=False)
+    except json.JSONDecodeError:
+        return raw
+
+
+def repair_json(text):
+    """
+    Fix the damage models typically do to a JSON object in one pass: invalid
+    escape sequences, unescaped quotes inside strings and trailing commas.
+    """
+    out = []
+    in_string = False
+    i = 0
+    end = len(text)
+
+    while i < end:
+        char = text[i]
+        if in_string:
+            if char == '\\':
+                nxt = text[i + 1] if i + 1 < end else ''
+                if nxt and nxt in '"\\/bfnrt':
+                    out.append(text[i:i + 2])
+                    i += 2
+                    continue
+                if nxt == 'u' and re.match(r'[0-9a-fA-F]{4}', text[i + 2:i + 6]):
+                    out.append(text[i:i + 6])
+                    i += 6
+                    continue
+                out.append('\\\\')
+            elif char == '"':
+                # A quote that does not end the value is taken to be part of it
+                j = i + 1
+                while j < end and text[j] in ' \t\r\n':
+                    j += 1
+                if j >= end or text[j] in ',:}]':
+                    in_string = False
+                    out.append(char)
+                else:
+                    out.append('\\"')
+            else:
+                out.append(char)
+        else:
+            if char == '"':
+                in_string = True
+            elif char == ',':
+                j = i + 1
+                while j < end and text[j] in ' \t\r\n':
+                    j += 1
+                if j < end and text[j] in '}]':
+                    i += 1
+                    continue
+            out.append(char)
+        i += 1
+
+    return "".join(out)
+
+
+def parse_file_array(text):
+    """Parse a complete model response. Returns (files, recovery_path)."""
+    parser = FileStreamParser()
+    files = parser.feed(text)
+    files.extend(parser.close())
+    return files, parser.recovery
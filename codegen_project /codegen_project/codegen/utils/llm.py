@@ -0,0 +1,195 @@
+import asyncio
+import os
+import threading
+import time
+import weakref
+
+import httpx
+import openai
+from django.conf import settings
+from dotenv import load_dotenv
+
+from . import admission, llm_cache, metrics
+from .context_builder import estimate_tokens
+
+load_dotenv()
+# Fetch the OpenAI API key
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+
+DEFAULT_MODEL = "gpt-4"
+
+
+def build_client():
+    """An AsyncOpenAI client with the connection pool, timeouts and endpoint from settings."""
+    timeout = httpx.Timeout(
+        getattr(settings, 'CODEGEN_LLM_TIMEOUT', 300.0),
+        connect=getattr(settings, 'CODEGEN_LLM_CONNECT_TIMEOUT', 10.0)
+    )
+    limits = httpx.Limits(
+        max_connections=getattr(settings, 'CODEGEN_LLM_MAX_CONNECTIONS', 20),
+        max_keepalive_connections=getattr(settings, 'CODEGEN_LLM_MAX_KEEPALIVE_CONNECTIONS', 10),
+        keepalive_expiry=getattr(settings, 'CODEGEN_LLM_KEEPALIVE_EXPIRY', 60.0)
+    )
+    return openai.AsyncOpenAI(
+        api_key=OPENAI_API_KEY,
+        # None falls back to OPENAI_BASE_URL, then the public API
+        base_url=getattr(settings, 'CODEGEN_LLM_BASE_URL', None) or None,
+        timeout=timeout,
+        max_retries=getattr(settings, 'CODEGEN_LLM_MAX_RETRIES', 2),
+        http_client=openai.DefaultAsyncHttpxClient(limits=limits, timeout=timeout)
+    )
+
+
+class ClientManager:
+    """
+    Process-wide AsyncOpenAI clients, so calls reuse kept-alive connections
+    instead of paying a new TLS handshake each time.
+
+    An async HTTP pool belongs to the event loop that opened its connections,
+    so there is one client per running loop: a single shared client under an
+    ASGI server, one per loop for code run through async_to_sync. Clients of
+    loops that have been garbage collected go with them. After a fork the
+    child starts with no clients, since sockets inherited from the parent
+    must not be shared.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients = weakref.WeakKeyDictionary()
+        self._pid = os.getpid()
+
+    def reset(self):
+        with self._lock:
+            self._clients = weakref.WeakKeyDictionary()
+            self._pid = os.getpid()
+
+    def get(self):
+        """The client for the running event loop."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._pid != os.getpid():
+                self._clients = weakref.WeakKeyDictionary()
+                self._pid = os.getpid()
+            client = self._clients.get(loop)
+            if client is None:
+                client = self._clients[loop] = build_client()
+            return client
+
+    async def aclose(self):
+        """Close the running loop's client, e.g. at server shutdown or after changing settings."""
+        with self._lock:
+            client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.close()
+
+
+clients = ClientManager()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=clients.reset)
+
+
+def estimated_call_tokens(messages):
+    """Prompt tokens plus the completion size we budget for, charged before the call is made."""
+    prompt = sum(estimate_tokens(str(m.get("content") or "")) for m in messages)
+    return prompt + getattr(settings, 'CODEGEN_ADMISSION_COMPLETION_TOKENS', 2000)
+
+
+def rate_limited(error):
+    """The provider's own 429, surfaced like an admission rejection instead of a server error."""
+    retry_after = 5
+    response = getattr(error, "response", None)
+    if response is not None:
+        try:
+            retry_after = float(response.headers.get("retry-after", retry_after))
+        except (TypeError, ValueError):
+            pass
+    return admission.AdmissionRejected("The model provider is rate limiting requests; please retry shortly.", retry_after)
+
+
+async def chat_completion(messages, model=DEFAULT_MODEL, use_cache=True, user_id=None):
+    """
+    Run a chat completion without blocking the event loop and return the
+    message text. Cache misses wait for admission (see admission.py) as
+    user_id, an admission.client_key(); a rejection or the provider's own 429 raises AdmissionRejected.
+    """
+    use_cache = use_cache and llm_cache.cache_enabled()
+    if use_cache:
+        with metrics.stage("llm_cache_lookup"):
+            cached = await llm_cache.get_cached(messages, model)
+        if cached is not None:
+            return cached
+
+    with metrics.stage("admission_wait"):
+        permit = await admission.admit(estimated_call_tokens(messages), user_id)
+    usage = None
+    try:
+        with metrics.stage("llm_call"):
+            response = await clients.get().chat.completions.create(
+                model=model,
+                messages=messages
+            )
+        usage = getattr(response.usage, "total_tokens", None)
+    except openai.RateLimitError as e:
+        raise rate_limited(e) from e
+    finally:
+        await permit.release(usage)
+    content = response.choices[0].message.content
+    metrics.record_tokens(response.usage, model)
+    metrics.record_response(content or "")
+
+    if use_cache and content:
+        await llm_cache.store(messages, model, content)
+    return content
+
+
+async def stream_chat_completion(messages, model=DEFAULT_MODEL, use_cache=True, user_id=None):
+    """Stream a chat completion, yielding the text deltas as they arrive."""
+    use_cache = use_cache and llm_cache.cache_enabled()
+    if use_cache:
+        with metrics.stage("llm_cache_lookup"):
+            cached = await llm_cache.get_cached(messages, model)
+        if cached is not None:
+            yield cached
+            return
+
+    # The slot is held until the stream ends, since that is how long the provider works on it
+    with metrics.stage("admission_wait"):
+        permit = await admission.admit(estimated_call_tokens(messages), user_id)
+    chunks = []
+    started = time.perf_counter()
+    first_token = None
+    usage = None
+    try:
+        try:
+            stream = await clients.get().chat.completions.create(
+                model=model,
+                messages=messages,
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+        except openai.RateLimitError as e:
+            raise rate_limited(e) from e
+        try:
+            async for chunk in stream:
+                # The last chunk carries only the token usage
+                if getattr(chunk, "usage", None):
+                    metrics.record_tokens(chunk.usage, model)
+                    usage = getattr(chunk.usage, "total_tokens", None)
+                if chunk.choices and chunk.choices[0].delta.content:
+                    if first_token is None:
+                        first_token = time.perf_counter() - started
+                    chunks.append(chunk.choices[0].delta.content)
+                    yield chunk.choices[0].delta.content
+        finally:
+            # Hand the connection back to the pool even if the consumer stopped early
+            await stream.close()
+    finally:
+        await permit.release(usage)
+
+    # Includes the time the consumer spent between chunks, which streaming overlaps with the call
+    metrics.observe_stage("llm_call", time.perf_counter() - started)
+    metrics.record_response("".join(chunks), first_token_seconds=first_token)
+
+    if use_cache and chunks:
+        await llm_cache.store(messages, model, "".join(chunks))
@@ -0,0 +1,99 @@
+import hashlib
+import json
+import threading
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from ..models import LLMCacheEntry
+
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+
+def cache_enabled():
+    return getattr(settings, 'CODEGEN_LLM_CACHE_ENABLED', True)
+
+
+def _count(name, amount=1):
+    with _stats_lock:
+        _stats[name] += amount
+
+
+def cache_stats():
+    """Hit/miss/store/eviction counters for this process."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def _normalize(text):
+    # Only trailing whitespace is dropped: indentation inside embedded code and
+    # user requests is meaningful, so two prompts differing in it must not share a key
+    return "\n".join(line.rstrip() for line in text.splitlines()).strip("\n")
+
+
+def cache_key(messages, model):
+    """Hash of the model and the fully formatted messages, ignoring trailing whitespace."""
+    payload = json.dumps(
+        {"model": model, "messages": [{"role": m["role"], "content": _normalize(m["content"])} for m in messages]},
+        sort_keys=True
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _lookup(key):
+    ttl = getattr(settings, 'CODEGEN_LLM_CACHE_TTL', 7 * 24 * 60 * 60)
+    entry = LLMCacheEntry.objects.filter(key=key).first()
+    if entry is None:
+        return None
+    if entry.created_at < timezone.now() - timedelta(seconds=ttl):
+        entry.delete()
+        return None
+
+    # Bump recency for LRU eviction
+    LLMCacheEntry.objects.filter(key=key).update(hit_count=F('hit_count') + 1, last_used_at=timezone.now())
+    return entry.response
+
+
+def _store(key, model, response):
+    size = len(response.encode('utf-8'))
+    LLMCacheEntry.objects.update_or_create(
+        key=key,
+        defaults={"model": model, "response": response, "size": size, "created_at": timezone.now()}
+    )
+    return _evict()
+
+
+def _evict():
+    """Drop least recently used entries until the cache fits CODEGEN_LLM_CACHE_MAX_BYTES."""
+    max_bytes = getattr(settings, 'CODEGEN_LLM_CACHE_MAX_BYTES', 200 * 1024 * 1024)
+    total = LLMCacheEntry.objects.aggregate(total=Sum('size'))['total'] or 0
+    evicted = 0
+    if total <= max_bytes:
+        return evicted
+
+    for key, size in LLMCacheEntry.objects.order_by('last_used_at').values_list('key', 'size').iterator():
+        if total <= max_bytes:
+            break
+        LLMCacheEntry.objects.filter(key=key).delete()
+        total -= size
+        evicted += 1
+    return evicted
+
+
+async def get_cached(messages, model):
+    """Return the cached response for these messages, or None on a miss."""
+    response = await sync_to_async(_lookup)(cache_key(messages, model))
+    _count("hits" if response is not None else "misses")
+    return response
+
+
+async def store(messages, model, response):
+    """Cache a completion and evict old entries if the cache is over its size budget."""
+    evicted = await sync_to_async(_store)(cache_key(messages, model), model, response)
+    _count("stores")
+    if evicted:
+        _count("evictions", evicted)
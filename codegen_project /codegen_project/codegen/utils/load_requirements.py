@@ -1,16 +1,5 @@
-import json
 from pathlib import Path
 
-def load_security_checks():
-    """Load security checks from a JSON file."""
-    security_file = Path(__file__).resolve().parent.parent / "security_checks.json"
-    
-    if not security_file.exists():
-        return {"security": ["Default security rules"], "error_classes": ["ValueError", "KeyError"]}
-
-    with open(security_file, "r", encoding="utf-8") as f:
-        return json.load(f)
-
 def get_save_base_path(user_location):
     system_folders = ["Desktop", "Documents", "Downloads"]
 
@@ -0,0 +1,164 @@
+import hashlib
+import json
+import os
+import posixpath
+import tempfile
+import threading
+from contextlib import contextmanager
+
+# Per-project state (this manifest, the install log) lives in this folder of the project
+STATE_DIR = ".codegen"
+MANIFEST_NAME = "manifest.json"
+STAGING_PREFIX = '.codegen-staging-'
+
+# Environments, caches and VCS data are not project files
+IGNORED_DIRS = {STATE_DIR, ".git", ".venv", "venv", "node_modules", "__pycache__"}
+
+VERSION = 1
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def relative_path(filename):
+    """The manifest key of a project file: a normalized path relative to the project root."""
+    return posixpath.normpath(str(filename).replace("\\", "/")).lstrip("/")
+
+
+def file_hash(path):
+    """SHA-256 of a file's bytes; the same digest the file store keys blobs by."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def scan(root, previous=None):
+    """
+    Walk a project once with os.scandir and return {path: [size, mtime_ns, sha256]}.
+    Files whose size and mtime match `previous` keep their recorded hash
+    instead of being read again.
+    """
+    previous = previous or {}
+    files = {}
+    stack = [("", root)]
+    while stack:
+        prefix, directory = stack.pop()
+        try:
+            entries = os.scandir(directory)
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                path = prefix + entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in IGNORED_DIRS and not entry.name.startswith(STAGING_PREFIX):
+                        stack.append((path + "/", entry.path))
+                elif entry.is_file(follow_symlinks=False):
+                    try:
+                        st = entry.stat(follow_symlinks=False)
+                        known = previous.get(path)
+                        if known and known[0] == st.st_size and known[1] == st.st_mtime_ns:
+                            digest = known[2]
+                        else:
+                            digest = file_hash(entry.path)
+                    except OSError:
+                        # Removed while we were walking
+                        continue
+                    files[path] = [st.st_size, st.st_mtime_ns, digest]
+    return files
+
+
+@contextmanager
+def locked(root):
+    """Serialize read-modify-write updates of one project's manifest within this process."""
+    root = os.path.abspath(str(root))
+    with _locks_guard:
+        lock = _locks.setdefault(root, threading.Lock())
+    with lock:
+        yield
+
+
+class ProjectManifest:
+    """
+    Path -> (size, mtime, content hash) of every file of a project folder,
+    kept in <project>/.codegen/manifest.json. Answers "does this file exist"
+    and "what changed" without touching the files themselves.
+    """
+
+    def __init__(self, root, files=None):
+        self.root = os.path.abspath(str(root))
+        self.files = files if files is not None else {}
+
+    @property
+    def path(self):
+        return os.path.join(self.root, STATE_DIR, MANIFEST_NAME)
+
+    @classmethod
+    def load(cls, root):
+        """The saved manifest, or None if there is none (or it is unreadable)."""
+        manifest = cls(root)
+        try:
+            with open(manifest.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(data, dict) or data.get("version") != VERSION or not isinstance(data.get("files"), dict):
+            return None
+        manifest.files = data["files"]
+        return manifest
+
+    @classmethod
+    def refresh(cls, root):
+        """Re-walk the project, re-hashing only files whose size or mtime changed, and save the result."""
+        saved = cls.load(root)
+        manifest = cls(root, scan(os.path.abspath(str(root)), saved.files if saved else None))
+        if saved is None or saved.files != manifest.files:
+            manifest.save()
+        return manifest
+
+    @classmethod
+    def current(cls, root):
+        """The saved manifest, building it with one walk the first time. It misses changes made outside the generator; see refresh()."""
+        return cls.load(root) or cls.refresh(root)
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=".manifest-", dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"version": VERSION, "files": self.files}, f, separators=(",", ":"))
+            os.replace(tmp, self.path)
+        except BaseException:
+            os.remove(tmp)
+            raise
+
+    def exists(self, filename):
+        return relative_path(filename) in self.files
+
+    def entry(self, filename):
+        return self.files.get(relative_path(filename))
+
+    def matches(self, filename, st):
+        """True if the recorded entry still describes the file with this stat result."""
+        known = self.entry(filename)
+        return bool(known) and known[0] == st.st_size and known[1] == st.st_mtime_ns
+
+    def record(self, filename, digest):
+        """Note a file that was just written (stats it for the size and mtime)."""
+        st = os.stat(os.path.join(self.root, relative_path(filename)))
+        self.files[relative_path(filename)] = [st.st_size, st.st_mtime_ns, digest]
+
+    def diff(self, expected):
+        """
+        Compare against {path: sha256} (e.g. the stored project files). Returns
+        the paths that differ on disk, are missing from it, or exist only on it.
+        """
+        expected = {relative_path(path): digest for path, digest in expected.items()}
+        return {
+            "modified": sorted(p for p, d in expected.items() if p in self.files and self.files[p][2] != d),
+            "missing": sorted(p for p in expected if p not in self.files),
+            "added": sorted(p for p in self.files if p not in expected),
+        }
@@ -0,0 +1,298 @@
+import ast
+import json
+import posixpath
+import re
+
+# Structural merging of a generated module's copy of a shared file into the
+# project's copy. Only what the existing file lacks is inserted: imports,
+# top-level functions, classes and statements, new elements of top-level lists
+# (urlpatterns, INSTALLED_APPS...) and new keys of JSON manifests. Each side is
+# parsed once and compared through sets, so a merge is linear in the size of
+# the two files, and merging the same content twice changes nothing.
+
+_DEFINITIONS = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+_REQUIREMENT_NAME = re.compile(r"[A-Za-z0-9][A-Za-z0-9._-]*")
+
+
+def append_text(existing, new):
+    """The original behaviour for files we cannot parse: append new unless it is already there."""
+    if new.strip() in existing:
+        return existing
+    return existing + "\n\n" + new
+
+
+def _import_keys(node):
+    if isinstance(node, ast.Import):
+        return [(("import", None, None, alias.name, alias.asname), alias) for alias in node.names]
+    return [(("from", node.level, node.module, alias.name, alias.asname), alias) for alias in node.names]
+
+
+def _is_future(node):
+    return isinstance(node, ast.ImportFrom) and node.module == "__future__"
+
+
+def _is_main_guard(node):
+    return isinstance(node, ast.If) and "__name__" in ast.dump(node.test) and "__main__" in ast.dump(node.test)
+
+
+def _assigned_names(node):
+    if isinstance(node, ast.Assign):
+        targets = node.targets
+    elif isinstance(node, (ast.AnnAssign, ast.AugAssign)):
+        targets = [node.target]
+    else:
+        return []
+    return [t.id for t in targets if isinstance(t, ast.Name)]
+
+
+def _list_assignment(node):
+    """(name, list node) for `name = [...]`, `name += [...]` or `name: T = [...]`, else None."""
+    names = _assigned_names(node)
+    if len(names) != 1 or not isinstance(getattr(node, "value", None), ast.List):
+        return None
+    if isinstance(node, ast.AugAssign) and not isinstance(node.op, ast.Add):
+        return None
+    return names[0], node.value
+
+
+class _Source:
+    """A file's UTF-8 bytes with line offsets, since ast columns count bytes."""
+
+    def __init__(self, text):
+        self.data = text.encode("utf-8")
+        self.starts = [0] + [match.end() for match in re.finditer(b"\n", self.data)]
+
+    def offset(self, lineno, col):
+        return self.starts[lineno - 1] + col
+
+    def segment(self, node):
+        return self.data[self.offset(node.lineno, node.col_offset):self.offset(node.end_lineno, node.end_col_offset)]
+
+    def statement(self, node):
+        """A top-level statement's full lines, decorators included."""
+        first = min([node.lineno] + [d.lineno for d in getattr(node, "decorator_list", [])])
+        return self.data[self.starts[first - 1]:self.offset(node.end_lineno, node.end_col_offset)]
+
+    def line_end(self, lineno):
+        return self.starts[lineno] - 1 if lineno < len(self.starts) else len(self.data)
+
+
+def _import_line(key, alias):
+    kind, level, module, _, _ = key
+    name = alias.name + (f" as {alias.asname}" if alias.asname else "")
+    if kind == "import":
+        return f"import {name}"
+    return f"from {'.' * level}{module or ''} import {name}"
+
+
+def _group_imports(missing):
+    """Missing imports as lines, from-imports of the same module combined."""
+    lines = []
+    grouped = {}
+    for key, alias in missing:
+        if key[0] == "import":
+            lines.append(_import_line(key, alias))
+            continue
+        module = key[1:3]
+        if module not in grouped:
+            grouped[module] = len(lines)
+            lines.append([key, []])
+        lines[grouped[module]][1].append(alias.name + (f" as {alias.asname}" if alias.asname else ""))
+    return [
+        line if isinstance(line, str) else f"from {'.' * line[0][1]}{line[0][2] or ''} import {', '.join(line[1])}"
+        for line in lines
+    ]
+
+
+def _list_insertion(source, target, elements):
+    """(offset, bytes) that adds the element sources to the end of an existing list literal."""
+    close = source.offset(target.end_lineno, target.end_col_offset) - 1
+    if not target.elts:
+        return close, b", ".join(elements)
+    last = target.elts[-1]
+    after_last = source.offset(last.end_lineno, last.end_col_offset)
+    between = source.data[after_last:close]
+    has_comma = b"," in between
+    position = after_last + between.index(b",") + 1 if has_comma else after_last
+
+    if target.lineno == target.end_lineno:
+        return position, (b" " if has_comma else b", ") + b", ".join(elements) + (b"," if has_comma else b"")
+    line = source.data[source.starts[last.lineno - 1]:]
+    indent = line[:len(line) - len(line.lstrip(b" \t"))]
+    return position, (b"" if has_comma else b",") + b"".join(b"\n" + indent + e + b"," for e in elements)
+
+
+def merge_python(existing, new):
+    """Merge new Python source into existing by top-level structure; None if either does not parse."""
+    try:
+        old_tree = ast.parse(existing)
+        new_tree = ast.parse(new)
+    except (SyntaxError, ValueError):
+        return None
+    old, incoming = _Source(existing), _Source(new)
+
+    imports = set()
+    names = set()
+    dumps = set()
+    lists = {}
+    last_import = None
+    has_main_guard = False
+    for node in old_tree.body:
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            imports.update(key for key, _ in _import_keys(node))
+            last_import = node
+        elif isinstance(node, _DEFINITIONS):
+            names.add(node.name)
+        else:
+            names.update(_assigned_names(node))
+            assignment = _list_assignment(node)
+            if assignment and not isinstance(node, ast.AugAssign):
+                lists.setdefault(assignment[0], assignment[1])
+            has_main_guard = has_main_guard or _is_main_guard(node)
+            dumps.add(ast.dump(node))
+
+    missing_imports, missing_future = [], []
+    list_elements = {}
+    appended = []
+    for node in new_tree.body:
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            for key, alias in _import_keys(node):
+                if key not in imports:
+                    imports.add(key)
+                    (missing_future if _is_future(node) else missing_imports).append((key, alias))
+            continue
+        if isinstance(node, _DEFINITIONS):
+            if node.name not in names:
+                names.add(node.name)
+                appended.append((incoming.statement(node), True))
+            continue
+
+        assignment = _list_assignment(node)
+        if assignment and assignment[0] in lists:
+            if assignment[0] not in list_elements:
+                list_elements[assignment[0]] = ({ast.dump(e) for e in lists[assignment[0]].elts}, {})
+            seen, pending = list_elements[assignment[0]]
+            for element in assignment[1].elts:
+                key = ast.dump(element)
+                if key not in seen and key not in pending:
+                    pending[key] = incoming.segment(element)
+            continue
+
+        assigned = _assigned_names(node)
+        if assigned:
+            if isinstance(node, ast.AugAssign) or not set(assigned) <= names:
+                if ast.dump(node) not in dumps:
+                    names.update(assigned)
+                    appended.append((incoming.statement(node), False))
+        elif _is_main_guard(node):
+            if not has_main_guard:
+                has_main_guard = True
+                appended.append((incoming.statement(node), True))
+        elif ast.dump(node) not in dumps and not (isinstance(node, ast.Expr) and isinstance(node.value, ast.Constant)):
+            # Calls such as admin.site.register(Model); a bare string is a docstring, not code
+            appended.append((incoming.statement(node), False))
+        dumps.add(ast.dump(node))
+
+    if not (missing_imports or missing_future or any(pending for _, pending in list_elements.values()) or appended):
+        return existing
+
+    edits = []
+    if missing_future or (missing_imports and last_import is None):
+        # After the module docstring and any __future__ imports, before everything else
+        top = 0
+        for node in old_tree.body:
+            if _is_future(node) or (node is old_tree.body[0] and isinstance(node, ast.Expr)
+                                    and isinstance(node.value, ast.Constant) and isinstance(node.value.value, str)):
+                top = old.line_end(node.end_lineno) + 1
+            else:
+                break
+        lines = _group_imports(missing_future) + ([] if last_import else _group_imports(missing_imports))
+        edits.append((top, "".join(line + "\n" for line in lines).encode("utf-8")))
+    if missing_imports and last_import is not None:
+        position = old.line_end(last_import.end_lineno)
+        edits.append((position, "".join("\n" + line for line in _group_imports(missing_imports)).encode("utf-8")))
+    for name, (_, elements) in list_elements.items():
+        if elements:
+            edits.append(_list_insertion(old, lists[name], list(elements.values())))
+
+    data = old.data
+    for position, text in sorted(edits, key=lambda edit: edit[0], reverse=True):
+        if position > len(data):
+            data = data + b"\n"
+        data = data[:position] + text + data[position:]
+
+    if appended:
+        tail = data.rstrip(b"\n")
+        previous_block = None
+        for segment, block in appended:
+            if previous_block is None:
+                separator = b"\n\n\n" if block else b"\n\n"
+            else:
+                separator = b"\n\n\n" if (block or previous_block) else b"\n"
+            tail = (tail + separator if tail else b"") + segment
+            previous_block = block
+        data = tail + b"\n"
+    return data.decode("utf-8")
+
+
+def _merge_objects(existing, new):
+    """Add keys of new missing from existing, recursively; existing values always win. Returns (merged, changed)."""
+    merged = dict(existing)
+    changed = False
+    for key, value in new.items():
+        if key not in merged:
+            merged[key] = value
+            changed = True
+        elif isinstance(merged[key], dict) and isinstance(value, dict):
+            merged[key], sub_changed = _merge_objects(merged[key], value)
+            changed = changed or sub_changed
+    return merged, changed
+
+
+def merge_json(existing, new):
+    """Merge JSON objects such as package.json or composer.json key by key; None if either is not an object."""
+    try:
+        old_data = json.loads(existing)
+        new_data = json.loads(new)
+    except ValueError:
+        return None
+    if not isinstance(old_data, dict) or not isinstance(new_data, dict):
+        return None
+    merged, changed = _merge_objects(old_data, new_data)
+    if not changed:
+        return existing
+    indent = re.search(r"^\{\s*\n([ \t]+)\S", existing)
+    text = json.dumps(merged, indent=indent.group(1) if indent else 2, ensure_ascii=False)
+    return text + "\n" if existing.endswith("\n") else text
+
+
+def _requirement_key(line):
+    match = _REQUIREMENT_NAME.match(line)
+    return re.sub(r"[-_.]+", "-", match.group(0)).lower() if match else line
+
+
+def merge_requirements(existing, new):
+    """Add requirement lines for packages that existing does not list yet."""
+    present = {_requirement_key(line.strip()) for line in existing.splitlines() if line.strip()}
+    added = []
+    for line in new.splitlines():
+        key = _requirement_key(line.strip())
+        if line.strip() and not line.strip().startswith("#") and key not in present:
+            present.add(key)
+            added.append(line.strip())
+    if not added:
+        return existing
+    return existing + ("" if existing.endswith("\n") or not existing else "\n") + "\n".join(added) + "\n"
+
+
+def merge_content(filename, existing, new):
+    """The content of filename after merging new into existing, choosing the merger by file type."""
+    name = posixpath.basename(str(filename).replace("\\", "/"))
+    merged = None
+    if name.endswith((".py", ".pyi")):
+        merged = merge_python(existing, new)
+    elif name.endswith(".json"):
+        merged = merge_json(existing, new)
+    elif name.startswith("requirements") and name.endswith(".txt"):
+        merged = merge_requirements(existing, new)
+    return append_text(existing, new) if merged is None else merged
@@ -0,0 +1,258 @@
+import contextvars
+import functools
+import inspect
+import threading
+import time
+from contextlib import contextmanager
+
+# Seconds; LLM calls run from under a second to several minutes
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+_lock = threading.Lock()
+_registry = {}
+
+# The RequestMetrics of the request (or job) being handled, if any
+_current = contextvars.ContextVar('codegen_request_metrics', default=None)
+# Stages open in this context; concurrent tasks each get their own copy
+_active = contextvars.ContextVar('codegen_active_stages', default=frozenset())
+
+
+def _label_text(labels):
+    if not labels:
+        return ""
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for v in labels.values())
+    return "{" + ",".join(f'{k}="{v}"' for k, v in zip(labels, escaped)) + "}"
+
+
+class Histogram:
+    """A Prometheus-style histogram with a fixed label set per series."""
+    type = "histogram"
+
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self.series = {}
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with _lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["counts"][i] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def samples(self):
+        with _lock:
+            series = {key: {"counts": list(s["counts"]), "sum": s["sum"], "count": s["count"]} for key, s in self.series.items()}
+        lines = []
+        for key, s in sorted(series.items()):
+            labels = dict(key)
+            for bound, count in zip(self.buckets, s["counts"]):
+                lines.append(f"{self.name}_bucket{_label_text({**labels, 'le': bound})} {count}")
+            lines.append(f"{self.name}_bucket{_label_text({**labels, 'le': '+Inf'})} {s['count']}")
+            lines.append(f"{self.name}_sum{_label_text(labels)} {s['sum']}")
+            lines.append(f"{self.name}_count{_label_text(labels)} {s['count']}")
+        return lines
+
+
+class Counter:
+    type = "counter"
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self.series = {}
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with _lock:
+            self.series[key] = self.series.get(key, 0) + amount
+
+    def samples(self):
+        with _lock:
+            series = dict(self.series)
+        return [f"{self.name}{_label_text(dict(key))} {value}" for key, value in sorted(series.items())]
+
+
+def _register(metric):
+    _registry[metric.name] = metric
+    return metric
+
+
+REQUEST_SECONDS = _register(Histogram(
+    "codegen_request_seconds", "Wall-clock time of a request or background job.", LATENCY_BUCKETS))
+STAGE_SECONDS = _register(Histogram(
+    "codegen_stage_seconds", "Time spent in each stage of a request.", LATENCY_BUCKETS))
+FIRST_TOKEN_SECONDS = _register(Histogram(
+    "codegen_llm_time_to_first_token_seconds", "Time from sending a streaming completion to its first token.",
+    LATENCY_BUCKETS))
+RESPONSE_BYTES = _register(Histogram(
+    "codegen_llm_response_bytes", "Size of completion responses.", SIZE_BUCKETS))
+TOKENS = _register(Counter(
+    "codegen_llm_tokens_total", "Tokens reported by the completion API."))
+RECOVERY = _register(Counter(
+    "codegen_json_recovery_total", "Files extracted from model responses, by JSON recovery path."))
+
+
+class RequestMetrics:
+    """Stage timings and counters of one request, for its summary log line."""
+
+    def __init__(self, view):
+        self.view = view
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.tokens = {}
+        self.recovery = None
+
+    def summary(self, elapsed):
+        parts = [f"[metrics] {self.view} {elapsed:.3f}s"]
+        parts += [f"{name}={seconds:.3f}s" for name, seconds in self.stages.items()]
+        parts += [f"{kind}_tokens={count}" for kind, count in self.tokens.items()]
+        if self.recovery:
+            parts.append(f"recovery={self.recovery}")
+        return " ".join(parts)
+
+
+def current_view():
+    request = _current.get()
+    return request.view if request else "none"
+
+
+def _reset(var, token):
+    try:
+        var.reset(token)
+    except ValueError:
+        # An async generator resumed in another context (e.g. a streamed response under WSGI)
+        pass
+
+
+@contextmanager
+def track(view):
+    """Collect the stages run inside this block (and the tasks and threads it starts) under one request."""
+    request = RequestMetrics(view)
+    token = _current.set(request)
+    try:
+        yield request
+    finally:
+        elapsed = time.perf_counter() - request.started
+        REQUEST_SECONDS.observe(elapsed, view=view)
+        print(request.summary(elapsed))
+        _reset(_current, token)
+
+
+@contextmanager
+def stage(name):
+    """
+    Time a stage of the current request. A stage nested in itself (e.g. a
+    helper that calls another timed helper) is counted once; concurrent
+    tasks each count their own time.
+    """
+    active = _active.get()
+    if name in active:
+        yield
+        return
+
+    token = _active.set(active | {name})
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _reset(_active, token)
+        observe_stage(name, time.perf_counter() - started)
+
+
+def observe_stage(name, seconds):
+    """Record time spent in a stage that stage() can't wrap, e.g. one spread over an async generator."""
+    STAGE_SECONDS.observe(seconds, stage=name, view=current_view())
+    request = _current.get()
+    if request is not None:
+        request.stages[name] = request.stages.get(name, 0.0) + seconds
+
+
+async def track_stream(view, events):
+    """Track an async generator (e.g. a streamed response body) as one request while it is consumed."""
+    with track(view):
+        async for event in events:
+            yield event
+
+
+def timed(name):
+    """Decorator form of stage() for sync and async functions."""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with stage(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def tracked_view(view):
+    """Wrap a (sync or async) view so each call is tracked as one request."""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with track(view):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with track(view):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_tokens(usage, model):
+    """Count the prompt/completion tokens of an API usage object."""
+    if usage is None:
+        return
+    request = _current.get()
+    for kind in ("prompt", "completion"):
+        count = getattr(usage, f"{kind}_tokens", None) or 0
+        TOKENS.inc(count, kind=kind, model=model)
+        if request is not None:
+            request.tokens[kind] = request.tokens.get(kind, 0) + count
+
+
+def record_response(text, first_token_seconds=None):
+    RESPONSE_BYTES.observe(len(text.encode('utf-8')), view=current_view())
+    if first_token_seconds is not None:
+        FIRST_TOKEN_SECONDS.observe(first_token_seconds, view=current_view())
+
+
+def record_recovery(path, files=1):
+    """Count files extracted through a JSON recovery path (see json_stream.RECOVERY_PATHS)."""
+    RECOVERY.inc(files, path=path)
+    request = _current.get()
+    if request is not None:
+        request.recovery = path
+
+
+def render(extra=()):
+    """All metrics in the Prometheus text exposition format. extra: (name, type, help, value) tuples."""
+    lines = []
+    for metric in list(_registry.values()):
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        lines.extend(metric.samples())
+    for name, metric_type, help_text, value in extra:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        lines.append(f"{name} {value}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,79 @@
+class EditConflict(Exception):
+    """An edit that cannot be applied because its search text does not match the file exactly once."""
+
+
+def _locate(content, search):
+    """Return the (start, end) span of the single occurrence of search in content."""
+    count = content.count(search)
+    if count == 1:
+        start = content.index(search)
+        return start, start + len(search)
+    if count > 1:
+        raise EditConflict(f"search text matches {count} times; include more surrounding lines")
+
+    # Models often drop or add trailing whitespace; retry comparing lines without it
+    wanted = [line.rstrip() for line in search.strip('\n').split('\n')]
+    lines = content.splitlines(keepends=True)
+    stripped = [line.rstrip() for line in lines]
+    matches = [
+        i for i in range(len(lines) - len(wanted) + 1)
+        if stripped[i:i + len(wanted)] == wanted
+    ]
+    if len(matches) != 1:
+        raise EditConflict(
+            "search text not found in the file" if not matches
+            else f"search text matches {len(matches)} times; include more surrounding lines"
+        )
+
+    start = sum(len(line) for line in lines[:matches[0]])
+    end = start + sum(len(line) for line in lines[matches[0]:matches[0] + len(wanted)])
+    # Keep the line break after the matched block; the replacement doesn't carry it
+    if lines[matches[0] + len(wanted) - 1].endswith('\n') and not search.endswith('\n'):
+        end -= 1
+    return start, end
+
+
+def apply_edits(content, edits):
+    """
+    Apply [{"search", "replace"}] edits to content in order and return the
+    result. An empty search appends the replacement to the end of the file.
+    Raises EditConflict naming the first edit that does not apply.
+    """
+    for index, edit in enumerate(edits):
+        if not isinstance(edit, dict) or not isinstance(edit.get('search', ''), str) \
+                or not isinstance(edit.get('replace'), str):
+            raise EditConflict(f"edit {index} must have string 'search' and 'replace' fields")
+
+        search, replace = edit.get('search', ''), edit['replace']
+        if not search.strip():
+            content = content.rstrip('\n') + '\n\n' + replace if content.strip() else replace
+            continue
+        try:
+            start, end = _locate(content, search)
+        except EditConflict as e:
+            raise EditConflict(f"edit {index}: {e}") from None
+        content = content[:start] + replace + content[end:]
+    return content
+
+
+def apply_file_edits(current, items):
+    """
+    Apply edit items ({"filename", "edits": [...]}) to the project's current
+    files (a path -> content dict). A file is only changed if all of its edits
+    apply. Returns (changed_files, conflicts).
+    """
+    changed = {}
+    conflicts = []
+    for item in items:
+        filename = item['filename']
+        base = changed.get(filename, current.get(filename))
+        if base is None:
+            conflicts.append({"filename": filename, "error": "file does not exist; new files need full content"})
+            continue
+        try:
+            changed[filename] = apply_edits(base, item['edits'])
+        except EditConflict as e:
+            conflicts.append({"filename": filename, "error": str(e)})
+
+    files = [{"filename": path, "content": content} for path, content in changed.items() if content != current[path]]
+    return files, conflicts
@@ -0,0 +1,161 @@
+import hashlib
+import os
+import re
+import shutil
+import stat
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+from . import metrics
+from .manifest import STAGING_PREFIX, ProjectManifest, locked, relative_path
+
+# Below this many files a thread pool costs more than it saves
+PARALLEL_MIN_FILES = 8
+
+
+def resolve_path(root, filename):
+    """Absolute path of filename inside root, or None if it is absolute or would land outside the project."""
+    filename = filename.replace("\\", "/")
+    if filename.startswith("/") or re.match(r"^[A-Za-z]:", filename):
+        return None
+    target = os.path.abspath(os.path.join(root, filename))
+    if os.path.commonpath([root, target]) != root or target == root:
+        return None
+    return target
+
+
+def _unchanged(target, data, digest=None, manifest=None, filename=None):
+    """
+    True if the file at target already holds exactly these bytes. When the
+    manifest's size and mtime still describe the file, its recorded hash is
+    trusted instead of reading the file back.
+    """
+    digest = digest or hashlib.sha256(data).hexdigest()
+    try:
+        st = os.stat(target)
+        if st.st_size != len(data):
+            return False
+        if manifest is not None and manifest.matches(filename, st):
+            return manifest.entry(filename)[2] == digest
+        on_disk = hashlib.sha256()
+        with open(target, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                on_disk.update(block)
+    except OSError:
+        return False
+    return on_disk.hexdigest() == digest
+
+
+def _stage(path, data):
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def empty_report():
+    return {"written": [], "skipped": [], "rejected": [], "bytes_written": 0, "bytes_skipped": 0}
+
+
+def combine_reports(*reports):
+    """Sum several write reports, e.g. one per file of a fan-out generation."""
+    total = empty_report()
+    for report in reports:
+        for key in ("written", "skipped", "rejected"):
+            total[key].extend(report[key])
+        total["bytes_written"] += report["bytes_written"]
+        total["bytes_skipped"] += report["bytes_skipped"]
+    return total
+
+
+def accepted_files(files, report):
+    """The files a write report shows on disk: written, or skipped as unchanged. Rejected paths are dropped."""
+    accepted = set(report["written"]) | set(report["skipped"])
+    latest = {}
+    for file in files:
+        if isinstance(file, dict) and file.get("filename") in accepted:
+            latest[file["filename"]] = file
+    return list(latest.values())
+
+
+@metrics.timed("disk_write")
+def write_files(root, files, workers=None):
+    """
+    Write a batch of {"filename", "content"} files below root.
+
+    Files whose bytes on disk already match are skipped. The rest are staged
+    in a temporary directory inside root (so the final rename stays on one
+    filesystem), their directories are created once, and each staged file is
+    moved into place with os.replace, so a crash never leaves a half-written
+    file. Paths escaping root are rejected. Blocking; run it off the event loop.
+
+    The project manifest (.codegen/manifest.json) is updated with every
+    file written or confirmed unchanged.
+
+    Returns a report: written/skipped/rejected paths and bytes written/skipped.
+    """
+    root = os.path.abspath(str(root))
+    os.makedirs(root, exist_ok=True)
+    with locked(root):
+        manifest = ProjectManifest.current(root)
+        report = _write_files(root, files, workers, manifest)
+        manifest.save()
+    return report
+
+
+def _write_files(root, files, workers, manifest):
+    report = empty_report()
+
+    # The last entry wins when the model returns a path twice
+    latest = {}
+    for file in files:
+        if isinstance(file, dict) and file.get("filename"):
+            latest[file["filename"]] = file.get("content", "")
+
+    pending = []
+    for filename, content in latest.items():
+        target = resolve_path(root, filename)
+        if target is None:
+            print(f" Refusing to write outside the project: {filename}")
+            report["rejected"].append(filename)
+            continue
+        data = str(content).encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        key = relative_path(os.path.relpath(target, root))
+        if _unchanged(target, data, digest, manifest, key):
+            report["skipped"].append(filename)
+            report["bytes_skipped"] += len(data)
+            manifest.record(key, digest)
+        else:
+            pending.append((filename, target, data, key, digest))
+
+    if not pending:
+        return report
+
+    staging = tempfile.mkdtemp(prefix=STAGING_PREFIX, dir=root)
+    try:
+        staged = [os.path.join(staging, str(i)) for i in range(len(pending))]
+        if workers is None:
+            workers = getattr(settings, 'CODEGEN_WRITE_WORKERS', 4)
+        if workers > 1 and len(pending) >= PARALLEL_MIN_FILES:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                list(executor.map(_stage, staged, [data for _, _, data, _, _ in pending]))
+        else:
+            for path, (_, _, data, _, _) in zip(staged, pending):
+                _stage(path, data)
+
+        for directory in sorted({os.path.dirname(target) for _, target, _, _, _ in pending}):
+            os.makedirs(directory, exist_ok=True)
+
+        for path, (filename, target, data, key, digest) in zip(staged, pending):
+            if os.path.exists(target):
+                # Keep the permissions of the file being replaced (e.g. executable scripts)
+                os.chmod(path, stat.S_IMODE(os.stat(target).st_mode))
+            os.replace(path, target)
+            report["written"].append(filename)
+            report["bytes_written"] += len(data)
+            manifest.record(key, digest)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+    return report
@@ -0,0 +1,107 @@
+import json
+import os
+import threading
+from pathlib import Path
+from string import Formatter
+
+PROMPTS_DIR = Path(__file__).resolve().parent.parent / "prompts"
+
+DEFAULT_FRAMEWORK_REQUIREMENTS = "- No special requirements for this framework."
+
+# asset name -> (mtimes of the files it was built from, value)
+_cache = {}
+_lock = threading.Lock()
+
+
+class PromptTemplate:
+    """
+    A str.format-style template split into literal text and field names once,
+    so rendering is a join of literals and per-request values.
+    """
+
+    def __init__(self, text):
+        self.literals = [""]
+        self.fields = []
+        for literal, field, spec, conversion in Formatter().parse(text):
+            self.literals[-1] += literal
+            if field is None:
+                continue
+            if spec or conversion:
+                raise ValueError(f"Unsupported format spec in prompt template field '{field}'")
+            self.fields.append(field)
+            self.literals.append("")
+
+    def render(self, **values):
+        parts = [self.literals[0]]
+        for field, literal in zip(self.fields, self.literals[1:]):
+            parts.append(str(values[field]))
+            parts.append(literal)
+        return "".join(parts)
+
+
+def _mtimes(paths):
+    stamps = []
+    for path in paths:
+        try:
+            stamps.append(os.stat(path).st_mtime_ns)
+        except OSError:
+            stamps.append(None)
+    return tuple(stamps)
+
+
+def _load(name, paths, build):
+    """Return build(), re-running it only when one of the files it reads changed since the last load."""
+    stamp = _mtimes(paths)
+    with _lock:
+        cached = _cache.get(name)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+
+    value = build()
+    with _lock:
+        _cache[name] = (stamp, value)
+    return value
+
+
+def _build_framework_requirements():
+    with open(PROMPTS_DIR / "framework_requirements.json", "r", encoding="utf-8") as f:
+        return {key.lower().replace(" ", ""): value for key, value in json.load(f).items()}
+
+
+def _build_required_files():
+    with open(PROMPTS_DIR / "required_files.json", "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return {
+        "languages": {key.lower(): value for key, value in data.get("languages", {}).items()},
+        "aliases": {key.lower(): value for key, value in data.get("aliases", {}).items()},
+        "frameworks": {key.lower().replace(" ", ""): value for key, value in data.get("frameworks", {}).items()},
+    }
+
+
+def _build_generation_template():
+    with open(PROMPTS_DIR / "generation.txt", "r", encoding="utf-8") as f:
+        return PromptTemplate(f.read())
+
+
+def framework_requirements(framework):
+    """The extra prompt requirements for a framework name such as 'Django' or 'Next JS'."""
+    requirements = _load(
+        "framework_requirements", [PROMPTS_DIR / "framework_requirements.json"], _build_framework_requirements
+    )
+    return requirements.get((framework or "").lower().replace(" ", ""), DEFAULT_FRAMEWORK_REQUIREMENTS)
+
+
+def required_files():
+    """Files each language and framework needs, from required_files.json (see utils/required_files.py)."""
+    return _load("required_files", [PROMPTS_DIR / "required_files.json"], _build_required_files)
+
+
+def generation_template():
+    """The project generation prompt, parsed once."""
+    return _load("generation_template", [PROMPTS_DIR / "generation.txt"], _build_generation_template)
+
+
+def reload():
+    """Forget every loaded asset; the next use re-reads the files."""
+    with _lock:
+        _cache.clear()
@@ -0,0 +1,78 @@
+import fnmatch
+
+from . import prompt_assets
+from .manifest import ProjectManifest, locked
+
+# A requirement is a string of alternatives separated by "|", each a path
+# relative to the project root or a glob over those paths ("*" also matches
+# "/"), e.g. "*/wsgi.py|*/asgi.py". It is satisfied when any alternative
+# matches a file in the project manifest.
+
+
+def _key(name):
+    return (name or "").strip().lower().replace(" ", "")
+
+
+def alternatives(requirement):
+    return [pattern.strip() for pattern in requirement.split("|") if pattern.strip()]
+
+
+def describe(requirement):
+    """Prompt/report text for a requirement, e.g. "*/wsgi.py or */asgi.py"."""
+    return " or ".join(alternatives(requirement))
+
+
+def _is_glob(pattern):
+    return any(ch in pattern for ch in "*?[")
+
+
+def matches(requirement, path):
+    """True if a single project path satisfies the requirement."""
+    return any(fnmatch.fnmatchcase(path, pattern) for pattern in alternatives(requirement))
+
+
+def satisfied(requirement, manifest):
+    for pattern in alternatives(requirement):
+        if _is_glob(pattern):
+            if any(fnmatch.fnmatchcase(path, pattern) for path in manifest.files):
+                return True
+        elif manifest.exists(pattern):
+            return True
+    return False
+
+
+def requirements(language, framework, manifest):
+    """
+    Required files of a project: those of its language plus those of its
+    framework. Projects without a known framework get the requirements of
+    every framework whose "detect" files they contain.
+    """
+    data = prompt_assets.required_files()
+    language = _key(language)
+    language = data["aliases"].get(language, language)
+    required = list(data["languages"].get(language, []))
+
+    frameworks = data["frameworks"]
+    framework = _key(framework)
+    if framework in frameworks:
+        chosen = [framework]
+    else:
+        chosen = [
+            name for name, spec in frameworks.items()
+            if spec.get("detect") and all(satisfied(r, manifest) for r in spec["detect"])
+        ]
+    for name in chosen:
+        required.extend(frameworks[name].get("files", []))
+    return list(dict.fromkeys(required))
+
+
+def check(project_path, language, framework=""):
+    """
+    (required, missing) requirements of the project folder. The manifest is
+    refreshed first (a stat walk, re-hashing only changed files), so files
+    deleted or added outside the generator count. Blocking.
+    """
+    with locked(project_path):
+        manifest = ProjectManifest.refresh(project_path)
+    required = requirements(language, framework, manifest)
+    return required, [r for r in required if not satisfied(r, manifest)]
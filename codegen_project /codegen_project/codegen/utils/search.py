@@ -0,0 +1,152 @@
+import html
+import re
+
+from django.db import connection
+
+# Full-text search over projects (name, request) and their files (path,
+# content) with the SQLite FTS5 tables created by migration 0011. Project rows
+# are indexed by triggers; file bodies are indexed by ProjectHistory.save_files,
+# and triggers drop the rows of deleted files.
+
+PROJECT_TABLE = "codegen_project_search"
+FILE_TABLE = "codegen_file_search"
+
+# bm25 column weights: a hit in a project's name or request counts for more than one in a file body
+PROJECT_WEIGHTS = (10.0, 4.0)
+FILE_WEIGHTS = (3.0, 1.0)
+
+FILES_PER_RESULT = 3
+SNIPPET_TOKENS = 16
+
+# Private-use characters mark the matches so snippets can be HTML-escaped before <mark> goes in
+_OPEN, _CLOSE = "\ue000", "\ue001"
+_TERM = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def available():
+    return connection.vendor == 'sqlite'
+
+
+def match_query(text):
+    """
+    An FTS5 query from free text: every word (or "quoted phrase") must
+    match, and the last bare word also matches as a prefix. None if the
+    text has nothing to search for.
+    """
+    terms = []
+    prefix = False
+    for phrase, word in _TERM.findall(text or ""):
+        value = (phrase or word).replace('"', '').strip()
+        if not re.search(r'\w', value):
+            continue
+        terms.append(f'"{value}"')
+        prefix = not phrase and len(value) > 1
+    if not terms:
+        return None
+    if prefix:
+        terms[-1] += "*"
+    return " ".join(terms)
+
+
+def highlighted(text):
+    """An FTS snippet as safe HTML with the matches in <mark>."""
+    return html.escape(text or "").replace(_OPEN, "<mark>").replace(_CLOSE, "</mark>")
+
+
+def index_files(rows):
+    """(re)index [(ProjectFile.id, path, content)]."""
+    if not rows or not available():
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(f"DELETE FROM {FILE_TABLE} WHERE rowid = %s", [(row[0],) for row in rows])
+        cursor.executemany(f"INSERT INTO {FILE_TABLE} (rowid, path, content) VALUES (%s, %s, %s)", rows)
+
+
+def search(text, offset=0, limit=20, user_id=None):
+    """
+    Projects matching text, best first: (total, [{"project_id", "score",
+    "name", "snippet", "files": [{"filename", "snippet"}], "file_matches"}]).
+    A project ranks by its best hit, in its own text or in any of its files.
+    """
+    match = match_query(text)
+    if match is None or not available():
+        return 0, []
+
+    user_filter = "WHERE p.user_id = %s" if user_id else ""
+    hits = f"""
+        WITH hits AS (
+            SELECT rowid AS project_id, bm25({PROJECT_TABLE}, %s, %s) AS score
+            FROM {PROJECT_TABLE} WHERE {PROJECT_TABLE} MATCH %s
+            UNION ALL
+            SELECT f.project_id, bm25({FILE_TABLE}, %s, %s) AS score
+            FROM {FILE_TABLE} JOIN codegen_projectfile f ON f.id = {FILE_TABLE}.rowid
+            WHERE {FILE_TABLE} MATCH %s
+        )
+    """
+    params = [*PROJECT_WEIGHTS, match, *FILE_WEIGHTS, match] + ([user_id] if user_id else [])
+    with connection.cursor() as cursor:
+        cursor.execute(hits + f"""
+            SELECT h.project_id, MIN(h.score) AS best, COUNT(*) OVER ()
+            FROM hits h JOIN codegen_projecthistory p ON p.id = h.project_id
+            {user_filter}
+            GROUP BY h.project_id
+            ORDER BY best, h.project_id DESC
+            LIMIT %s OFFSET %s
+        """, params + [limit, offset])
+        ranked = cursor.fetchall()
+        if not ranked:
+            if offset:
+                # Past the last page: still report how many results there are
+                cursor.execute(hits + f"""
+                    SELECT COUNT(DISTINCT h.project_id)
+                    FROM hits h JOIN codegen_projecthistory p ON p.id = h.project_id
+                    {user_filter}
+                """, params)
+                return cursor.fetchone()[0], []
+            return 0, []
+
+        ids = [row[0] for row in ranked]
+        placeholders = ", ".join(["%s"] * len(ids))
+        cursor.execute(f"""
+            SELECT rowid, highlight({PROJECT_TABLE}, 0, %s, %s),
+                   snippet({PROJECT_TABLE}, 1, %s, %s, '…', %s)
+            FROM {PROJECT_TABLE} WHERE {PROJECT_TABLE} MATCH %s AND +rowid IN ({placeholders})
+        """, [_OPEN, _CLOSE, _OPEN, _CLOSE, SNIPPET_TOKENS, match, *ids])
+        project_hits = {row[0]: row[1:] for row in cursor.fetchall()}
+
+        # Rank the page's matching files first, then build snippets for the few that are shown.
+        # "+rowid" keeps the IN list out of FTS5, which would otherwise re-run the MATCH once per id.
+        cursor.execute(f"""
+            SELECT f.project_id, f.id
+            FROM {FILE_TABLE} JOIN codegen_projectfile f ON f.id = {FILE_TABLE}.rowid
+            WHERE {FILE_TABLE} MATCH %s AND f.project_id IN ({placeholders})
+            ORDER BY bm25({FILE_TABLE}, %s, %s)
+        """, [match, *ids, *FILE_WEIGHTS])
+        shown = {}
+        matches = {}
+        for project_id, file_id in cursor.fetchall():
+            matches[project_id] = matches.get(project_id, 0) + 1
+            if len(shown.setdefault(project_id, [])) < FILES_PER_RESULT:
+                shown[project_id].append(file_id)
+
+        snippets = {}
+        file_ids = [file_id for found in shown.values() for file_id in found]
+        if file_ids:
+            cursor.execute(f"""
+                SELECT rowid, path, snippet({FILE_TABLE}, 1, %s, %s, '…', %s)
+                FROM {FILE_TABLE} WHERE {FILE_TABLE} MATCH %s AND +rowid IN ({", ".join(["%s"] * len(file_ids))})
+            """, [_OPEN, _CLOSE, SNIPPET_TOKENS, match, *file_ids])
+            snippets = {row[0]: {"filename": row[1], "snippet": highlighted(row[2])} for row in cursor.fetchall()}
+
+    results = []
+    for project_id, score, _ in ranked:
+        name, snippet = project_hits.get(project_id, (None, None))
+        results.append({
+            "project_id": project_id,
+            "score": round(-score, 6),
+            "name": highlighted(name) if name is not None else None,
+            "snippet": highlighted(snippet) if snippet is not None else None,
+            "files": [snippets[file_id] for file_id in shown.get(project_id, []) if file_id in snippets],
+            "file_matches": matches.get(project_id, 0),
+        })
+    return ranked[0][2], results
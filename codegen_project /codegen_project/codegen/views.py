@@ -1,245 +1,65 @@
-import json, os, traceback, re, openai
-from django.http import JsonResponse
+import asyncio, json, os, traceback, re, base64, tempfile
+from datetime import datetime
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Count, Q, Sum
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_protect
 from django.views.decorators.http import require_POST, require_GET
 from django.shortcuts import render
-from dotenv import load_dotenv
-from .models import ProjectHistory
-from .utils.load_requirements import load_security_checks, get_save_base_path
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.html import escape
+from django.utils.http import http_date
+from .models import ProjectHistory, ProjectFile, FileBlob, Job, content_hash
 from .utils.helpers import extract_json_array, process_file_content
+from .utils.llm import OPENAI_API_KEY, chat_completion, stream_chat_completion
+from .utils.json_stream import FileStreamParser, parse_file_array, repair_json
+from .utils.context_builder import build_context
+from .utils.patches import apply_file_edits
+from .utils.merge import merge_content
+from .utils.project_writer import accepted_files, combine_reports, resolve_path, write_files
+from .utils.manifest import ProjectManifest, relative_path
+from .utils import admission, archive, installer, jobs, llm_cache, metrics, prompt_assets, required_files, search
 from pathlib import Path
 
-load_dotenv()
-# Fetch the OpenAI API key
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-
 
 if not OPENAI_API_KEY:
     raise ValueError("OPENAI_API_KEY is missing in the .env file!")
 
-# Load security checks from JSON file
-def load_security_checks():
-    try:
-        with open("security_checks.json", "r") as file:
-            return json.load(file)
-    except Exception as e:
-        print(f"Error loading security checks: {e}")
-        # Default values if file can't be loaded
-        return {
-            "security": [
-                "Sanitize user input to prevent injection attacks.",
-                "Implement API rate limiting.",
-                "Use authentication and authorization mechanisms.",
-                "Validate and sanitize data before processing.",
-                "Handle exceptions properly to avoid exposing sensitive information."
-            ],
-            "error_classes": [
-                "ValidationError",
-                "PermissionDenied", 
-                "SyntaxError",
-                "RuntimeError"
-            ]
-        }
-
-
-framework_requirements_map = {
-    "django": "- For Django: include a `core` app with models.py, views.py, urls.py, apps.py, and register it in settings.py > INSTALLED_APPS.",
-    "express": "- For Express.js: include `server.js`, route files, middleware, and `package.json`.",
-    "node": "- For native Node.js (without Express): use the built-in `http` module. Include `server.js`, route handler modules, and `package.json`.",
-    "react": "- For React: use a `public/` and `src/` folder structure with `App.js` and `index.js` as entry points.",
-    "flask": "- For Flask: include `app.py`, `routes.py`, and `requirements.txt`. Use Blueprints if modular.",
-    "php": "- For PHP: include `index.php`, `config.php`, and `composer.json`.",
-    "go": "- For Go: include `main.go`, `go.mod`, and use idiomatic structuring for routing and services.",
-    "spring": "- For Spring Boot: include `Main.java`, `pom.xml`, and `application.properties`.",
-    "nextjs": "- For Next.js: include `pages/`, `public/`, and `package.json`.",
-}
-
-# Updated system prompt for generating complete projects
-UNIVERSAL_SYSTEM_PROMPT = """
-You are an expert Secure Code Generator AI. Generate a complete, production-ready {language} project based on this user request:
-
-"{user_request}"
-
-Use idiomatic {language} practices and the standard project layout for the selected framework.
-
-The project must include:
-- Secure authentication (if Web or API).
-- Complete input validation and structured error handling.
-- Dependency management (e.g., requirements.txt, package.json).
-- All required configuration and environment setup.
-- Code that works out of the box for both local development and deployment.
-
-IMPORTANT RULES:
-- For any file you are updating or creating, include the ENTIRE content of that file — not just the new or modified part.
-- NEVER return partial file contents.
-- DO NOT return empty or placeholder files. Every file MUST contain working, relevant code.
-- NO markdown formatting, explanations, or placeholder comments.
-- DO NOT mix code from other languages or frameworks.
-- Use ONLY the language specified: {language}
-- Use ONLY the selected framework: {framework} ({framework_version})
-- Use ONLY the specified database: {database}
-- Use ONLY the specified testing framework: {testing_framework}
-- Do NOT include any files, packages, code, or libraries unrelated to the selected stack.
-- Do NOT include placeholder or empty files.
-- Do NOT assume defaults or auto-switch technologies.
-
-Dependency & Package Management:
-- Include all required packages for the selected stack.
-- For Python: add them to `requirements.txt`
-- For Node.js: add them to `package.json`
-- For Java: add them to `pom.xml` or `build.gradle`
-- For PHP: add them to `composer.json`
-- For Go: use `go.mod`
-
-All dependencies MUST be:
-- Required for the selected language + framework
-- Declared explicitly in the setup files
-- Reflecting the correct versions where applicable
-
-Violations will result in project rejection. Stick strictly to the chosen tech stack.
-
-Mandatory Project Metadata:
-1. Project Name: {project_name}
-2. Project Description: {project_description}
-3. Project Type: {project_type}
-4. Framework : {framework}
-5. Framework Version : {framework_version}
-6. Project Architecture: {architecture}
-7. Database Type: {database}
-8. Testing Framework: {testing_framework}
-9. Authentication Method: {authentication_method}
-
-Optional (Recommended):
-10. Deployment Target: {deployment_target}
-11. CI/CD Integration: {ci_cd_integration}
-12. API Documentation: {api_documentation}
-13. Initial Modules: {initial_modules}
-14. Environment Management: {env_management}
-
-Security & Best Practices (From security_check.json):
-- Prevent SQL Injection, XSS, CSRF.
-- Use parameterized queries or ORM.
-- Sanitize all input/output.
-- Enable CSRF protection for state-changing operations.
-- Implement secure authentication (JWT, OAuth2, API Keys, etc.).
-- Encrypt sensitive data. Enforce HTTPS.
-- Avoid hardcoded secrets or debug modes in production.
-- Apply error handling with: ValidationError, PermissionDenied, SyntaxError, RuntimeError.
-
-Logging:
-- Include logging (with timestamps and error tracebacks).
-- Logging should differ between dev and prod.
-
-{framework_requirements}
-"""
-
-
-# Function to install dependencies based on the language
-def install_dependencies(project_path, language):
-    try:
-        if language == "python" and os.path.exists(os.path.join(project_path, "requirements.txt")):
-            subprocess.run(["pip", "install", "-r", "requirements.txt"], cwd=project_path, check=True)
-
-        elif language in ["javascript", "nodejs"] and os.path.exists(os.path.join(project_path, "package.json")):
-            subprocess.run(["npm", "install"], cwd=project_path, check=True)
 
-        elif language == "java" and os.path.exists(os.path.join(project_path, "pom.xml")):
-            subprocess.run(["mvn", "install"], cwd=project_path, check=True)
+GENERATION_SYSTEM_MESSAGE = (
+    "You are an AI code generator.\n"
+    "You must respond ONLY with a valid JSON array of files. "
+    "Each file must be a dictionary with 'filename' and 'content' fields. "
+    "Do not add explanations, markdown, or anything else. Only raw JSON."
+)
 
-        elif language == "php" and os.path.exists(os.path.join(project_path, "composer.json")):
-            subprocess.run(["composer", "install"], cwd=project_path, check=True)
 
-        elif language == "go" and os.path.exists(os.path.join(project_path, "go.mod")):
-            subprocess.run(["go", "mod", "tidy"], cwd=project_path, check=True)
+FANOUT_PLAN_MESSAGE = (
+    "You are an AI software architect.\n"
+    "You must respond ONLY with a valid JSON array describing the files of the project. "
+    "Each entry must be a dictionary with 'filename' and 'responsibility' fields; the responsibility "
+    "says what the file contains and which other project files it uses. "
+    "Do not write any code yet. Do not add explanations, markdown, or anything else. Only raw JSON."
+)
 
-        elif language == "ruby" and os.path.exists(os.path.join(project_path, "Gemfile")):
-            subprocess.run(["bundle", "install"], cwd=project_path, check=True)
 
-        elif language == "rust" and os.path.exists(os.path.join(project_path, "Cargo.toml")):
-            subprocess.run(["cargo", "build"], cwd=project_path, check=True)
-
-        elif language == "csharp" and os.path.exists(os.path.join(project_path, "*.csproj")):
-            subprocess.run(["dotnet", "restore"], cwd=project_path, check=True)
-
-        elif language == "kotlin" and os.path.exists(os.path.join(project_path, "build.gradle")):
-            subprocess.run(["./gradlew", "build"], cwd=project_path, check=True)
-
-        print(f" Dependencies installed for {language}")
-    except subprocess.CalledProcessError as e:
-        print(f" Dependency installation failed for {language}: {str(e)}")
-
-
-# Fixed extract_json_array function
+@metrics.timed("json_extract")
 def extract_json_array(text):
-    """Extract a JSON array from text using multiple strategies with improved error handling"""
-    
-    
-    try:
-        # Clean the text before any processing
-        cleaned_text = text.strip()
-        # Remove markdown formatting
-        cleaned_text = re.sub(r'```(?:python|json)?\s*', '', cleaned_text)
-        cleaned_text = re.sub(r'```\s*$', '', cleaned_text)
-
-        # Escape problematic control characters
-        cleaned_text = re.sub(r'(?<!\\)\\n', r'\\n', cleaned_text)
-        cleaned_text = re.sub(r'(?<!\\)\\t', r'\\t', cleaned_text)
-        cleaned_text = re.sub(r'(?<!\\)\\r', r'\\r', cleaned_text)
-
-        # Try direct JSON parsing first
-        try:
-            parsed_json = json.loads(cleaned_text)
-            if isinstance(parsed_json, list):
-                # Validate structure before returning
-                for item in parsed_json:
-                    if not isinstance(item, dict) or 'filename' not in item or 'content' not in item:
-                        print(f"Invalid item structure: {item}")
-                        continue
-                return parsed_json
-            elif isinstance(parsed_json, dict) and 'files' in parsed_json:
-                return parsed_json['files']
-        except json.JSONDecodeError as e:
-            print(f"JSON parse error: {e}")
-        
-        # Try finding a JSON array pattern with regex
-        json_pattern = r'\[\s*\{[\s\S]*?\}\s*\]'
-        json_match = re.search(json_pattern, cleaned_text, re.DOTALL)
-        
-        if json_match:
-            try:
-                potential_json = json_match.group(0)
-                # Further clean up the extracted JSON string
-                potential_json = re.sub(r'\\\\+', r'\\', potential_json)  # Fix double backslashes safely
-                parsed_json = json.loads(potential_json)
-                return parsed_json
-            except json.JSONDecodeError as e:
-                print(f"JSON parse error in regex match: {e}")
-        
-        # Fallback: Try to extract file objects manually
-        file_objects = []
-        file_pattern = r'\{\s*"filename"\s*:\s*"([^"]+)"\s*,\s*"content"\s*:\s*"([\s\S]*?)"\s*\}'
-        matches = re.findall(file_pattern, cleaned_text)
-        
-        if matches:
-            for filename, content in matches:
-                file_objects.append({
-                    "filename": filename,
-                    "content": content
-                })
-            if file_objects:
-                return file_objects
-     
-    except Exception as e:
-        print(f"Error in extract_json_array: {str(e)}")
-    
-    # Fallback: create a simple text file with the response
-    return [{"filename": "response.txt", "content": text}]
-    
-    # Fallback: create a simple text file with the response
-    return [{"filename": "response.txt", "content": text}]
+    """Extract the file objects from a model response in a single pass, falling back to a response.txt file."""
+    files, recovery = parse_file_array(text)
+    metrics.record_recovery(recovery, len(files) or 1)
+    if recovery != "json":
+        print(f"extract_json_array used recovery path: {recovery}")
+
+    if not files:
+        return [{"filename": "response.txt", "content": text}]
+    return files
 
 # Fixed process_file_content function
 
+@metrics.timed("process_files")
 def process_file_content(files):
     """Process file content with improved validation, path correction, and sanitization."""
     processed_files = []
@@ -299,52 +119,104 @@ def process_file_content(files):
 
 
 def merge_or_append(file_path, new_content):
-    """Merge or append new content to an existing file.This function checks if the new content is already present and appends it if not."""
-    if os.path.exists(file_path):
-        with open(file_path, 'r', encoding='utf-8') as f:
-            existing_content = f.read()
-        if new_content.strip() not in existing_content:
-            with open(file_path, 'a', encoding='utf-8') as f:
-                f.write("\n\n" + new_content)
-    else:
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(new_content)
+    """Return the content of file_path with what new_content adds to it merged in (see utils/merge.py)."""
+    if not os.path.exists(file_path):
+        return new_content
+    with open(file_path, 'r', encoding='utf-8') as f:
+        existing_content = f.read()
+    return merge_content(file_path, existing_content, new_content)
 
 
-@csrf_protect
-@require_POST
-def generate_code(request):
-    """Handles the generation of code for a project based on user input and AI response."""
+def rate_limited_response(error):
+    """429 for a call that was not admitted in time (or that the provider rate limited), with Retry-After."""
+    response = JsonResponse({"error": str(error), "retry_after": error.retry_after}, status=429)
+    response["Retry-After"] = str(error.retry_after)
+    return response
+
+
+async def enqueue_job_response(kind, payload):
+    """Queue a background job and answer 202 with where to poll for it."""
+    job = await sync_to_async(jobs.enqueue)(kind, payload)
+    return JsonResponse({
+        "job_id": job.id,
+        "state": job.state,
+        "status_url": f"/jobs/{job.id}/"
+    }, status=202)
+
+
+@require_GET
+def metrics_view(request):
+    """This process's request, stage, token and cache metrics in the Prometheus text format."""
+    cache = llm_cache.cache_stats()
+    extra = [
+        (f"codegen_llm_cache_{name}_total", "counter", f"LLM response cache {name}.", cache[name])
+        for name in ("hits", "misses", "stores", "evictions")
+    ]
+    return HttpResponse(metrics.render(extra), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@require_GET
+def job_status(request, job_id):
+    """Report a background job's state, timings and resulting project."""
     try:
-        # Parse the incoming JSON request body
-        user_input = json.loads(request.body)
-        project_id = user_input.get('project_id')
-        module_name = user_input.get('module_name')
-        language = user_input.get('language')
-        code_request = user_input.get('code_request')
-        user_location = user_input.get('save_path', '').strip()
-        save_path = user_input.get("save_path", "")
-        
-        metadata = user_input.get("metadata", {})
-        # New fields from frontend
-        project_name = metadata.get("project_name")
-        project_type = metadata.get("project_type", "")
-        project_description = metadata.get("project_description", "")
-        framework = metadata.get("framework", "")
-        framework_version = metadata.get("framework_version", "")
-        architecture = metadata.get("architecture", "")
-        database = metadata.get("database", "")
-        testing_framework = metadata.get("testing_framework", "")
-        authentication_method = metadata.get("authentication_method", "")
-        deployment_target = metadata.get("deployment_target", "")
-        ci_cd_integration = metadata.get("ci_cd_integration", "")
-        api_documentation = metadata.get("api_documentation", "")
-        env_management = metadata.get("env_management", "")
-        initial_modules = metadata.get("initial_modules", "")
-
-        # Construct user request with metadata
-        user_request = f"""
+        job = Job.objects.get(id=job_id)
+    except Job.DoesNotExist:
+        return JsonResponse({"error": "Job not found"}, status=404)
+
+    # Make sure this process is working the queue, e.g. after a restart
+    jobs.get_pool()
+
+    now = timezone.now()
+    queued_until = job.started_at or now
+    return JsonResponse({
+        "id": job.id,
+        "kind": job.kind,
+        "state": job.state,
+        "project_id": job.project_id,
+        "result": job.result,
+        "error": job.error,
+        "created_at": job.created_at.isoformat(),
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        "queue_seconds": round((queued_until - job.created_at).total_seconds(), 3),
+        "run_seconds": round(((job.finished_at or now) - job.started_at).total_seconds(), 3) if job.started_at else None
+    })
+
+
+class GenerationRequestError(Exception):
+    """A generation payload that cannot be processed; carries the HTTP status to report."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+@metrics.timed("prompt_build")
+async def prepare_generation(user_input):
+    """Validate a generate_code payload, create the project folder and build the prompt messages."""
+    language = user_input.get('language')
+    code_request = user_input.get('code_request')
+    user_location = user_input.get('save_path', '').strip()
+
+    metadata = user_input.get("metadata", {})
+    # New fields from frontend
+    project_name = metadata.get("project_name")
+    project_type = metadata.get("project_type", "")
+    project_description = metadata.get("project_description", "")
+    framework = metadata.get("framework", "")
+    framework_version = metadata.get("framework_version", "")
+    architecture = metadata.get("architecture", "")
+    database = metadata.get("database", "")
+    testing_framework = metadata.get("testing_framework", "")
+    authentication_method = metadata.get("authentication_method", "")
+    deployment_target = metadata.get("deployment_target", "")
+    ci_cd_integration = metadata.get("ci_cd_integration", "")
+    api_documentation = metadata.get("api_documentation", "")
+    env_management = metadata.get("env_management", "")
+    initial_modules = metadata.get("initial_modules", "")
+
+    # Construct user request with metadata
+    user_request = f"""
 {code_request}
 
 Additional Project Info:
@@ -363,169 +235,461 @@ Additional Project Info:
 - Initial Modules: {initial_modules}
 """.strip()
 
-        # Determine base save path considering Desktop/Documents/Downloads shortcut
-        system_folders = ["Desktop", "Documents", "Downloads"]
-
-        if user_location in system_folders:
-            save_base_path = Path.home() / user_location
-        elif user_location:
-            # First, check if it might be a path relative to home directory
-            if user_location.startswith("~") or user_location.startswith("home/"):
-                # Always expand user paths properly
-                if user_location.startswith("home/"):
-                    # Convert "home/user/Pictures" format to "~/Pictures"
-                    parts = user_location.split("/")
-                    if len(parts) > 2:  # has at least home/user/something
-                        user_location = "~/" + "/".join(parts[2:])
-                # Now expand the path
-                user_path = Path(user_location).expanduser()
-            elif user_location.startswith("/"):
-                # Absolute path starting with /
-                user_path = Path(user_location)
-            else:
-                # Standard relative path from current directory
-                user_path = Path.cwd() / user_location
-            
-            # Check if the directory exists before using it
-            if not user_path.exists():
-                return JsonResponse({
-                    "error": f"Directory '{user_path}' does not exist. Please provide a valid path."
-                }, status=400)
-            
-            save_base_path = user_path
+    # Determine base save path considering Desktop/Documents/Downloads shortcut
+    system_folders = ["Desktop", "Documents", "Downloads"]
+
+    if user_location in system_folders:
+        save_base_path = Path.home() / user_location
+    elif user_location:
+        # First, check if it might be a path relative to home directory
+        if user_location.startswith("~") or user_location.startswith("home/"):
+            # Always expand user paths properly
+            if user_location.startswith("home/"):
+                # Convert "home/user/Pictures" format to "~/Pictures"
+                parts = user_location.split("/")
+                if len(parts) > 2:  # has at least home/user/something
+                    user_location = "~/" + "/".join(parts[2:])
+            # Now expand the path
+            user_path = Path(user_location).expanduser()
+        elif user_location.startswith("/"):
+            # Absolute path starting with /
+            user_path = Path(user_location)
         else:
-            save_base_path = Path('generated_projects').resolve()
-            # Create this default directory if it doesn't exist
-            save_base_path.mkdir(exist_ok=True)
-
-        if language and code_request:
-            
-            # Then modify the generated_name line to provide more information:
-            if project_name:
-                generated_name = project_name.replace(" ", "_")
-                print(f"Using project name: '{project_name}' as folder name: '{generated_name}'")
+            # Standard relative path from current directory
+            user_path = Path.cwd() / user_location
+        
+        # Check if the directory exists before using it
+        if not user_path.exists():
+            raise GenerationRequestError(f"Directory '{user_path}' does not exist. Please provide a valid path.")
+        
+        save_base_path = user_path
+    else:
+        save_base_path = Path('generated_projects').resolve()
+        # Create this default directory if it doesn't exist
+        save_base_path.mkdir(exist_ok=True)
+
+    if not (language and code_request):
+        raise GenerationRequestError(
+            "Missing required fields. Provide either (language & code_request) or (project_id & module_name)."
+        )
+
+    # Then modify the generated_name line to provide more information:
+    if project_name:
+        generated_name = project_name.replace(" ", "_")
+        print(f"Using project name: '{project_name}' as folder name: '{generated_name}'")
+    else:
+        generated_name = f"{language}_project_{await ProjectHistory.objects.acount() + 1}"
+        print(f"No project name provided, using default: '{generated_name}'")
+    
+    # Ensure the project directory is created directly in the specified path
+    project_path = save_base_path / generated_name
+    os.makedirs(project_path, exist_ok=True)
+
+    # Format final prompt; its static parts are loaded once and reloaded when their files change
+    prompt = prompt_assets.generation_template().render(
+        language=language,
+        project_name=project_name,
+        project_description=project_description,
+        project_type=project_type,
+        framework=framework,
+        framework_version=framework_version,
+        architecture=architecture,
+        database=database,
+        testing_framework=testing_framework,
+        authentication_method=authentication_method,
+        deployment_target=deployment_target,
+        ci_cd_integration=ci_cd_integration,
+        api_documentation=api_documentation,
+        env_management=env_management,
+        initial_modules=initial_modules,
+        user_request=user_request,
+        framework_requirements=prompt_assets.framework_requirements(framework)
+    )
+
+    return {
+        "messages": [
+            {"role": "system", "content": GENERATION_SYSTEM_MESSAGE},
+            {"role": "user", "content": prompt}
+        ],
+        "project_path": project_path,
+        "language": language,
+        "user_request": user_request,
+        "project_name": project_name,
+        "framework": framework,
+        "framework_version": framework_version,
+        "user_id": str(user_input.get('user_id') or 'anonymous'),  # owner recorded on the project
+        "client_key": None,  # set by the view from the request; LLM admission is charged to it
+        "use_cache": user_input.get('use_cache', True),  # opt out of the LLM response cache
+        "fan_out": bool(user_input.get('fan_out'))  # plan first, then generate files concurrently
+    }
+
+
+def extract_file_plan(text):
+    """Parse the planning call's [{"filename", "responsibility"}] array; returns [] if it is unusable."""
+    start, end = text.find('['), text.rfind(']')
+    if start == -1 or end <= start:
+        return []
+
+    raw = text[start:end + 1]
+    for candidate in (raw, repair_json(raw)):
+        try:
+            entries = json.loads(candidate, strict=False)
+            break
+        except json.JSONDecodeError:
+            continue
+    else:
+        return []
+
+    max_files = getattr(settings, 'CODEGEN_FANOUT_MAX_FILES', 40)
+    planned = []
+    seen = set()
+    for entry in entries if isinstance(entries, list) else []:
+        if not isinstance(entry, dict) or not isinstance(entry.get('filename'), str):
+            continue
+        filename = entry['filename'].strip().replace("\\", "/")
+        if filename and filename not in seen:
+            seen.add(filename)
+            planned.append({"filename": filename, "responsibility": str(entry.get('responsibility', ''))})
+    return planned[:max_files]
+
+
+def file_generation_messages(plan, entries, entry):
+    """Messages asking for a single planned file, with the whole file plan as shared context."""
+    file_list = "\n".join(f"- {e['filename']}: {e['responsibility']}" for e in entries)
+    return [
+        {"role": "system", "content": GENERATION_SYSTEM_MESSAGE},
+        {"role": "user", "content": (
+            f"{plan['messages'][-1]['content']}\n\n"
+            f"The project is made of these files:\n{file_list}\n\n"
+            f"Write ONLY the file {entry['filename']}: {entry['responsibility']}\n"
+            "Make it consistent with the other files in the list (imports, names, settings). "
+            "Return a JSON array containing exactly this one file."
+        )}
+    ]
+
+
+async def fan_out_files(plan):
+    """
+    Two-phase generation: one planning call for the file list, then one call
+    per file with at most CODEGEN_FANOUT_CONCURRENCY in flight. Yields
+    ("plan", entries), then ("file", file) or ("failed", {"filename", "error"})
+    in completion order. Falls back to a single call if planning fails.
+    """
+    plan_response = await chat_completion([
+        {"role": "system", "content": FANOUT_PLAN_MESSAGE},
+        {"role": "user", "content": plan["messages"][-1]["content"]}
+    ], use_cache=plan["use_cache"], user_id=plan["client_key"])
+    entries = extract_file_plan(plan_response)
+
+    if not entries:
+        print("Planning call returned no usable file list, generating in a single call")
+        ai_response = await chat_completion(plan["messages"], use_cache=plan["use_cache"], user_id=plan["client_key"])
+        for file in extract_json_array(ai_response):
+            yield "file", file
+        return
+
+    yield "plan", entries
+
+    semaphore = asyncio.Semaphore(getattr(settings, 'CODEGEN_FANOUT_CONCURRENCY', 6))
+
+    async def generate(entry):
+        try:
+            async with semaphore:
+                response = await chat_completion(
+                    file_generation_messages(plan, entries, entry), use_cache=plan["use_cache"], user_id=plan["client_key"]
+                )
+            files = parse_file_array(response)[0]
+            if not files:
+                raise ValueError("Response did not contain a file")
+            match = next((f for f in files if f['filename'] == entry['filename']), files[0])
+            return entry, {"filename": entry['filename'], "content": match['content']}, None
+        except Exception as e:
+            traceback.print_exc()
+            return entry, None, str(e)
+
+    tasks = [asyncio.ensure_future(generate(entry)) for entry in entries]
+    try:
+        for completed in asyncio.as_completed(tasks):
+            entry, file, error = await completed
+            if error is None:
+                yield "file", file
             else:
-                generated_name = f"{language}_project_{ProjectHistory.objects.count() + 1}"
-                print(f"No project name provided, using default: '{generated_name}'")
-            
-            # Ensure the project directory is created directly in the specified path
-            project_path = save_base_path / generated_name
-            
-            # Change here: Ensure the project directory is created directly in the specified path
-            os.makedirs(project_path, exist_ok=True)
-
-            # Load security and error handling details
-            security_data = load_security_checks()
-            security_checks = "\n".join(security_data["security"])
-            error_classes = ", ".join(security_data["error_classes"])
-
-            print("Security Checks Applied:")
-            
-            framework_key = framework.lower().replace(" ", "")
-            framework_requirements = framework_requirements_map.get(framework_key, "- No special requirements for this framework.")
-
-            # Format final prompt
-            prompt = UNIVERSAL_SYSTEM_PROMPT.format(
-                language=language,
-                project_name=project_name,
-                project_description=project_description,
-                project_type=project_type,
-                framework=framework,
-                framework_version=framework_version,
-                architecture=architecture,
-                database=database,
-                testing_framework=testing_framework,
-                authentication_method=authentication_method,
-                deployment_target=deployment_target,
-                ci_cd_integration=ci_cd_integration,
-                api_documentation=api_documentation,
-                env_management=env_management,
-                initial_modules=initial_modules,
-                user_request=user_request,
-                security_checks=security_checks,
-                error_classes=error_classes,
-                framework_requirements=framework_requirements
-            )
+                yield "failed", {"filename": entry['filename'], "error": error}
+    finally:
+        # The consumer went away (e.g. a closed SSE connection); stop outstanding calls
+        for task in tasks:
+            task.cancel()
+
+
+async def run_generation(plan):
+    """Generate, write and record a project from a prepared plan; returns the response body."""
+    project_path = plan["project_path"]
+    framework = plan["framework"]
+    framework_version = plan["framework_version"]
+
+    failed = []
+    reports = []
+    if plan["fan_out"]:
+        # Write each file as soon as its own call completes
+        files = []
+        async for kind, value in fan_out_files(plan):
+            if kind == "file":
+                report = await sync_to_async(write_files, thread_sensitive=False)(project_path, [value])
+                reports.append(report)
+                files.extend(accepted_files([value], report))
+            elif kind == "failed":
+                failed.append(value)
+    else:
+        # Generate code via OpenAI
+        ai_response = await chat_completion(plan["messages"], use_cache=plan["use_cache"], user_id=plan["client_key"])
+        files = extract_json_array(ai_response)
 
+        if not files or not isinstance(files, list):
+            print("Failed to parse JSON response, creating response.txt")
+            files = [{"filename": "response.txt", "content": ai_response}]
 
-            # Generate code via OpenAI
-            client = openai.OpenAI(api_key=OPENAI_API_KEY)
-            response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "You are an AI code generator.\n"
-                        "You must respond ONLY with a valid JSON array of files. "
-                        "Each file must be a dictionary with 'filename' and 'content' fields. "
-                        "Do not add explanations, markdown, or anything else. Only raw JSON."
-                    )
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ]
-        )
-            
-            ai_response = response.choices[0].message.content
-            files = extract_json_array(ai_response)
-
-            if not files or not isinstance(files, list):
-                print("Failed to parse JSON response, creating response.txt")
-                files = [{"filename": "response.txt", "content": ai_response}]
-
-            # Clean the framework version string if it includes the framework name
-            if framework and framework_version:
-                
-                # If user entered "django 4.2" or similar, strip the name
-                if framework_version.lower().startswith(framework.lower()):
-                    framework_version = framework_version[len(framework):].strip()
-
-                # Extra safety: just keep digits and dots (e.g., "4.2")
-                import re
-                match = re.search(r"\d+(\.\d+)*", framework_version)
-                if match:
-                    framework_version = match.group(0)
-
-            expected_line = f"{framework}=={framework_version}"
-
-            for file in files:
-                file_rel_path = file.get("filename")
-                if file_rel_path:
-                    full_file_path = project_path / file_rel_path
-                    os.makedirs(full_file_path.parent, exist_ok=True)
-                    with open(full_file_path, 'w', encoding='utf-8') as f:
-                        f.write(file.get("content", ""))
-
-            # Record project metadata and files in the database
-            ProjectHistory.objects.create(
-                language=language,
-                user_request=user_request,
-                response_files=files,
-                project_path=str(project_path),
-                project_name=project_name
-                 
-            )
+    # Clean the framework version string if it includes the framework name
+    if framework and framework_version:
+        
+        # If user entered "django 4.2" or similar, strip the name
+        if framework_version.lower().startswith(framework.lower()):
+            framework_version = framework_version[len(framework):].strip()
+
+        # Extra safety: just keep digits and dots (e.g., "4.2")
+        match = re.search(r"\d+(\.\d+)*", framework_version)
+        if match:
+            framework_version = match.group(0)
+
+    expected_line = f"{framework}=={framework_version}"
+
+    if not plan["fan_out"]:
+        reports.append(await sync_to_async(write_files, thread_sensitive=False)(project_path, files))
+        # Paths the writer refused are not part of the project
+        files = accepted_files(files, reports[-1])
+    write_report = combine_reports(*reports)
+    print(f"Wrote {write_report['bytes_written']} bytes, skipped {write_report['bytes_skipped']} unchanged bytes")
+
+    # Record project metadata and files in the database
+    project = await sync_to_async(ProjectHistory.objects.create_with_files)(
+        files,
+        user_id=plan["user_id"],
+        language=plan["language"],
+        framework=plan["framework"],
+        user_request=plan["user_request"],
+        project_path=str(project_path),
+        project_name=plan["project_name"]
+    )
+
+    body = {
+        "files": files,
+        "project_id": project.id,
+        "project_path": str(project_path),
+        "message": f"Project saved at {str(project_path)}",
+        "write_report": write_report
+    }
+    if failed:
+        body["failed_files"] = failed
+    return body
+
+
+@jobs.job_handler("generate_code")
+async def generate_code_job(payload):
+    if "plan" in payload:
+        # Prepared (validated, folder created) by the request that queued the job
+        plan = {**payload["plan"], "project_path": Path(payload["plan"]["project_path"])}
+    else:
+        try:
+            plan = await prepare_generation(payload)
+        except GenerationRequestError as e:
+            return {"error": str(e)}, e.status
+    return await run_generation(plan), 200
 
-            return JsonResponse({
-                "files": files,
-                "project_path": str(project_path),
-                "message": f"Project saved at {str(project_path)}"
-            })
 
-        else:
-            return JsonResponse({
-                "error": "Missing required fields. Provide either (language & code_request) or (project_id & module_name)."
-            }, status=400)
+@csrf_protect
+@require_POST
+@metrics.tracked_view("generate_code")
+async def generate_code(request):
+    """Handles the generation of code for a project based on user input and AI response."""
+    try:
+        # Parse the incoming JSON request body
+        user_input = json.loads(request.body)
+        plan = await prepare_generation(user_input)
+        plan["client_key"] = await admission.client_key(request)
+
+        # Background mode: queue the job and let the client poll /jobs/<id>/
+        if user_input.get('background'):
+            return await enqueue_job_response("generate_code", {
+                "plan": {**plan, "project_path": str(plan["project_path"])}
+            })
 
+        # Streaming mode: report and write each file as soon as the model finishes it
+        if user_input.get('stream'):
+            events = stream_fanned_out_files(plan) if plan["fan_out"] else stream_generated_files(plan)
+            events = metrics.track_stream("generate_code_stream", events)
+            response = StreamingHttpResponse(events, content_type="text/event-stream")
+            response["Cache-Control"] = "no-cache"
+            response["X-Accel-Buffering"] = "no"
+            return response
+
+        return JsonResponse(await run_generation(plan))
+
+    except GenerationRequestError as e:
+        return JsonResponse({"error": str(e)}, status=e.status)
+    except admission.AdmissionRejected as e:
+        return rate_limited_response(e)
     except Exception as e:
         traceback.print_exc()
         return JsonResponse({"error": str(e)}, status=500)
 
 
+def sse_event(event, data, event_id=None):
+    """Format one Server-Sent Events message."""
+    prefix = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{prefix}event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def stream_generated_files(plan):
+    """Consume the completion stream, writing each file the moment its JSON object closes and emitting an SSE event for it."""
+    project_path = plan["project_path"]
+    parser = FileStreamParser()
+    chunks = []
+    files = []
+    reports = []
+
+    async def save(batch):
+        report = await sync_to_async(write_files, thread_sensitive=False)(project_path, batch)
+        reports.append(report)
+        events = []
+        for file in accepted_files(batch, report):
+            files.append(file)
+            events.append(sse_event("file", {
+                "filename": file["filename"],
+                "size": len(file.get("content", "").encode("utf-8")),
+                "path": str(project_path / file["filename"])
+            }))
+        return events
+
+    try:
+        yield sse_event("start", {"project_path": str(project_path)})
+
+        async for chunk in stream_chat_completion(plan["messages"], use_cache=plan["use_cache"], user_id=plan["client_key"]):
+            chunks.append(chunk)
+            completed = parser.feed(chunk)
+            if completed:
+                for event in await save(completed):
+                    yield event
+
+        # Salvage a truncated last object, or the whole response if nothing parsed
+        remaining = parser.close()
+        metrics.record_recovery(parser.recovery, (len(files) + len(remaining)) or 1)
+        if not files and not remaining:
+            remaining = [{"filename": "response.txt", "content": "".join(chunks)}]
+        if remaining:
+            for event in await save(remaining):
+                yield event
+
+        project = await sync_to_async(ProjectHistory.objects.create_with_files)(
+            files,
+            user_id=plan["user_id"],
+            language=plan["language"],
+            framework=plan["framework"],
+            user_request=plan["user_request"],
+            project_path=str(project_path),
+            project_name=plan["project_name"]
+        )
+
+        yield sse_event("done", {
+            "project_id": project.id,
+            "project_path": str(project_path),
+            "file_count": len(files),
+            "bytes_written": combine_reports(*reports)["bytes_written"],
+            "message": f"Project saved at {str(project_path)}"
+        })
+
+    except admission.AdmissionRejected as e:
+        yield sse_event("error", {"error": str(e), "retry_after": e.retry_after})
+    except Exception as e:
+        traceback.print_exc()
+        yield sse_event("error", {"error": str(e)})
+
+
+async def stream_fanned_out_files(plan):
+    """SSE events for fan-out generation: the file plan, then each file as its own call completes."""
+    project_path = plan["project_path"]
+    files = []
+    failed = []
+    reports = []
+
+    try:
+        yield sse_event("start", {"project_path": str(project_path)})
+
+        async for kind, value in fan_out_files(plan):
+            if kind == "plan":
+                yield sse_event("plan", {"files": value})
+            elif kind == "failed":
+                failed.append(value)
+                yield sse_event("failed", value)
+            else:
+                report = await sync_to_async(write_files, thread_sensitive=False)(project_path, [value])
+                reports.append(report)
+                if not accepted_files([value], report):
+                    continue
+                files.append(value)
+                yield sse_event("file", {
+                    "filename": value["filename"],
+                    "size": len(value.get("content", "").encode("utf-8")),
+                    "path": str(project_path / value["filename"])
+                })
+
+        project = await sync_to_async(ProjectHistory.objects.create_with_files)(
+            files,
+            user_id=plan["user_id"],
+            language=plan["language"],
+            framework=plan["framework"],
+            user_request=plan["user_request"],
+            project_path=str(project_path),
+            project_name=plan["project_name"]
+        )
+
+        yield sse_event("done", {
+            "project_id": project.id,
+            "project_path": str(project_path),
+            "file_count": len(files),
+            "failed_files": failed,
+            "bytes_written": combine_reports(*reports)["bytes_written"],
+            "message": f"Project saved at {str(project_path)}"
+        })
+
+    except admission.AdmissionRejected as e:
+        yield sse_event("error", {"error": str(e), "retry_after": e.retry_after})
+    except Exception as e:
+        traceback.print_exc()
+        yield sse_event("error", {"error": str(e)})
+
+
+HISTORY_PAGE_SIZE = 20
+HISTORY_MAX_PAGE_SIZE = 100
+
+
+def encode_history_cursor(created_at, project_id):
+    """Opaque keyset cursor pointing just past (created_at, id)."""
+    raw = f"{created_at.isoformat()}|{project_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_history_cursor(cursor):
+    """Inverse of encode_history_cursor; raises ValueError on a malformed cursor."""
+    if not cursor:
+        return None
+    try:
+        created_at, project_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(project_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
 @require_GET
+@metrics.tracked_view("history")
 def fetch_history(request):
     try:
         project_id = request.GET.get('project_id')
@@ -538,24 +702,51 @@ def fetch_history(request):
                     "id": project.id,
                     "language": project.language,
                     "user_request": project.user_request,
-                    "files": project.response_files,
+                    "files": project.get_files(),
                     "created_at": project.created_at.strftime("%Y-%m-%d %H:%M"),
                     "project_name":project.project_name
                 }]
             except ProjectHistory.DoesNotExist:
                 return JsonResponse({"error": "Project not found", "history": []})
         else:
-            # Return all history items
-            history = ProjectHistory.objects.all().order_by('-created_at')
+            # Summary page, newest first; file contents are only sent when a project is opened
+            try:
+                limit = min(max(int(request.GET.get('limit', HISTORY_PAGE_SIZE)), 1), HISTORY_MAX_PAGE_SIZE)
+                cursor = decode_history_cursor(request.GET.get('cursor'))
+            except ValueError:
+                return JsonResponse({"error": "Invalid limit or cursor", "history": []}, status=400)
+
+            history = ProjectHistory.objects.order_by('-created_at', '-id')
+            if request.GET.get('user_id'):
+                history = history.filter(user_id=request.GET['user_id'])
+            if cursor:
+                created_at, last_id = cursor
+                history = history.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=last_id))
+
+            page = list(history.values('id', 'project_name', 'language', 'created_at')[:limit + 1])
+            has_more = len(page) > limit
+            page = page[:limit]
+
+            # File count and size for just this page, in one grouped query
+            stats = {
+                row['project_id']: row
+                for row in ProjectFile.objects.filter(project_id__in=[p['id'] for p in page])
+                .values('project_id')
+                .annotate(file_count=Count('id'), total_size=Sum('blob__size'))
+            }
+
             data = [{
-                "id": p.id,
-                "language": p.language,
-                "user_request": p.user_request,
-                "files": p.response_files,
-                "created_at": p.created_at.strftime("%Y-%m-%d "),
-                "project_name":p.project_name
-            } for p in history]
-            
+                "id": p['id'],
+                "language": p['language'],
+                "created_at": p['created_at'].strftime("%Y-%m-%d"),
+                "project_name": p['project_name'],
+                "file_count": stats.get(p['id'], {}).get('file_count', 0),
+                "total_size": stats.get(p['id'], {}).get('total_size') or 0
+            } for p in page]
+
+            next_cursor = encode_history_cursor(page[-1]['created_at'], page[-1]['id']) if has_more else None
+            return JsonResponse({"history": data, "next_cursor": next_cursor})
+
         return JsonResponse({"history": data})
     except Exception as e:
         print(f"ERROR in fetch_history: {str(e)}")
@@ -563,115 +754,287 @@ def fetch_history(request):
 
 
 
-def save_file_to_project(base_path, filename, content):
-    file_path = os.path.join(base_path, filename)
-    file_dir = os.path.dirname(file_path)
-
-    # Create directories if they don't exist
-    os.makedirs(file_dir, exist_ok=True)
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 50
 
-    # Optionally: warn or back up existing file
-    if os.path.exists(file_path):
-        print(f" Overwriting existing file: {file_path}")
 
-    # Write content
-    with open(file_path, 'w', encoding='utf-8') as f:
-        f.write(content)
-
-
-
-@csrf_protect
-@require_POST
-def continue_project(request):
+@require_GET
+@metrics.tracked_view("search")
+def search_projects(request):
+    """Ranked full-text search over project requests, names and file contents, one page at a time."""
+    if not search.available():
+        return JsonResponse({"error": "Search needs the SQLite FTS5 index", "results": []}, status=501)
+    query = request.GET.get('q', '').strip()
     try:
-        data = json.loads(request.body)
-        project_id = data.get('project_id')
-        follow_up = data.get('follow_up')
+        page = max(int(request.GET.get('page', 1)), 1)
+        page_size = min(max(int(request.GET.get('page_size', SEARCH_PAGE_SIZE)), 1), SEARCH_MAX_PAGE_SIZE)
+    except ValueError:
+        return JsonResponse({"error": "Invalid page or page_size", "results": []}, status=400)
+
+    with metrics.stage("search"):
+        total, hits = search.search(query, (page - 1) * page_size, page_size, request.GET.get('user_id'))
+    projects = ProjectHistory.objects.in_bulk([hit["project_id"] for hit in hits])
+
+    results = []
+    for hit in hits:
+        project = projects.get(hit["project_id"])
+        if project is None:
+            continue
+        results.append({
+            "id": project.id,
+            "project_name": project.project_name,
+            "language": project.language,
+            "created_at": project.created_at.strftime("%Y-%m-%d"),
+            "score": hit["score"],
+            "name_highlight": hit["name"] or escape(project.project_name),
+            "snippet": hit["snippet"],
+            "files": hit["files"],
+            "file_matches": hit["file_matches"],
+        })
+    return JsonResponse({
+        "query": query,
+        "results": results,
+        "page": page,
+        "page_size": page_size,
+        "total": total,
+        "has_more": page * page_size < total,
+    })
+
+
+def conditional_response(request, etag, last_modified, build):
+    """
+    Answer 304 when the client's If-None-Match / If-Modified-Since still
+    match; otherwise build the response. Both carry the validators.
+    """
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp) or build()
+    response["ETag"] = etag
+    if timestamp is not None:
+        response["Last-Modified"] = http_date(timestamp)
+    # Cacheable, but always revalidated: the same URL serves new content after an edit
+    response["Cache-Control"] = "private, no-cache"
+    return response
 
-        if not project_id or not follow_up:
-            return JsonResponse({"error": "Missing project_id or follow_up"}, status=400)
 
-        # Fetch the project to update
+@require_GET
+def get_project_files(request, project_id):
+    """A project's file tree: paths, sizes and content hashes, without the file bodies."""
+    try:
         project = ProjectHistory.objects.get(id=project_id)
+    except ProjectHistory.DoesNotExist:
+        return JsonResponse({"error": "Project not found"}, status=404)
 
-       # Get project folder path
-        project_base_path = project.project_path  # ← correct field name
-        if not project_base_path:
-            return JsonResponse({"error": "Project folder path is missing in ProjectHistory"}, status=500)
-
-        # Prepare context from existing files
-        context_text = ""
-        for file in project.response_files:
-            if isinstance(file, dict) and 'filename' in file and 'content' in file:
-                context_text += f"\n// File: {file['filename']}\n{file['content']}\n"
-
-        # Prompt to extend project
-            
-            follow_prompt = f"""
-            You are continuing an existing {project.language} project.
-
-            Below are the current files:
-
-            {context_text}
-
-            The user has requested the following task:
-            {follow_up}
-
-            DO NOT DELETE or replace existing content in any file.
-            If you're modifying an existing file, **include the original content**, and **add new code below** (or modify specific parts if needed, but do not omit unrelated code).
-            If you're adding new files, just include them in the list.
-            IMPORTANT: DO NOT return empty or placeholder files. Every file MUST contain relevant, working code.
-        If a file like views.py or models.py is included, it must contain actual implementations—not stubs or empty definitions.
-        For any file you are updating or creating, include the ENTIRE content of that file — not just the new or modified part.
-
-            NEVER return partial file contents. Always assume the system will replace the full file.
-
-            For example, if you're adding a new view, add it **after existing views**, keeping the file whole.
-
-            RETURN FORMAT:
-            Return ONLY a valid JSON array like this:
-            [
-            {{"filename": "api/views.py", "content": "# full content including previous and new code"}}
-            ]
-            No markdown, no explanation, just the array.
-            """
-
-        client = openai.OpenAI(api_key=OPENAI_API_KEY)
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You are a JSON-based code generator."},
-                {"role": "user", "content": follow_prompt}
-            ]
-        )
-
-        ai_response = response.choices[0].message.content
-        print("Continuation AI Response Preview:", ai_response[:200])
+    files = list(project.files.order_by('path').values_list('path', 'blob_id', 'blob__size', 'updated_at'))
+    tree = [{"filename": path, "size": size, "hash": blob} for path, blob, size, _ in files]
+    last_modified = max([updated_at for *_, updated_at in files], default=project.created_at)
+    # Changes whenever a path is added, removed or points at new content
+    etag = '"' + content_hash("\n".join(f"{path}\0{blob}" for path, blob, *_ in files))[:32] + '"'
 
-        # Extract and process the returned JSON files
-        new_files = extract_json_array(ai_response)
-        new_files = process_file_content(new_files)
+    return conditional_response(request, etag, last_modified, lambda: JsonResponse({
+        "project_id": project.id,
+        "project_name": project.project_name,
+        "files": tree
+    }))
 
-        # Update existing file map
-        existing_files = project.response_files
-        file_map = {file['filename']: file['content'] for file in existing_files if 'filename' in file and 'content' in file}
 
-        # Update or add new files
-        for new_file in new_files:
-            filename = new_file['filename']
-            content = new_file['content']
-            file_map[filename] = content  # Overwrite or add
+@require_GET
+def get_project_file(request, project_id, filename):
+    """One stored file's content as text; its ETag is the content hash."""
+    try:
+        entry = ProjectFile.objects.get(project_id=project_id, path=filename)
+    except ProjectFile.DoesNotExist:
+        return JsonResponse({"error": "File not found"}, status=404)
+
+    def build():
+        content = FileBlob.objects.only('data').get(hash=entry.blob_id).content
+        return HttpResponse(content, content_type="text/plain; charset=utf-8")
+
+    return conditional_response(request, f'"{entry.blob_id}"', entry.updated_at, build)
+
+
+def sync_disk_drift(project):
+    """
+    Compare the project folder with the stored files through its manifest
+    (one scandir walk, re-hashing only files whose size or mtime changed).
+    Files edited on disk since they were stored are saved back, so the
+    continuation builds on what is really there. Returns the drift
+    (modified / missing / added paths), or None without a project folder. Blocking.
+    """
+    if not project.project_path or not os.path.isdir(project.project_path):
+        return None
+    with metrics.stage("manifest_refresh"):
+        manifest = ProjectManifest.refresh(project.project_path)
+    stored = project.stored_hashes()
+    drift = manifest.diff(stored)
+
+    paths = {relative_path(path): path for path in stored}
+    pulled = []
+    for key in drift["modified"]:
+        try:
+            with open(os.path.join(manifest.root, key), 'r', encoding='utf-8') as f:
+                pulled.append({"filename": paths[key], "content": f.read()})
+        except (OSError, UnicodeDecodeError):
+            continue
+    if pulled:
+        print(f"Files edited outside the generator: {[f['filename'] for f in pulled]}")
+        project.save_files(pulled)
+    return drift
+
+
+async def run_continue_project(data):
+    """Extend an existing project from a follow-up request. Returns (response_body, status)."""
+    project_id = data.get('project_id')
+    follow_up = data.get('follow_up')
+    edit_mode = data.get('edit_mode', 'full')
+
+    if not project_id or not follow_up:
+        return {"error": "Missing project_id or follow_up"}, 400
+    if edit_mode not in ('full', 'diff'):
+        return {"error": "edit_mode must be 'full' or 'diff'"}, 400
+
+    # Fetch the project to update
+    project = await ProjectHistory.objects.aget(id=project_id)
+
+    # Get project folder path
+    project_base_path = project.project_path  # ← correct field name
+    if not project_base_path:
+        return {"error": "Project folder path is missing in ProjectHistory"}, 500
+
+    # Out-of-band edits on disk win over the stored copies
+    drift = await sync_to_async(sync_disk_drift, thread_sensitive=False)(project)
+
+    # Prepare context from existing files: the most relevant in full, outlines for the rest
+    existing_files = await sync_to_async(project.get_files)()
+    recent_paths = await sync_to_async(project.recent_paths)()
+    with metrics.stage("context_build"):
+        context_text, context_report = build_context(existing_files, follow_up, recent_paths=recent_paths)
+    print(f"Continuation context: {len(context_report['full'])} full, {len(context_report['outlined'])} outlined, "
+          f"{len(context_report['listed'])} listed, {context_report['omitted']} omitted (~{context_report['estimated_tokens']} tokens)")
+
+    if edit_mode == 'diff':
+        output_rules = """
+    Return ONLY the changes. For every EXISTING file you modify, return a list of edits:
+    each edit has a "search" block copied exactly from the current file (a few whole lines,
+    enough to match exactly once) and the "replace" block that should take its place.
+    To add code at the end of an existing file, use an empty "search".
+    Only NEW files are returned with their full "content".
+    IMPORTANT: DO NOT return empty or placeholder files. Every new file MUST contain relevant, working code.
+
+    RETURN FORMAT:
+    Return ONLY a valid JSON array like this:
+    [
+    {"filename": "api/views.py", "edits": [{"search": "def index(request):\\n    pass", "replace": "def index(request):\\n    return render(request, 'index.html')"}]},
+    {"filename": "api/serializers.py", "content": "# full content of the new file"}
+    ]
+    No markdown, no explanation, just the array.
+    """
+    else:
+        output_rules = """
+    DO NOT DELETE or replace existing content in any file.
+    If you're modifying an existing file, **include the original content**, and **add new code below** (or modify specific parts if needed, but do not omit unrelated code).
+    If you're adding new files, just include them in the list.
+    IMPORTANT: DO NOT return empty or placeholder files. Every file MUST contain relevant, working code.
+If a file like views.py or models.py is included, it must contain actual implementations—not stubs or empty definitions.
+For any file you are updating or creating, include the ENTIRE content of that file — not just the new or modified part.
+
+    NEVER return partial file contents. Always assume the system will replace the full file.
+    Only return existing files that are shown in full; do not return outlined or listed files.
+
+    For example, if you're adding a new view, add it **after existing views**, keeping the file whole.
+
+    RETURN FORMAT:
+    Return ONLY a valid JSON array like this:
+    [
+    {"filename": "api/views.py", "content": "# full content including previous and new code"}
+    ]
+    No markdown, no explanation, just the array.
+    """
+
+    # Prompt to extend project
+    follow_prompt = f"""
+    You are continuing an existing {project.language} project.
+
+    Below are the current files. Files marked "// File:" are shown in full; files marked
+    "// Outline:" show only their signatures, and some files may only be listed by name.
+
+    {context_text}
+
+    The user has requested the following task:
+    {follow_up}
+    {output_rules}"""
+
+    ai_response = await chat_completion([
+        {"role": "system", "content": "You are a JSON-based code generator."},
+        {"role": "user", "content": follow_prompt}
+    ], use_cache=data.get('use_cache', True), user_id=data.get('client_key'))
+    print("Continuation AI Response Preview:", ai_response[:200])
+
+    # Extract the returned items; edit items are applied to the stored content of their file
+    items = extract_json_array(ai_response)
+    edit_items = [f for f in items if isinstance(f, dict) and 'content' not in f and 'edits' in f]
+    new_files = process_file_content([f for f in items if f not in edit_items]) if len(edit_items) < len(items) else []
+
+    conflicts = []
+    if edit_items:
+        for item in edit_items:
+            item['filename'] = str(item['filename']).replace("\\", "/")
+        current = {f['filename']: f['content'] for f in existing_files}
+        edited_files, conflicts = apply_file_edits(current, edit_items)
+        if conflicts:
+            print(f"Edits that did not apply: {conflicts}")
+        edited_paths = {f['filename'] for f in edited_files}
+        new_files = [f for f in new_files if f['filename'] not in edited_paths] + edited_files
+
+    # The model never saw the full text of the other existing files, so a rewrite of one would drop code
+    partial = {f['filename'] for f in existing_files} - set(context_report['full'])
+    edited_paths = {item['filename'] for item in edit_items}
+    skipped = [f['filename'] for f in new_files if f['filename'] in partial and f['filename'] not in edited_paths]
+    if skipped:
+        print(f"Skipping rewrites of files that were not shown in full: {skipped}")
+        new_files = [f for f in new_files if f['filename'] not in skipped]
+
+    # Write to actual file system; files the model returned unchanged are left untouched
+    write_report = await sync_to_async(write_files, thread_sensitive=False)(project_base_path, new_files)
+
+    # Store only the files whose content changed
+    new_files = accepted_files(new_files, write_report)
+    await sync_to_async(project.save_files)(new_files)
+
+    body = {"files": new_files, "project_id": project.id, "write_report": write_report}
+    if edit_mode == 'diff':
+        body["edit_mode"] = edit_mode
+        body["conflicts"] = conflicts
+    if skipped:
+        body["skipped_files"] = skipped
+    if drift and any(drift.values()):
+        body["disk_drift"] = drift
+    return body, 200
+
+
+@jobs.job_handler("continue_project")
+async def continue_project_job(payload):
+    try:
+        return await run_continue_project(payload)
+    except ProjectHistory.DoesNotExist:
+        return {"error": "Project not found."}, 404
 
-            # Write to actual file system
-            save_file_to_project(project_base_path, filename, content)
 
-        # Save back updated files
-        updated_files = [{"filename": fname, "content": content} for fname, content in file_map.items()]
-        project.response_files = updated_files
-        project.save()
+@csrf_protect
+@require_POST
+@metrics.tracked_view("continue_project")
+async def continue_project(request):
+    try:
+        data = json.loads(request.body)
+        data["client_key"] = await admission.client_key(request)
 
-        return JsonResponse({"files": new_files})
+        # Background mode: queue the job and let the client poll /jobs/<id>/
+        if data.get('background'):
+            return await enqueue_job_response("continue_project", data)
 
+        body, status = await run_continue_project(data)
+        return JsonResponse(body, status=status)
+    except admission.AdmissionRejected as e:
+        return rate_limited_response(e)
     except Exception as e:
         print(f" ERROR in continue_project: {str(e)}")
         return JsonResponse({
@@ -694,156 +1057,432 @@ def delete_project(request):
     try:
         project = ProjectHistory.objects.get(id=project_id)
         project.delete()
+        FileBlob.objects.delete_unreferenced()
+        archive.remove_cached(project_id)
         return JsonResponse({"success": True})
     except ProjectHistory.DoesNotExist:
         return JsonResponse({"success": False, "error": "Project not found"})
 
-# Define core files for different languages
-        core_files = [
+# Files a module extends rather than replaces: its copy is merged into the existing one
+SHARED_FILES = {
     'urls.py', 'views.py', 'models.py', 'settings.py', 'wsgi.py', 'asgi.py',
     'manage.py', 'requirements.txt', 'config.py', 'forms.py', 'middleware.py',
     'admin.py', 'serializers.py', 'tests.py', 'apps.py', '__init__.py',
     'app.js', 'server.js', 'index.js', 'package.json', 'webpack.config.js',
     'babel.config.js', 'tsconfig.json', 'jest.config.js', 'routes.js',
     'main.cpp', 'app.cpp', 'program.cpp', 'CMakeLists.txt', 'Makefile',
-    'Main.java', 'App.java', 'Program.java', 'pom.xml', 'gradle.build', 
+    'Main.java', 'App.java', 'Program.java', 'pom.xml', 'build.gradle',
     'application.properties', 'log4j.xml',
     'index.html', 'main.html', 'style.css', 'script.js', 'manifest.json',
     'service-worker.js',
     'main.go', 'app.go', 'go.mod', 'go.sum',
     'index.php', 'config.php', 'routes.php', 'composer.json',
-    'Program.cs', 'Startup.cs', 'appsettings.json', 'project.csproj',
+    'Program.cs', 'Startup.cs', 'appsettings.json',
+}
 
-]
 
-@csrf_protect
-@require_POST
-def generate_module(request):
-    try:
-        user_input = json.loads(request.body)
-        project_id = user_input.get('project_id')
-        module_name = user_input.get('module_name')
-        description = user_input.get('description')
+REGENERATION_PROMPT = """
+    You are working on a {language} project named '{project_name}'{framework_note}.
+    The project is missing files it needs to build and run. Create ALL of them now:
+    {missing}
+
+    They must fit the existing project files below (imports, names, settings, dependencies).
+    Files marked "// File:" are shown in full; "// Outline:" shows only signatures.
+
+    {context}
+
+    Return ONLY a valid JSON array with one {{"filename", "content"}} entry per missing file.
+    Do not return any other file. Do not use placeholders or 'TODO'. No markdown, no explanations.
+    """
+
+
+async def regenerate_missing_files(project, missing, module_files, use_cache=True, client_key=None):
+    """
+    Ask for every missing required file in a single call, with the project
+    (including the module just written) as shared context. Writes and
+    returns the generated files that satisfy a missing requirement.
+    """
+    stored = await sync_to_async(project.get_files)()
+    written = {f['filename'] for f in module_files}
+    files = [f for f in stored if f['filename'] not in written] + module_files
+    query = " ".join(required_files.describe(r) for r in missing)
+    with metrics.stage("context_build"):
+        context_text, _ = build_context(files, query)
+
+    prompt = REGENERATION_PROMPT.format(
+        language=project.language,
+        project_name=os.path.basename(project.project_path.rstrip('/')),
+        framework_note=f" using {project.framework}" if project.framework else "",
+        missing="\n    ".join(f"- {required_files.describe(r)}" for r in missing),
+        context=context_text
+    )
+    ai_response = await chat_completion([
+        {"role": "system", "content": GENERATION_SYSTEM_MESSAGE},
+        {"role": "user", "content": prompt}
+    ], use_cache=use_cache, user_id=client_key)
+
+    generated = [
+        f for f in process_file_content(extract_json_array(ai_response))
+        if any(required_files.matches(r, relative_path(f['filename'])) for r in missing)
+    ]
+    if generated:
+        report = await sync_to_async(write_files, thread_sensitive=False)(project.project_path, generated)
+        generated = accepted_files(generated, report)
+    return generated
 
-        if not (project_id and module_name and description):
-            return JsonResponse({"error": "Missing required fields: project_id, module_name, description"}, status=400)
 
-        # Fetch the corresponding project from history
-        project = ProjectHistory.objects.get(id=project_id)
+async def run_generate_module(user_input):
+    """Generate a module into an existing project. Returns (response_body, status)."""
+    project_id = user_input.get('project_id')
+    module_name = user_input.get('module_name')
+    description = user_input.get('description')
 
-        # Extract the project name from project_path (Fix for AttributeError)
-        project_name = os.path.basename(project.project_path.rstrip('/'))
+    if not (project_id and module_name and description):
+        return {"error": "Missing required fields: project_id, module_name, description"}, 400
 
-        # Prepare the module generation prompt
-        module_prompt = f"""
-        You are working on a {project.language} project named '{project_name}'.
-        Generate a module '{module_name}' based on the following description:
+    # Fetch the corresponding project from history
+    project = await ProjectHistory.objects.aget(id=project_id)
 
-        {description}
+    # Extract the project name from project_path (Fix for AttributeError)
+    project_name = os.path.basename(project.project_path.rstrip('/'))
 
-        Ensure that you include the necessary core files for {project.language}.
-        These are the required core files:
-        {core_files}
+    # Required files of this project's language and framework, and which of them it lacks
+    required, missing = await sync_to_async(required_files.check, thread_sensitive=False)(
+        project.project_path, project.language, project.framework
+    )
+    required_text = "\n    ".join(
+        f"- {required_files.describe(r)}{' (missing)' if r in missing else ''}" for r in required
+    ) or "- No specific files are required."
 
-        Return the module as a JSON array of files. 
-        Do not use placeholders or 'TODO'.
-        
-        Instructions:
-        - Include ALL required files for the module functionality.
-        - If updates are required in existing files like urls.py or settings.py, include updated content.
-        - Do not use placeholders or 'TODO'.
-        - No markdown, no explanations.
-        - Return a valid JSON array of files.
-        """
-
-        # Call OpenAI for module generation
-        client = openai.OpenAI(api_key=OPENAI_API_KEY)
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You output ONLY JSON with full code."},
-                {"role": "user", "content": module_prompt}
-            ]
-        )
+    # Prepare the module generation prompt
+    module_prompt = f"""
+    You are working on a {project.language} project named '{project_name}'.
+    Generate a module '{module_name}' based on the following description:
 
-        ai_response = response.choices[0].message.content
-        new_files = extract_json_array(ai_response)
+    {description}
 
-        for file in new_files:
-            if "filename" in file and "content" in file:
-                file_rel_path = file["filename"]
-                content = file["content"]
-                full_file_path = os.path.join(project.project_path, file_rel_path)
+    The project must contain these files (create the ones marked missing):
+    {required_text}
 
-                # Check if the file is one of the core files across multiple languages
-                if any(core_file in os.path.basename(file_rel_path) for core_file in core_files):
-                    merge_or_append(full_file_path, content)
-                else:
-                    os.makedirs(os.path.dirname(full_file_path), exist_ok=True)
-                    with open(full_file_path, 'w', encoding='utf-8') as f:
-                        f.write(content)
+    Return the module as a JSON array of files. 
+    Do not use placeholders or 'TODO'.
+    
+    Instructions:
+    - Include ALL required files for the module functionality.
+    - If updates are required in existing files like urls.py or settings.py, include updated content.
+    - Do not use placeholders or 'TODO'.
+    - No markdown, no explanations.
+    - Return a valid JSON array of files.
+    """
+
+    # Call OpenAI for module generation
+    ai_response = await chat_completion([
+        {"role": "system", "content": "You output ONLY JSON with full code."},
+        {"role": "user", "content": module_prompt}
+    ], use_cache=user_input.get('use_cache', True), user_id=user_input.get('client_key'))
+    new_files = extract_json_array(ai_response)
+
+    new_files = await sync_to_async(write_module_files, thread_sensitive=False)(project.project_path, new_files)
+
+    # Whatever is still missing is requested in one batched call rather than file by file
+    _, missing = await sync_to_async(required_files.check, thread_sensitive=False)(
+        project.project_path, project.language, project.framework
+    )
+    if missing:
+        print(f"⚠️ Missing required files detected: {[required_files.describe(r) for r in missing]}")
+        new_files += await regenerate_missing_files(
+            project, missing, new_files, user_input.get('use_cache', True), user_input.get('client_key')
+        )
+        _, missing = await sync_to_async(required_files.check, thread_sensitive=False)(
+            project.project_path, project.language, project.framework
+        )
 
-        # **Step 1: Verify Missing Core Files**
-        for core_file in core_files:
-            core_file_clean = core_file.strip()
-            full_file_path = os.path.join(project.project_path, core_file_clean)
+    # Update project history; what was written is recorded even if files are still missing
+    await sync_to_async(project.save_files)(new_files)
 
-            if not os.path.exists(full_file_path):
-                missing_files.append(core_file_clean)
+    if missing:
+        final_missing = [required_files.describe(r) for r in missing]
+        return {"error": f"Some core files are still missing after retry: {final_missing}"}, 500
 
-        # **Step 2: Retry Generating Missing Files**
-        if missing_files:
-            print(f"⚠️ Missing core files detected: {missing_files}")
+    return {
+        "files": new_files,
+        "project_id": project.id,
+        "message": f"Module '{module_name}' generated and updated successfully in project '{project_name}'."
+    }, 200
 
-            for missing_file in missing_files:
-                regenerate_core_file(project.project_path, missing_file)
 
-        # **Step 3: Final Verification After Regeneration**
-        final_missing = verify_missing_files(project.project_path, core_files)
-        if final_missing:
-            return JsonResponse({"error": f"Some core files are still missing after retry: {final_missing}"}, status=500)
+@jobs.job_handler("generate_module")
+async def generate_module_job(payload):
+    try:
+        return await run_generate_module(payload)
+    except ProjectHistory.DoesNotExist:
+        return {"error": "Project not found."}, 404
 
-        # Update project history
-        project.response_files.extend(new_files)
-        project.save()
 
-        return JsonResponse({
-            "files": new_files,
-            "message": f"Module '{module_name}' generated and updated successfully in project '{project_name}'."
-        })
+@csrf_protect
+@require_POST
+@metrics.tracked_view("generate_module")
+async def generate_module(request):
+    try:
+        user_input = json.loads(request.body)
+        user_input["client_key"] = await admission.client_key(request)
 
+        # Background mode: queue the job and let the client poll /jobs/<id>/
+        if user_input.get('background'):
+            return await enqueue_job_response("generate_module", user_input)
+
+        body, status = await run_generate_module(user_input)
+        return JsonResponse(body, status=status)
     except ProjectHistory.DoesNotExist:
         return JsonResponse({"error": "Project not found."}, status=404)
+    except admission.AdmissionRejected as e:
+        return rate_limited_response(e)
     except Exception as e:
         traceback.print_exc()
         return JsonResponse({"error": str(e)}, status=500)
 
-# **Helper Functions**
-def verify_missing_files(project_path, core_files):
-    """Verify if any core files are still missing."""
-    still_missing = []
-    for core_file in core_files:
-        full_file_path = os.path.join(project_path, core_file.strip())
-        if not os.path.exists(full_file_path):
-            still_missing.append(core_file)
-    return still_missing
-
-def regenerate_core_file(project_path, file_name):
-    """Attempt to regenerate a missing core file using AI."""
-    full_file_path = os.path.join(project_path, file_name)
-    
+@jobs.job_handler("install", limit=installer.max_concurrent)
+async def install_job(payload):
     try:
-        # Call AI API to regenerate content (Replace with your actual AI call)
-        regenerated_content = f"# Regenerated {file_name} using AI API\n"
+        project = await ProjectHistory.objects.aget(id=payload.get('project_id'))
+    except ProjectHistory.DoesNotExist:
+        return {"error": "Project not found."}, 404
+    if not project.project_path or not os.path.isdir(project.project_path):
+        return {"error": "Project folder not found."}, 404
 
-        os.makedirs(os.path.dirname(full_file_path), exist_ok=True)
-        with open(full_file_path, 'w', encoding='utf-8') as f:
-            f.write(regenerated_content)
-        
-        print(f" {file_name} regenerated successfully.")
-    
-    except Exception as e:
-        print(f" Failed to regenerate {file_name}: {e}")
+    steps = await installer.install_project(project.project_path)
+    body = {"project_id": project.id, "steps": steps}
+    failed = [f"{step['directory']} ({step['ecosystem']}: {step['status']})" for step in steps if step['status'] != "ok"]
+    if failed:
+        body["error"] = f"{len(failed)} of {len(steps)} installs failed: {', '.join(failed)}"
+        return body, 500
+    return body, 200
+
+
+def install_urls(job_id):
+    return {"status_url": f"/jobs/{job_id}/", "log_url": f"/install_dependencies/{job_id}/log/"}
+
+
+@csrf_protect
+@require_POST
+async def install_dependencies(request):
+    """Queue a dependency install into the project's own environment; follow it at log_url (SSE) or status_url."""
+    try:
+        data = json.loads(request.body)
+        project = await ProjectHistory.objects.aget(id=data.get('project_id'))
+    except (ValueError, ProjectHistory.DoesNotExist):
+        return JsonResponse({"error": "Project not found."}, status=404)
+    if not project.project_path or not os.path.isdir(project.project_path):
+        return JsonResponse({"error": "Project folder not found."}, status=404)
+
+    # One install per project at a time; they would fight over the same .venv / node_modules
+    active = await Job.objects.filter(
+        kind="install", project_id=project.id, state__in=[Job.QUEUED, Job.RUNNING]
+    ).order_by('-id').afirst()
+    if active:
+        return JsonResponse({
+            "error": "An install is already in progress for this project.",
+            "job_id": active.id,
+            "state": active.state,
+            **install_urls(active.id)
+        }, status=409)
+
+    job = await sync_to_async(jobs.enqueue)("install", {"project_id": project.id}, project_id=project.id)
+    return JsonResponse({"job_id": job.id, "state": job.state, **install_urls(job.id)}, status=202)
+
+
+async def stream_install_log(job_id, path, offset):
+    """SSE "log" events with the lines appended to an install log, then "done" with the job's outcome."""
+    poll_interval = getattr(settings, 'CODEGEN_INSTALL_LOG_POLL_INTERVAL', 0.5)
+    pending = b""
+    while True:
+        job = await Job.objects.filter(id=job_id).values('state', 'result', 'error').afirst()
+        finished = job is None or job['state'] in (Job.SUCCEEDED, Job.FAILED)
+
+        # A queued job's log may still be the previous install's, which is truncated when this one starts
+        if job is not None and job['state'] != Job.QUEUED:
+            data = await sync_to_async(read_log_from, thread_sensitive=False)(path, offset)
+            if data is None:
+                offset, pending = 0, b""
+            elif data:
+                pending += data
+                offset += len(data)
+                complete, _, pending = pending.rpartition(b"\n")
+                if complete:
+                    lines = complete.decode("utf-8", errors="replace").split("\n")
+                    yield sse_event("log", {"lines": lines}, event_id=offset - len(pending))
+                continue
+
+        if finished:
+            if pending:
+                yield sse_event("log", {"lines": [pending.decode("utf-8", errors="replace")]}, event_id=offset)
+            yield sse_event("done", job or {"state": "missing"})
+            return
+        await asyncio.sleep(poll_interval)
+
+
+def read_log_from(path, offset, limit=64 * 1024):
+    """Up to `limit` bytes of the log after offset; None when the log was restarted below offset."""
+    try:
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < offset:
+                return None
+            f.seek(offset)
+            return f.read(limit)
+    except FileNotFoundError:
+        return b""
+
+
+@require_GET
+async def install_log(request, job_id):
+    """Live install output as Server-Sent Events; reconnecting clients resume from Last-Event-ID."""
+    try:
+        job = await Job.objects.aget(id=job_id, kind="install")
+        project = await ProjectHistory.objects.aget(id=job.payload.get('project_id'))
+    except (Job.DoesNotExist, ProjectHistory.DoesNotExist):
+        return JsonResponse({"error": "Install job not found"}, status=404)
+
+    try:
+        offset = max(0, int(request.headers.get("Last-Event-ID") or request.GET.get("offset") or 0))
+    except ValueError:
+        offset = 0
+    path = installer.log_path(project.project_path)
+    response = StreamingHttpResponse(stream_install_log(job.id, path, offset), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+EXPORT_BLOB_BATCH = 64
+
+
+async def stored_archive_chunks(writer, entries):
+    """Archive pieces for stored files, loading bodies a batch at a time so memory stays flat."""
+    for start in range(0, len(entries), EXPORT_BLOB_BATCH):
+        batch = entries[start:start + EXPORT_BLOB_BATCH]
+        contents = await sync_to_async(FileBlob.objects.contents)({blob for _, blob, _ in batch})
+        for name, blob, updated_at in batch:
+            yield writer.add_bytes(name, contents[blob].encode('utf-8'), updated_at.timestamp())
+
+
+async def stream_archive(writer, parts, cache_path):
+    """
+    Stream an archive built from `parts` (generators of bytes), compressing
+    off the event loop, and keep a copy at cache_path once it is complete.
+    """
+    tee = None
+    tmp_path = None
+    if cache_path:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".", dir=os.path.dirname(cache_path))
+        tee = os.fdopen(fd, "wb")
+    try:
+        async for part in parts:
+            while (chunk := await sync_to_async(archive.next_chunk, thread_sensitive=False)(part, tee)) is not None:
+                yield chunk
+        closing = writer.close()
+        while (chunk := await sync_to_async(archive.next_chunk, thread_sensitive=False)(closing, tee)) is not None:
+            yield chunk
+
+        if tee:
+            tee.close()
+            os.replace(tmp_path, cache_path)
+            tmp_path = None
+            await sync_to_async(archive.remove_cached, thread_sensitive=False)(
+                os.path.basename(cache_path).split("-", 1)[0], keep=cache_path
+            )
+    finally:
+        # An interrupted download leaves no partial archive behind
+        if tee and not tee.closed:
+            tee.close()
+        if tmp_path:
+            os.remove(tmp_path)
+
+
+async def iterate(items):
+    for item in items:
+        yield item
+
+
+async def read_file_chunks(path):
+    with open(path, "rb") as f:
+        while chunk := await sync_to_async(f.read, thread_sensitive=False)(archive.READ_CHUNK):
+            yield chunk
+
+
+@require_GET
+async def export_project(request, project_id):
+    """
+    Download a project as ZIP (?format=zip, default) or tar.gz, built from the
+    stored files (?source=stored, default) or the project folder
+    (?source=disk). The archive is streamed as it is compressed; an unchanged
+    project is served from the archive cached by its previous export.
+    """
+    fmt = request.GET.get('format', 'zip')
+    source = request.GET.get('source', 'stored')
+    if fmt not in archive.FORMATS or source not in ('stored', 'disk'):
+        return JsonResponse({"error": "format must be zip or tar.gz, source must be stored or disk"}, status=400)
+    try:
+        project = await ProjectHistory.objects.aget(id=project_id)
+    except ProjectHistory.DoesNotExist:
+        return JsonResponse({"error": "Project not found"}, status=404)
+
+    root = re.sub(r"[^\w.-]+", "_", project.project_name or "").strip("._") or f"project_{project.id}"
+    writer = archive.ArchiveWriter(fmt, root)
+    if source == 'stored':
+        entries = [
+            (name, blob, updated_at)
+            async for path, blob, updated_at in project.files.order_by('path').values_list('path', 'blob_id', 'updated_at')
+            if (name := archive.archive_name(path))
+        ]
+        digest = archive.fingerprint([("", root)] + [(name, f"{blob}:{updated_at.timestamp()}") for name, blob, updated_at in entries])
+        parts = stored_archive_chunks(writer, entries)
+    else:
+        if not project.project_path or not os.path.isdir(project.project_path):
+            return JsonResponse({"error": "Project folder not found"}, status=404)
+        files = await sync_to_async(archive.disk_files, thread_sensitive=False)(project.project_path)
+        digest = archive.fingerprint([
+            ("", root), ("files", await sync_to_async(archive.disk_fingerprint, thread_sensitive=False)(files))
+        ])
+        parts = iterate(writer.add_file(name, path) for name, path in files)
+
+    etag = f'"{source}-{digest[:32]}"'
+    if etag in [tag.strip() for tag in request.headers.get('If-None-Match', '').split(',')]:
+        response = HttpResponse(status=304)
+        response["ETag"] = etag
+        return response
+
+    content_type, extension = archive.FORMATS[fmt]
+    use_cache = getattr(settings, 'CODEGEN_EXPORT_CACHE_ENABLED', True)
+    cache_path = archive.cached_path(project.id, source, fmt, digest) if use_cache else None
+    if cache_path and os.path.exists(cache_path):
+        response = StreamingHttpResponse(read_file_chunks(cache_path), content_type=content_type)
+        response["Content-Length"] = str(os.path.getsize(cache_path))
+        response["X-Export-Cache"] = "hit"
+    else:
+        response = StreamingHttpResponse(stream_archive(writer, parts, cache_path), content_type=content_type)
+        response["X-Export-Cache"] = "miss"
+    response["Content-Disposition"] = f'attachment; filename="{root}.{extension}"'
+    response["ETag"] = etag
+    response["Cache-Control"] = "private, no-cache"
+    return response
+
+
+# **Helper Functions**
+def write_module_files(project_path, new_files):
+    """Write module files, merging them into existing shared files, and return what was written. Blocking; run it off the event loop."""
+    batch = []
+    for file in new_files:
+        if "filename" in file and "content" in file:
+            file_rel_path = file["filename"]
+            content = file["content"]
+            full_file_path = resolve_path(os.path.abspath(str(project_path)), file_rel_path)
+
+            # Shared files (urls.py, settings.py, package.json...) are extended, not replaced
+            if full_file_path and os.path.basename(file_rel_path) in SHARED_FILES:
+                content = merge_or_append(full_file_path, content)
+            batch.append({"filename": file_rel_path, "content": content})
+    return accepted_files(batch, write_files(project_path, batch))
 
 
 
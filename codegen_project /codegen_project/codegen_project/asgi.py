@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'codegen_project.settings')
 
 application = get_asgi_application()
+
+# Pick up queued jobs in this server process (CODEGEN_JOB_START_WITH_SERVER)
+from codegen.utils import jobs  # noqa: E402
+
+jobs.start_with_server()
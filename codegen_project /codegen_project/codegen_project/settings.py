@@ -122,3 +122,89 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# LLM response cache (codegen/utils/llm_cache.py)
+
+CODEGEN_LLM_CACHE_ENABLED = True
+CODEGEN_LLM_CACHE_TTL = 7 * 24 * 60 * 60  # seconds
+CODEGEN_LLM_CACHE_MAX_BYTES = 200 * 1024 * 1024
+
+
+# Background job queue (codegen/utils/jobs.py)
+
+CODEGEN_JOB_WORKERS = 4
+CODEGEN_JOB_POLL_INTERVAL = 1.0  # seconds between checks for jobs queued by other processes
+CODEGEN_JOB_STALE_AFTER = 30 * 60  # running jobs older than this are failed when a pool starts
+CODEGEN_JOB_START_WITH_SERVER = True  # asgi.py/wsgi.py start the workers at startup, not on the first job request
+
+
+# Continuation context (codegen/utils/context_builder.py)
+
+CODEGEN_CONTEXT_TOKEN_BUDGET = 4000  # estimated prompt tokens spent on existing project files
+
+
+# Fan-out generation ("fan_out": true): a planning call, then one call per file
+
+CODEGEN_FANOUT_CONCURRENCY = 6  # per-file calls in flight at once
+CODEGEN_FANOUT_MAX_FILES = 40
+
+
+# Project file writer (codegen/utils/project_writer.py)
+
+CODEGEN_WRITE_WORKERS = 4  # threads used to stage large batches; 1 writes sequentially
+
+
+# OpenAI client pool (codegen/utils/llm.py)
+
+CODEGEN_LLM_BASE_URL = None  # e.g. a local OpenAI-compatible stand-in; None uses OPENAI_BASE_URL or the public API
+CODEGEN_LLM_TIMEOUT = 300.0  # seconds; large projects stream for minutes
+CODEGEN_LLM_CONNECT_TIMEOUT = 10.0
+CODEGEN_LLM_MAX_CONNECTIONS = 20
+CODEGEN_LLM_MAX_KEEPALIVE_CONNECTIONS = 10
+CODEGEN_LLM_KEEPALIVE_EXPIRY = 60.0  # seconds an idle connection is kept open
+CODEGEN_LLM_MAX_RETRIES = 2
+
+
+# LLM admission control (codegen/utils/admission.py), shared by all worker processes on the host
+# "User" limits apply per signed-in account, else per REMOTE_ADDR (behind a proxy, make it the client address)
+
+CODEGEN_ADMISSION_ENABLED = True
+CODEGEN_ADMISSION_DB = None  # sqlite file holding the shared buckets; None uses the system temp dir
+CODEGEN_ADMISSION_GLOBAL_RPM = 500  # provider quota: requests per minute
+CODEGEN_ADMISSION_GLOBAL_TPM = 150_000  # provider quota: tokens per minute
+CODEGEN_ADMISSION_USER_RPM = 60
+CODEGEN_ADMISSION_USER_TPM = 60_000
+CODEGEN_ADMISSION_GLOBAL_CONCURRENCY = 16  # LLM calls in flight at once
+CODEGEN_ADMISSION_USER_CONCURRENCY = 4
+CODEGEN_ADMISSION_COMPLETION_TOKENS = 2000  # completion size charged up front, corrected from the usage afterwards
+CODEGEN_ADMISSION_MAX_WAIT = 10  # seconds a request may queue before a 429 with Retry-After
+CODEGEN_ADMISSION_JOB_MAX_WAIT = 5 * 60  # background jobs can wait longer
+CODEGEN_ADMISSION_SLOT_TTL = 15 * 60  # slots older than this are assumed leaked
+
+
+# Dependency installer (codegen/utils/installer.py); installs run as "install" background jobs
+
+CODEGEN_INSTALL_CONCURRENCY = 2  # install jobs a job pool runs at once; the rest stay queued without holding a worker
+CODEGEN_INSTALL_TIMEOUT = 15 * 60  # seconds per install command before it is killed
+CODEGEN_INSTALL_LOG_POLL_INTERVAL = 0.5  # seconds between checks for new log output
+
+
+# Reuse of built environments between projects (codegen/utils/env_cache.py)
+
+CODEGEN_ENV_CACHE_ENABLED = True
+CODEGEN_ENV_CACHE_DIR = None  # None uses ~/.cache/codegen; also holds the shared pip and npm download caches
+CODEGEN_ENV_CACHE_MAX_BYTES = 5 * 1024 ** 3  # least recently used environments are evicted beyond this
+CODEGEN_ENV_CACHE_HARDLINK = False  # True hard-links files out of the cache instead of copying; they are made read-only, so a project cannot change the cache
+
+
+# Project export (codegen/utils/archive.py)
+
+CODEGEN_EXPORT_CACHE_ENABLED = True  # keep the last archive per project, source and format
+CODEGEN_EXPORT_CACHE_DIR = None  # None uses ~/.cache/codegen/exports
+
+
+# Stored file bodies (codegen/utils/compression.py); existing rows stay readable whatever is set here
+
+CODEGEN_BLOB_COMPRESSION = True  # False stores new bodies as plain UTF-8
+CODEGEN_BLOB_COMPRESSION_LEVEL = 6  # zlib level, 1 (fastest) to 9 (smallest)
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'codegen_project.settings')
 
 application = get_wsgi_application()
+
+# Pick up queued jobs in this server process (CODEGEN_JOB_START_WITH_SERVER)
+from codegen.utils import jobs  # noqa: E402
+
+jobs.start_with_server()